@@ -0,0 +1,128 @@
+import os
+import re
+import sys
+import argparse
+from time import perf_counter
+from dotenv import dotenv_values
+from Backend.Cache import NormalizeText, TTLCache
+
+# Answers to recurring general questions ("what is a SYN flood", "explain MITRE T1059"), reused
+# when a question asks the same thing in other words: filler, word order and plurals may differ,
+# the topic words may not.
+#
+# Benchmark: python -m Backend.AnswerCache [--entries 100000] [--lookups 200]
+
+# --- Configuration ---
+
+env_vars = dotenv_values(".env")
+ANSWER_CACHE = (env_vars.get("ANSWER_CACHE") or "True") == "True"
+ANSWER_CACHE_PATH = os.path.join("Data", "AnswerCache.json")
+ANSWER_CACHE_SIZE = int(env_vars.get("ANSWER_CACHE_SIZE") or 10000) # cached answers
+ANSWER_CACHE_TTL = int(env_vars.get("ANSWER_CACHE_TTL") or 7 * 86400) # seconds an answer is reused
+
+# Words that do not change what is asked: "what is a SYN flood" and "explain SYN flood" share a key
+_FILLER = {
+    "a", "an", "the", "what", "whats", "is", "are", "was", "explain", "describe", "define", "definition",
+    "of", "tell", "me", "about", "please", "can", "could", "you", "i", "want", "to", "know", "give",
+    "meaning", "does", "do", "mean", "briefly", "quick", "quickly",
+}
+# The answer depends on the date and time injected into the prompt
+_TIME_WORDS = re.compile(
+    r"\b(time|date|today|tonight|tomorrow|yesterday|now|current|currently|latest|recent|recently|"
+    r"day|week|month|year|weekday|clock|hour|minute|age|old|ago)\b")
+# The answer depends on the conversation so far ("tell me more", "why does that matter")
+_CONTEXT_WORDS = {
+    "it", "its", "that", "this", "these", "those", "he", "she", "him", "her", "his", "they", "them",
+    "their", "above", "previous", "earlier", "again", "more", "else", "same",
+}
+_CLOCK = re.compile(r"\b\d{1,2}:\d{2}\b")
+
+
+# --- Helpers ---
+
+def TopicWords(query):
+    """The query's words without filler, in order."""
+    return [word for word in NormalizeText(query).split() if word not in _FILLER]
+
+def Cacheable(query):
+    """False for queries whose answer depends on the date and time or on earlier turns."""
+    words = NormalizeText(query).split()
+    if not words or _TIME_WORDS.search(" ".join(words)):
+        return False
+    return not _CONTEXT_WORDS.intersection(words) and bool(TopicWords(query))
+
+def MentionsDatetime(answer, now):
+    """True when an answer quotes the date or time: weekday, day and month, year or a clock time."""
+    text = answer.lower()
+    weekday, month = now.strftime("%A").lower(), now.strftime("%B").lower()
+    return (weekday in text or str(now.year) in text or _CLOCK.search(text) is not None
+            or re.search(rf"\b{now.day}(st|nd|rd|th)? {month}\b|\b{month} {now.day}\b", text) is not None)
+
+def TopicWord(word):
+    """A plural reduced to its singular ("ports" -> "port" but not "ips" -> "ip").
+
+    Anything else stays a different word: "install"/"uninstall", "allow"/"block".
+    """
+    stem = word.removesuffix("s")
+    return stem if len(stem) >= 4 else word
+
+def TopicKey(query):
+    """Cache key of a query: its singular topic words, sorted and deduplicated ("" without any)."""
+    return " ".join(sorted({TopicWord(word) for word in TopicWords(query)}))
+
+
+# --- Cache ---
+
+class AnswerCache(TTLCache):
+    """TTLCache keyed by TopicKey(): rewording, filler, word order and plurals match, nothing else does.
+
+    "allow" never answers "block" and "T1059" never answers "T1057". A lookup is one dict access.
+    """
+
+    def __init__(self, path=ANSWER_CACHE_PATH, max_entries=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL,
+                 version=None, save_interval=30):
+        super().__init__(max_entries=max_entries, ttl=ttl, path=path, version=version,
+                         save_interval=save_interval)
+
+    def get(self, query, default=None):
+        """The answer cached for `query` or a reworded query, or `default`."""
+        key = TopicKey(query)
+        return super().get(key, default) if key else default
+
+    def put(self, query, answer, ttl=None):
+        key = TopicKey(query)
+        if not key or not answer:
+            return False
+        super().put(key, answer, ttl)
+        return True
+
+
+# --- Benchmark ---
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time answer cache lookups against a full cache.")
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cache = AnswerCache(path=None, max_entries=args.entries)
+    start = perf_counter()
+    for i in range(args.entries):
+        cache.put(f"what is technique number {i} in framework {i % 97}", f"answer {i}")
+    fill = perf_counter() - start
+
+    timings, hits = [], 0
+    for i in range(args.lookups):
+        query = (f"explain technique number {i * 7} in framework {i * 7 % 97}?" if i % 2
+                 else f"how does unrelated subject {i} work")
+        start = perf_counter()
+        hits += cache.get(query) is not None
+        timings.append((perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"{args.entries} entries filled in {fill:.1f} s")
+    print(f"lookup p50 {timings[len(timings) // 2]:.2f} ms, p95 {timings[int(len(timings) * 0.95)]:.2f} ms, "
+          f"{hits}/{args.lookups} hits (expected {args.lookups // 2})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,264 @@
+import os
+import json
+import threading
+from time import time
+from collections import defaultdict, OrderedDict
+from dotenv import dotenv_values
+from Backend.Cache import TTLCache, NormalizeText
+
+# Resolves "open X" / "close X" targets locally. Installed apps come from a name index that is
+# built once (and persisted), websites from a prebuilt map plus the URLs previous web-search
+# fallbacks found. Both are refreshed on a background thread, never on the command path.
+
+# --- Configuration ---
+
+env_vars = dotenv_values(".env")
+APP_INDEX_PATH = os.path.join("Data", "AppIndex.json")
+APP_URLS_PATH = os.path.join("Data", "AppUrls.json")
+APP_INDEX_REFRESH = int(env_vars.get("APP_INDEX_REFRESH") or 3600) # seconds between installed-app rescans
+APP_URL_TTL = int(env_vars.get("APP_URL_TTL") or 30 * 86400) # fallback URLs are forgotten after this
+APP_URL_REFRESH = int(env_vars.get("APP_URL_REFRESH") or 7 * 86400) # ...and re-resolved in the background after this
+APP_MATCH_THRESHOLD = float(env_vars.get("APP_MATCH_THRESHOLD") or 0.6) # minimum n-gram similarity for a fuzzy match
+APP_SHORT_QUERY = 5 # queries this short share most grams with unrelated names ("team": "steam")...
+APP_SHORT_THRESHOLD = 0.85 # ...so they need this similarity unless they are a word of the name
+APP_RESOLVED_SIZE = 1024 # remembered query -> launcher resolutions
+
+# Websites people ask to "open" that are not installed apps
+KNOWN_WEBSITES = {
+    "google": "https://www.google.com", "gmail": "https://mail.google.com",
+    "youtube": "https://www.youtube.com", "github": "https://github.com",
+    "stack overflow": "https://stackoverflow.com", "wikipedia": "https://www.wikipedia.org",
+    "facebook": "https://www.facebook.com", "instagram": "https://www.instagram.com",
+    "twitter": "https://x.com", "x": "https://x.com", "linkedin": "https://www.linkedin.com",
+    "reddit": "https://www.reddit.com", "netflix": "https://www.netflix.com",
+    "amazon": "https://www.amazon.com", "chatgpt": "https://chatgpt.com",
+    "virustotal": "https://www.virustotal.com", "shodan": "https://www.shodan.io",
+}
+
+
+# --- Fuzzy Index ---
+
+def _Grams(text, n):
+    padded = f" {text} "
+    return {padded[i:i + n] for i in range(max(len(padded) - n + 1, 1))}
+
+class NGramIndex:
+    """Character n-gram inverted index; search() only scores names sharing a gram with the query."""
+
+    def __init__(self, names=(), n=3):
+        self.n = n
+        self._names = []
+        self._grams = []
+        self._postings = defaultdict(list) # gram -> indexes into self._names
+        for name in names:
+            self.add(name)
+
+    def add(self, name):
+        grams = _Grams(name, self.n)
+        index = len(self._names)
+        self._names.append(name)
+        self._grams.append(len(grams))
+        for gram in grams:
+            self._postings[gram].append(index)
+
+    def search(self, query, threshold=0.0, fuzzy=True):
+        """Returns (name, score) of the best match, or (None, 0.0).
+
+        The score averages the Dice coefficient with the share of the query's grams found in the
+        name, so "edge" still finds "microsoft edge" while typos in full names are tolerated.
+        Names that contain the query as whole words always qualify; short queries otherwise need
+        APP_SHORT_THRESHOLD. Ties go to containment, then a name starting with the query, then
+        the closest length, then alphabetical order. With fuzzy=False only a name containing
+        the query qualifies, and only when it is the single such name.
+        """
+        grams = _Grams(query, self.n)
+        shared = defaultdict(int)
+        for gram in grams:
+            for index in self._postings.get(gram, ()):
+                shared[index] += 1
+        if len(query) <= APP_SHORT_QUERY:
+            threshold = max(threshold, APP_SHORT_THRESHOLD)
+        candidates = []
+        for index, count in shared.items():
+            name = self._names[index]
+            contains = count == len(grams) and f" {query} " in f" {name} "
+            if not contains and not fuzzy:
+                continue
+            score = (2.0 * count / (len(grams) + self._grams[index]) + count / len(grams)) / 2
+            if contains or score >= threshold:
+                candidates.append((-round(score, 9), not contains, not name.startswith(query),
+                                   abs(len(name) - len(query)), name))
+        if not candidates or (not fuzzy and len(candidates) > 1):
+            return None, 0.0
+        best = min(candidates)
+        return best[-1], -best[0]
+
+    def __len__(self):
+        return len(self._names)
+
+
+# --- Resolver ---
+
+def ScanInstalledApps():
+    """Names AppOpener can launch; this is the slow scan the index exists to avoid."""
+    try:
+        from AppOpener import give_appnames
+        return sorted({str(name).lower() for name in give_appnames()})
+    except Exception as e:
+        print(f"[AppIndex] Could not list installed apps: {e}")
+        return None
+
+class AppResolver:
+    """Maps spoken app/website names to a launcher: ("app", exact AppOpener name) or ("url", URL)."""
+
+    def __init__(self, path=APP_INDEX_PATH, urls_path=APP_URLS_PATH, websites=KNOWN_WEBSITES,
+                 threshold=APP_MATCH_THRESHOLD, refresh_interval=APP_INDEX_REFRESH, scanner=ScanInstalledApps):
+        self.path = path
+        self.threshold = threshold
+        self.refresh_interval = refresh_interval
+        self.scanner = scanner
+        self.websites = {NormalizeText(k): v for k, v in websites.items()}
+        self.urls = TTLCache(max_entries=1024, ttl=APP_URL_TTL, path=urls_path, version=1)
+        self.url_fetcher = None # callable(name) -> URL or None, used to re-resolve stale fallback URLs
+        self._apps = {} # normalized name -> launcher name, as AppOpener lists it
+        self._ambiguous = set() # normalized names shared by several apps: never resolved
+        self._index = NGramIndex()
+        self._built_at = 0.0
+        self._scanned_at = 0.0 # last scan attempt, successful or not
+        self._lock = threading.Lock()
+        self._refreshing = set() # background jobs in flight: "apps" or "url:<name>"
+        self._resolved = OrderedDict() # (normalized query, fuzzy) -> (kind, target), so repeats skip the search
+        self._load()
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._install(data.get("apps", []), data.get("built_at", 0.0))
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def _save(self, apps, built_at):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "w", encoding="utf-8") as f:
+                json.dump({"built_at": built_at, "apps": apps}, f)
+        except OSError as e:
+            print(f"[AppIndex] Could not save app index: {e}")
+
+    def _install(self, apps, built_at):
+        # Queries are normalized, so names are indexed the same way and mapped back to the launcher
+        # name; two apps normalizing alike ("foo-bar" and "foo bar") are dropped, not guessed between
+        names, ambiguous = {}, set()
+        for app in apps:
+            key = NormalizeText(app)
+            if key in names and names[key] != app:
+                ambiguous.add(key)
+            names.setdefault(key, app)
+        names = {key: app for key, app in names.items() if key and key not in ambiguous}
+        index = NGramIndex(names)
+        with self._lock:
+            self._apps, self._ambiguous, self._index, self._built_at = names, ambiguous, index, built_at
+            self._resolved.clear()
+
+    # --- Background Refresh ---
+
+    def _in_background(self, job, target):
+        with self._lock:
+            if job in self._refreshing:
+                return
+            self._refreshing.add(job)
+
+        def run():
+            try:
+                target()
+            except Exception as e:
+                print(f"[AppIndex] Background refresh '{job}' failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(job)
+
+        threading.Thread(target=run, daemon=True, name="app-index-refresh").start()
+
+    def refresh(self):
+        """Rescans installed apps and swaps in a new index (blocking)."""
+        self._scanned_at = time()
+        apps = self.scanner()
+        if apps is None:
+            return False
+        built_at = time()
+        self._install(apps, built_at)
+        self._save(apps, built_at)
+        return True
+
+    def _refresh_url(self, name):
+        url = self.url_fetcher(name)
+        if url:
+            self.urls.put(name, [url, time()])
+
+    def _maybe_refresh(self):
+        if time() - max(self._built_at, self._scanned_at) >= self.refresh_interval:
+            self._in_background("apps", self.refresh)
+
+    # --- Lookups ---
+
+    def resolve(self, name, fuzzy=True):
+        """Returns ("app", exact name), ("url", URL) or None, without scanning or fetching anything.
+
+        Pass fuzzy=False when acting on the wrong app would be harmful (closing one): then only
+        an exact name or the single installed name containing `name` as whole words matches.
+        """
+        key = NormalizeText(name)
+        if not key:
+            return None
+        self._maybe_refresh()
+        cached = self.urls.get(key)
+        if cached:
+            url, resolved_at = cached
+            if self.url_fetcher and time() - resolved_at >= APP_URL_REFRESH:
+                self._in_background(f"url:{key}", lambda: self._refresh_url(key))
+            return "url", url
+        with self._lock:
+            if (key, fuzzy) in self._resolved:
+                self._resolved.move_to_end((key, fuzzy))
+                return self._resolved[(key, fuzzy)]
+            apps, ambiguous, index = self._apps, self._ambiguous, self._index
+        if key in apps:
+            result = ("app", apps[key])
+        elif key in ambiguous:
+            result = None
+        elif key in self.websites:
+            result = ("url", self.websites[key])
+        else:
+            match, _ = index.search(key, self.threshold, fuzzy)
+            result = ("app", apps[match]) if match else None
+        if result:
+            with self._lock:
+                self._resolved[(key, fuzzy)] = result
+                if len(self._resolved) > APP_RESOLVED_SIZE:
+                    self._resolved.popitem(last=False)
+        return result
+
+    def remember_url(self, name, url):
+        """Records the URL a web-search fallback found, so the next request for `name` skips the search."""
+        key = NormalizeText(name)
+        if key and url:
+            self.urls.put(key, [url, time()])
+
+    def forget(self, name):
+        """Drops a resolution that turned out not to launch anything."""
+        key = NormalizeText(name)
+        self.urls.pop(key)
+        with self._lock:
+            self._resolved.pop((key, True), None)
+            self._resolved.pop((key, False), None)
+
+    def stats(self):
+        with self._lock:
+            apps, built_at = len(self._apps), self._built_at
+        return {"apps": apps, "built_at": built_at, "urls": self.urls.stats()}
+
+
+app_resolver = AppResolver()
@@ -0,0 +1,84 @@
+import queue
+import asyncio
+import threading
+import contextvars
+import concurrent.futures
+
+# One long-lived event loop on a background thread. The sync backend functions are thin
+# wrappers that run their async variants here, so every in-flight LLM call from the GUI,
+# main.py or the scheduler threads shares this loop (and its pooled async clients).
+
+_loop = None
+_thread = None
+_lock = threading.Lock()
+_END = object()
+
+
+def RuntimeLoop():
+    """Returns the shared background event loop, starting it on first use."""
+    global _loop, _thread
+    if _loop is None:
+        with _lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                _thread = threading.Thread(target=loop.run_forever, daemon=True, name="async-runtime")
+                _thread.start()
+                _loop = loop
+    return _loop
+
+def Submit(coro):
+    """Schedules a coroutine on the runtime loop and returns a concurrent.futures.Future.
+
+    The coroutine runs in a copy of the caller's context, so tracing spans keep their parent.
+    Cancelling the returned future cancels the task.
+    """
+    loop = RuntimeLoop()
+    if threading.current_thread() is _thread:
+        raise RuntimeError("Submit() would deadlock on the runtime loop; await the coroutine instead")
+    result = concurrent.futures.Future()
+
+    def on_done(task):
+        try:
+            if task.cancelled():
+                result.cancel()
+            elif task.exception() is not None:
+                result.set_exception(task.exception())
+            else:
+                result.set_result(task.result())
+        except concurrent.futures.InvalidStateError:
+            pass # the caller cancelled the future first
+
+    def start():
+        task = loop.create_task(coro) # inherits the caller's context copied below
+        task.add_done_callback(on_done)
+        result.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+    loop.call_soon_threadsafe(start, context=contextvars.copy_context())
+    return result
+
+def RunSync(coro):
+    """Runs a coroutine on the runtime loop and blocks the calling thread until it finishes."""
+    return Submit(coro).result()
+
+def IterSync(agen):
+    """Iterates an async generator from synchronous code, chunk by chunk as they are produced."""
+    chunks = queue.Queue()
+
+    async def pump():
+        try:
+            async for chunk in agen:
+                chunks.put(chunk)
+        finally:
+            chunks.put(_END)
+            await agen.aclose()
+
+    future = Submit(pump())
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is _END:
+                break
+            yield chunk
+        future.result() # re-raise whatever ended the stream
+    finally:
+        future.cancel() # the consumer stopped early: stop the generator too
@@ -1,22 +1,28 @@
 import os
 import subprocess
-import requests
 import keyboard
 import asyncio
+import threading
+import weakref
 import webbrowser
+from time import monotonic, perf_counter
 from AppOpener import close, open as appopen
 from pywhatkit import search, playonyt
 from dotenv import dotenv_values
-from bs4 import BeautifulSoup
 from rich import print
-from groq import Groq
 from pathlib import Path # Import Path for directory creation
+from Backend.Streaming import TimedAsyncStream
+from Backend.HttpClients import get_async_groq_client, get_session
+from Backend.AsyncRuntime import IterSync
+from Backend.Tracing import Traced
+from Backend.AppIndex import app_resolver
+from Backend.LinkExtractor import FirstLinkFromChunks
+from Backend.ContentStore import content_store
 
 # --- CONFIGURATION ---
 
 # Load environment variables
 env_vars = dotenv_values(".env")
-GROQ_API_KEY = env_vars.get("GROQ_API_KEY")
 USERNAME = env_vars.get("USERNAME") # Load Username here
 
 # Define CSS classes for parsing specific elements (Used in OpenApp fallback)
@@ -26,15 +32,19 @@ CSS_CLASSES = ["ZCubwf", "hgKeLc", "LTKxOQ sY7ric", "Zelcw", "gsrt vk_bK FzvWsb
                "lwkfKe", "vQF4g", "qy3Wpe", "kno-rdesc", "SPz26b"]
 
 useragent = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3'
-client = Groq(api_key=GROQ_API_KEY)
-messages = [] # Initialize messages list for ContentWriterAI
 
 # --- Create Data Directory if it doesn't exist ---
 Path("Data").mkdir(exist_ok=True)
 # -------------------------------------------------
 
 # System message (FIXED: Uses loaded USERNAME variable)
-SystemChatbot = [{"role": "system ", "content": f"Hello, I am {USERNAME}, You are a very accurate and advanced AI chatbot which has real-time up-to-date information from the internet."}]
+# A tuple so no request can modify it; each call builds its own message list on top
+SystemChatbot = ({"role": "system ", "content": f"Hello, I am {USERNAME}, You are a very accurate and advanced AI chatbot which has real-time up-to-date information from the internet."},)
+
+# Generation settings for ContentWriterAI; they are part of the content cache key
+CONTENT_PARAMS = {"model": "llama-3.1-8b-instant", "max_tokens": 2048, "temperature": 0.7}
+CONTENT_STREAM_TO_FILE = (env_vars.get("CONTENT_STREAM_TO_FILE") or "True") == "True" # write tokens as they arrive
+CONTENT_ERROR = "Error generating content"
 
 # --- UTILITY FUNCTIONS ---
 
@@ -52,50 +62,69 @@ def OpenNotePad(file_path):
         print(f"[ERROR] Could not open text editor: {e}")
         return False
 
-def ContentWriterAI(prompt):
-   """Generates content using Groq API based on the prompt."""
-   # Simple Content Writer (Note: Consider moving API key checks here)
-   local_messages = messages.copy() # Use a local copy for this session
-   local_messages.append({"role": "user", "content": f"{prompt}"})
+async def ContentWriterAIAsyncStream(prompt):
+   """Streams content from the Groq API chunk by chunk as it is generated."""
+   request_messages = [*SystemChatbot, {"role": "user", "content": f"{prompt}"}] # per call, nothing shared
 
    try:
-       completion = client.chat.completions.create(
-         model = "llama-3.1-8b-instant", # Using the fast model
-         messages=SystemChatbot + local_messages, # Include system prompt + history
-         max_tokens=2048,
-         temperature=0.7,
+       completion = await get_async_groq_client().chat.completions.create(
+         messages=request_messages, # System prompt + this request
+         **CONTENT_PARAMS, # the fast model
          stream=True,
          stop=None
        )
    except Exception as e:
        print(f"[ERROR] Groq API call failed in ContentWriterAI: {e}")
-       return f"Error generating content: {e}"
+       yield f"{CONTENT_ERROR}: {e}"
+       return
 
-   Answer = ""
-   for chunk in completion:
+   async for chunk in TimedAsyncStream("content", completion):
       if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
-         Answer += chunk.choices[0].delta.content
+         yield chunk.choices[0].delta.content.replace("</s>", " ") # Clean up potential end tokens
+
+async def ContentWriterAIAsync(prompt, on_token=None):
+   """Async variant of ContentWriterAI(); runs on the caller's event loop without a thread."""
+   Answer = ""
+   async for text in ContentWriterAIAsyncStream(prompt):
+      if on_token:
+         on_token(text)
+      Answer += text
+   return Answer.replace("</s>"," ") # Clean up end tokens split across chunks
+
+def ContentWriterAIStream(prompt):
+   """Sync wrapper: streams ContentWriterAIAsyncStream() from the shared async runtime."""
+   return IterSync(ContentWriterAIAsyncStream(prompt))
 
-   Answer = Answer.replace("</s>"," ") # Clean up potential end tokens
-   # Optionally update the global 'messages' if you want persistent history across calls
-   # messages.append({"role": "assistant", "content": Answer})
+def ContentWriterAI(prompt, on_token=None):
+   """Generates content using Groq API based on the prompt."""
+   Answer = ""
+   for text in ContentWriterAIStream(prompt):
+      if on_token:
+         on_token(text)
+      Answer += text
+
+   Answer = Answer.replace("</s>"," ") # Clean up end tokens split across chunks
    return Answer
 
-def Content(Topic):
-   """Creates content using AI, saves it to a file, and opens it."""
-   print(f"Generating content for topic: {Topic}")
-   ContentByAi = ContentWriterAI(Topic)
-   if "Error generating content" in ContentByAi:
+def ContentPath(Topic):
+   # FIXED PATH: Use os.path.join and create a valid filename
+   return os.path.join("Data", f"{Topic.lower().replace(' ', '_')}.txt")
+
+def ContentKey(Topic):
+   """Content cache key: normalized topic plus everything else that shapes the generated text."""
+   return content_store.key(Topic, system=SystemChatbot[0]["content"], **CONTENT_PARAMS)
+
+def SaveContent(Topic, ContentByAi):
+   """Saves generated content to a file and opens it."""
+   if CONTENT_ERROR in ContentByAi:
        print(ContentByAi) # Print the error message
        return False # Indicate failure
 
-   # FIXED PATH: Use os.path.join and create a valid filename
-   filename = f"{Topic.lower().replace(' ', '_')}.txt"
-   file_path = os.path.join("Data", filename)
-
+   file_path = ContentPath(Topic)
    try:
        with open(file_path, "w", encoding='utf-8') as file: # Added encoding
            file.write(ContentByAi)
+       content_store.note_written(len(ContentByAi.encode("utf-8")))
        print(f"Content saved to: {file_path}")
        OpenNotePad(file_path)
        return True
@@ -103,6 +132,107 @@ def Content(Topic):
        print(f"[ERROR] Failed to save or open content file: {e}")
        return False
 
+class ContentFileWriter:
+   """Writes streamed content to its file chunk by chunk, opening the editor once the first text lands."""
+
+   def __init__(self, Topic):
+      self.file_path = ContentPath(Topic)
+      self.parts = []
+      self.failed = False
+      self._file = None
+
+   def write(self, text):
+      if self.failed:
+         return
+      if self._file is None:
+         if text.startswith(CONTENT_ERROR):
+            print(text) # Print the error message, no file is created
+            self.failed = True
+            return
+         self._file = open(self.file_path, "w", encoding='utf-8')
+      self._file.write(text)
+      self._file.flush() # so the editor shows what has arrived so far
+      self.parts.append(text)
+      content_store.note_written(len(text.encode("utf-8")))
+      if len(self.parts) == 1:
+         print(f"Streaming content to: {self.file_path}")
+         OpenNotePad(self.file_path)
+
+   def close(self):
+      """Returns the full text, or None when nothing usable was generated."""
+      if self._file is not None:
+         self._file.close()
+      if self.failed or not self.parts:
+         return None
+      text = "".join(self.parts)
+      cleaned = text.replace("</s>", " ") # end tokens split across chunks got past write()
+      if cleaned != text:
+         with open(self.file_path, "w", encoding='utf-8') as file:
+            file.write(cleaned)
+      print(f"Content saved to: {self.file_path}")
+      return cleaned
+
+def CachedContent(Topic, key):
+   ContentByAi = content_store.get(key)
+   if ContentByAi is None:
+      return None
+   print(f"Reusing cached content for topic: {Topic}")
+   return SaveContent(Topic, ContentByAi)
+
+def Content(Topic):
+   """Creates content using AI, saves it to a file, and opens it."""
+   key = ContentKey(Topic)
+   cached = CachedContent(Topic, key)
+   if cached is not None:
+      return cached
+   print(f"Generating content for topic: {Topic}")
+   if not CONTENT_STREAM_TO_FILE:
+      ContentByAi = ContentWriterAI(Topic)
+      saved = SaveContent(Topic, ContentByAi)
+      if saved:
+         content_store.put(key, ContentByAi)
+      return saved
+   writer = ContentFileWriter(Topic)
+   try:
+      for text in ContentWriterAIStream(Topic):
+         writer.write(text)
+   except Exception as e:
+      print(f"[ERROR] Content stream failed: {e}")
+      writer.failed = True
+   finally:
+      ContentByAi = writer.close() # also runs when the task is cancelled mid-stream
+   if ContentByAi is None:
+      return False
+   content_store.put(key, ContentByAi)
+   return True
+
+async def ContentAsync(Topic):
+   """Async variant of Content(): the LLM call awaits on the event loop instead of holding a thread."""
+   key = ContentKey(Topic)
+   cached = CachedContent(Topic, key)
+   if cached is not None:
+      return cached
+   print(f"Generating content for topic: {Topic}")
+   if not CONTENT_STREAM_TO_FILE:
+      ContentByAi = await ContentWriterAIAsync(Topic)
+      saved = SaveContent(Topic, ContentByAi)
+      if saved:
+         content_store.put(key, ContentByAi)
+      return saved
+   writer = ContentFileWriter(Topic)
+   try:
+      async for text in ContentWriterAIAsyncStream(Topic):
+         writer.write(text)
+   except Exception as e:
+      print(f"[ERROR] Content stream failed: {e}")
+      writer.failed = True
+   finally:
+      ContentByAi = writer.close() # also runs when the task is cancelled mid-stream
+   if ContentByAi is None:
+      return False
+   content_store.put(key, ContentByAi)
+   return True
+
 
 # --- TASK EXECUTION FUNCTIONS ---
 
@@ -138,8 +268,35 @@ def PlayYoutube(query):
        print(f"[ERROR] YouTube playback failed: {e}")
        return False
 
-def OpenApp(app, sess=requests.session()):
+def FindWebsite(app, sess=None):
+   """Looks up a website for `app` with a Google search and returns the first result link (or None)."""
+   sess = sess or get_session()
+   # FIXED TYPO: Correct query string format
+   url = f"https://www.google.com/search?q={f'Open {app} website'.replace(' ', '+')}"
+   # Stream the page and stop reading at the first result link instead of parsing all of it
+   with sess.get(url, headers={"User-Agent": useragent}, stream=True) as response:
+      response.raise_for_status() # Raise an exception for bad status codes
+      return FirstLinkFromChunks(response.iter_content(chunk_size=16384), response.encoding or "utf-8")
+
+app_resolver.url_fetcher = FindWebsite # lets the resolver re-check stale fallback URLs in the background
+
+def OpenApp(app, sess=None):
    """Opens application by name or searches Google if appopener fails."""
+   # Resolve against the local index first: no installed-app scan, no network
+   resolved = app_resolver.resolve(app)
+   if resolved:
+      kind, target = resolved
+      try:
+         print(f"Attempting to open {kind}: {target}")
+         if kind == "url":
+            webbrowser.open(target)
+         else:
+            appopen(target, match_closest=False, throw_error=True) # exact name, no fuzzy rescan
+         return True
+      except Exception as open_err:
+         print(f"Indexed launcher for '{app}' failed ({open_err}), falling back...")
+         app_resolver.forget(app)
+
    try:
       print(f"Attempting to open app: {app}")
       appopen(app, match_closest=True, throw_error=True) # Attempt to open app.
@@ -148,41 +305,15 @@ def OpenApp(app, sess=requests.session()):
       print(f"AppOpener failed for '{app}'. Trying web search... Error: {open_err}")
       # --- Fallback: Google Search and Open Link ---
       try:
-          def extract_links(html):
-             if html is None: return []
-             soup = BeautifulSoup(html, 'html.parser')
-             # Try common search result link classes (these change often!)
-             links = soup.select('a[jsname="UWckNb"], a[href^="/url?q="]')
-             valid_links = []
-             for link in links:
-                 href = link.get('href')
-                 if href and href.startswith('/url?q='):
-                     # Extract clean URL from Google redirect
-                     valid_links.append(href.split('/url?q=')[1].split('&')[0])
-                 elif href and not href.startswith('#') and not href.startswith('/'):
-                     valid_links.append(href) # Direct link
-             return valid_links
-
-          def search_google(query):
-             # FIXED TYPO: Correct query string format
-             url = f"https://www.google.com/search?q={query.replace(' ', '+')}"
-             headers = {"User-Agent": useragent}
-             response = sess.get(url, headers=headers)
-             response.raise_for_status() # Raise an exception for bad status codes
-             return response.text
-
-          html = search_google(f"Open {app} website")
-
-          if html:
-             potential_links = extract_links(html)
-             if potential_links:
-                 link_to_open = potential_links[0] # Try the first valid link
-                 print(f"Opening web link: {link_to_open}")
-                 webbrowser.open(link_to_open)
-                 return True
-             else:
-                 print("No suitable web link found.")
-                 return False
+          link_to_open = FindWebsite(app, sess)
+          if link_to_open:
+              print(f"Opening web link: {link_to_open}")
+              app_resolver.remember_url(app, link_to_open) # next "open {app}" skips the search
+              webbrowser.open(link_to_open)
+              return True
+          else:
+              print("No suitable web link found.")
+              return False
       except Exception as search_err:
           print(f"[ERROR] Web search fallback failed: {search_err}")
           return False
@@ -194,10 +325,17 @@ def CloseApp(app):
       print(f"Skipping browser close command for '{app}' for safety.")
       return True # Pretend success to avoid error messages
    else:
+      resolved = app_resolver.resolve(app, fuzzy=False) # never close a merely similar app
+      if resolved and resolved[0] == "url":
+         print(f"'{app}' is a website, nothing to close.")
+         return True
       try:
          print(f"Attempting to close app: {app}")
          # Ensure throw_error is True to catch failures
-         closed = close(app, match_closest=True, output=False, throw_error=True)
+         if resolved:
+            close(resolved[1], match_closest=False, output=False, throw_error=True) # indexed exact name
+         else:
+            close(app, match_closest=True, output=False, throw_error=True)
          return True # AppOpener's close doesn't return reliably, assume success if no error
       except Exception as e:
          print(f"[ERROR] Failed to close '{app}': {e}")
@@ -228,90 +366,208 @@ def SystemCmd(command):
 
 # --- ASYNCHRONOUS EXECUTION LOGIC ---
 
-async def TranslateAndExecute(command_list: list[str]):
-   """Translates Decision Model output into executable asynchronous tasks."""
-   tasks_to_run = []
-
-   # FIXED LOOP LOGIC: Iterate over each command string in the input list
-   for cmd_full in command_list:
-       cmd = cmd_full.strip() # Ensure no leading/trailing whitespace
-       cmd_lower = cmd.lower()
-
-       # FIXED STARTSWITH and REMOVEPREFIX: Use the loop variable 'cmd'
-       if cmd_lower.startswith("open"):
-           argument = cmd.removeprefix("open").strip()
-           if argument: # Avoid running if argument is empty
-               tasks_to_run.append(asyncio.to_thread(OpenApp, argument))
-
-       elif cmd_lower.startswith("close"):
-           argument = cmd.removeprefix("close").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(CloseApp, argument))
-
-       elif cmd_lower.startswith("play"):
-           argument = cmd.removeprefix("play").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(PlayYoutube, argument))
-
-       elif cmd_lower.startswith("content"):
-           argument = cmd.removeprefix("content").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(Content, argument))
-
-       elif cmd_lower.startswith("google search"):
-           argument = cmd.removeprefix("google search").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(Googlesearch, argument))
-
-       elif cmd_lower.startswith("youtube search"): # FIXED TYPO: YouTube
-           argument = cmd.removeprefix("youtube search").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(YoutubeSearch, argument))
-
-       elif cmd_lower.startswith("system"):
-           argument = cmd.removeprefix("system").strip()
-           if argument:
-               tasks_to_run.append(asyncio.to_thread(SystemCmd, argument)) # FIXED TYPO: SystemCmd
-
-       # Placeholders for general and realtime are handled by other files
-       elif cmd_lower.startswith("general") or cmd_lower.startswith("realtime") or cmd_lower == "exit":
-           pass # These commands are not executed here
-       else:
-          print(f"[Warning] No automation function found for command: {cmd}")
+# --- AUTOMATION PLANNING ---
+
+# Command prefix -> handler function name (looked up at call time). Longer prefixes come first.
+HANDLERS = [
+    ("google search", "Googlesearch"),
+    ("youtube search", "YoutubeSearch"),
+    ("open", "OpenApp"),
+    ("close", "CloseApp"),
+    ("play", "PlayYoutube"),
+    ("content", "ContentAsync"),
+    ("system", "SystemCmd"),
+]
+PASSTHROUGH = ("general", "realtime", "exit") # answered by the chatbot/search engine, not here
+
+# Per-handler limits: (max running at once, max starts per second; 0 = no rate limit)
+HANDLER_LIMITS = {
+    "open": (2, 4.0),
+    "close": (2, 4.0),
+    "play": (1, 1.0),
+    "content": (2, 0),
+    "google search": (2, 2.0),
+    "youtube search": (2, 2.0),
+    "system": (1, 10.0),
+}
+
+class CommandResult:
+    """Outcome of one command passed to TranslateAndExecute()."""
+    OK_STATUSES = ("done", "duplicate", "superseded", "skipped")
+
+    def __init__(self, command, action=None, target=None):
+        self.command = command
+        self.action = action
+        self.target = target
+        self.status = "planned" # planned -> done / failed, or duplicate / superseded / skipped / unknown / error
+        self.error = None
+        self.note = None
+        self.duration_ms = None
+
+    @property
+    def ok(self):
+        return self.status in self.OK_STATUSES
+
+    def to_dict(self):
+        return {"command": self.command, "action": self.action, "target": self.target, "status": self.status,
+                "ok": self.ok, "error": self.error, "note": self.note, "duration_ms": self.duration_ms}
+
+    def __repr__(self):
+        return f"CommandResult({self.command!r}, status={self.status!r})"
+
+def ParseCommand(command):
+    """Splits a decision like 'open chrome' into a CommandResult with action and target."""
+    cmd = command.strip()
+    cmd_lower = cmd.lower()
+    for prefix, _ in HANDLERS:
+        if cmd_lower.startswith(prefix):
+            return CommandResult(command, prefix, cmd[len(prefix):].strip())
+    result = CommandResult(command)
+    if cmd_lower.startswith(PASSTHROUGH):
+        result.status, result.note = "skipped", "not an automation command"
+    else:
+        result.status, result.note = "unknown", "no automation function for this command"
+    return result
+
+def PlanCommands(command_list):
+    """Plans commands before execution and returns (results in input order, groups to run).
+
+    - identical commands run once (repeated 'system' commands are kept: volume up twice is intended)
+    - for open/close on the same app only the last one counts, so the app ends in the requested state
+    - commands that conflict (same app, or any two 'system' commands) run in order within one group
+    Groups are independent of each other and run concurrently.
+    """
+    results = [ParseCommand(c) for c in command_list]
+    planned = [r for r in results if r.status == "planned"]
+
+    for r in planned:
+        if not r.target:
+            r.status, r.note = "skipped", "missing target"
+
+    # Open/close first, so 'open x, close x, open x' keeps the last open instead of deduping it away
+    last_state = {}
+    for r in planned:
+        if r.status == "planned" and r.action in ("open", "close"):
+            app = " ".join(r.target.lower().split())
+            previous = last_state.get(app)
+            if previous is not None and previous.action == r.action:
+                r.status, r.note = "duplicate", f"same as '{previous.command}'"
+                continue
+            if previous is not None:
+                previous.status, previous.note = "superseded", f"overridden by '{r.command}'"
+            last_state[app] = r
+
+    seen = {}
+    for r in planned:
+        if r.status != "planned" or r.action == "system":
+            continue
+        key = (r.action, " ".join(r.target.lower().split()))
+        if key in seen:
+            r.status, r.note = "duplicate", f"same as '{seen[key].command}'"
+        else:
+            seen[key] = r
+
+    groups = {}
+    for r in planned:
+        if r.status == "planned":
+            conflict_key = "system" if r.action == "system" else " ".join(r.target.lower().split())
+            groups.setdefault(conflict_key, []).append(r)
+    return results, list(groups.values())
+
+
+# --- Per-Handler Limits ---
+
+class HandlerLimiter:
+    """Caps how many commands of one kind run at once and how often they may start.
+
+    The rate limit is shared by every caller; the concurrency limit is kept per event loop
+    because asyncio semaphores cannot be shared across loops (the GUI runs one per call).
+    """
+
+    def __init__(self, concurrency=1, rate=0):
+        self.concurrency = max(concurrency, 1)
+        self.interval = 1 / rate if rate else 0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._semaphores:
+                self._semaphores[loop] = asyncio.Semaphore(self.concurrency)
+            return self._semaphores[loop]
+
+    def _reserve(self):
+        """Books the next start slot and returns how long to wait for it."""
+        with self._lock:
+            now = monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+            return start - now
+
+    async def run(self, fn, *args):
+        async with self._semaphore():
+            delay = self._reserve() if self.interval else 0
+            if delay > 0:
+                await asyncio.sleep(delay)
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(*args)
+            return await asyncio.to_thread(fn, *args)
+
+handler_limits = {action: HandlerLimiter(*limits) for action, limits in HANDLER_LIMITS.items()}
 
-   if not tasks_to_run:
-       print("No executable automation tasks found.")
-       return # Don't proceed if there's nothing to run
 
-   # Execute all scheduled tasks concurrently and capture results
-   results = await asyncio.gather(*tasks_to_run, return_exceptions=True)
+# --- ASYNCHRONOUS EXECUTION LOGIC ---
 
-   # Process results (optional: can yield success/failure messages)
-   for i, result in enumerate(results):
-       if isinstance(result, Exception):
-           print(f"Task {i+1} failed: {result}")
-       elif result is False:
-            print(f"Task {i+1} reported failure.")
-       # else: Task succeeded (returned True or None)
+async def _RunCommand(r):
+    handler = globals()[dict(HANDLERS)[r.action]] # looked up now so handlers can be swapped (tests, benchmarks)
+    start = perf_counter()
+    try:
+        outcome = await handler_limits[r.action].run(handler, r.target)
+        r.status = "failed" if outcome is False else "done"
+    except Exception as e:
+        r.status, r.error = "failed", f"{type(e).__name__}: {e}"
+    r.duration_ms = round((perf_counter() - start) * 1000, 1)
+
+async def _RunGroup(group):
+    for r in group: # conflicting commands: strictly in the order they were given
+        await _RunCommand(r)
+
+@Traced("TranslateAndExecute")
+async def TranslateAndExecute(command_list: list[str]):
+   """Plans the Decision Model output and executes it; returns a CommandResult per command, in order."""
+   results, groups = PlanCommands(command_list)
+   for r in results:
+       if r.status == "unknown":
+           print(f"[Warning] No automation function found for command: {r.command}")
+   if not groups:
+       print("No executable automation tasks found.")
+   else:
+       await asyncio.gather(*(_RunGroup(g) for g in groups))
+   return results
 
 
 async def Automation(command_list: list[str]):
-   """Main entry point for task execution."""
+   """Main entry point for task execution; returns a CommandResult per command."""
    print(f"Received automation commands: {command_list}")
    try:
-       await TranslateAndExecute(command_list)
+       results = await TranslateAndExecute(command_list)
        print("Automation tasks completed.")
-       return True
+       return results
    except Exception as e:
        print(f"[FATAL ERROR] in Automation execution: {e}")
-       return False
+       results = [ParseCommand(c) for c in command_list]
+       for r in results:
+           r.status, r.error = "error", f"{type(e).__name__}: {e}"
+       return results
 
 # --- Main execution block for testing this file directly (Optional) ---
 # if __name__ == "__main__":
 #     async def test_automation():
 #         # Example commands list similar to what Model.py might return
 #         test_commands = ["open calculator", "play relaxing music", "system volume up"]
-#         success = await Automation(test_commands)
-#         print(f"Test automation finished with status: {success}")
+#         results = await Automation(test_commands)
+#         print(f"Test automation finished: {[r.to_dict() for r in results]}")
 #
 #     asyncio.run(test_automation())
\ No newline at end of file
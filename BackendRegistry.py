@@ -0,0 +1,150 @@
+import sys
+import builtins
+import importlib.util
+import threading
+from time import perf_counter
+
+
+# --- Import Timing (-X importtime style) ---
+
+class ImportTimer:
+    """Records self/cumulative time of every module first imported while active."""
+
+    def __init__(self):
+        self.records = [] # (depth, module name, self us, cumulative us) in import order
+        self._stack = []
+        self._original_import = None
+        self._thread = None
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # Only the thread that started the timer is measured; warm-up threads import normally
+        if threading.get_ident() != self._thread or level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+        index = len(self.records)
+        self.records.append(None)
+        self._stack.append(0.0)
+        start = perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = perf_counter() - start
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            self.records[index] = (len(self._stack), name, (cumulative - children) * 1e6, cumulative * 1e6)
+
+    def __enter__(self):
+        self._thread = threading.get_ident()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self._original_import
+        self.records = [r for r in self.records if r is not None]
+        return False
+
+    def report(self):
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for depth, name, self_us, cumulative_us in self.records:
+            lines.append(f"import time: {self_us:9.0f} | {cumulative_us:10.0f} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+
+# --- Lazy Backends ---
+
+_load_lock = threading.Lock()
+
+class LazyBackend:
+    """A backend function whose module is imported on first call (or during warm-up)."""
+
+    def __init__(self, name, module_name, attribute):
+        self.name = name
+        self.module_name = module_name
+        self.attribute = attribute
+        self.load_seconds = None
+        self.timer = None
+        self._target = None
+
+    def available(self):
+        """Checks that the module can be found, without importing it."""
+        try:
+            return importlib.util.find_spec(self.module_name) is not None
+        except ImportError:
+            return False
+
+    def load(self):
+        if self._target is None:
+            # One load at a time: the import timer patches builtins.__import__ process-wide
+            with _load_lock:
+                if self._target is None:
+                    start = perf_counter()
+                    with ImportTimer() as timer:
+                        __import__(self.module_name)
+                    self.timer = timer
+                    self._target = getattr(sys.modules[self.module_name], self.attribute)
+                    self.load_seconds = perf_counter() - start
+        return self._target
+
+    @property
+    def loaded(self):
+        return self._target is not None
+
+    def __call__(self, *args, **kwargs):
+        return self.load()(*args, **kwargs)
+
+
+class BackendRegistry:
+    """Holds lazily loaded backends so the GUI can appear before heavy SDKs are imported."""
+
+    def __init__(self):
+        self._backends = {}
+
+    def register(self, name, module_name, attribute):
+        backend = LazyBackend(name, module_name, attribute)
+        self._backends[name] = backend
+        return backend
+
+    def get(self, name):
+        return self._backends[name]
+
+    def missing(self):
+        """Names of registered backends whose modules cannot be found."""
+        return [name for name, b in self._backends.items() if not b.available()]
+
+    def warm_up(self, names=None):
+        """Imports the backends on a background thread so the first task doesn't pay for it."""
+        def run():
+            for name in names or list(self._backends):
+                try:
+                    self._backends[name].load()
+                except Exception as e:
+                    print(f"[Warning] Warm-up of backend '{name}' failed: {e}")
+        thread = threading.Thread(target=run, daemon=True, name="backend-warmup")
+        thread.start()
+        return thread
+
+    def startup_report(self, cold_start_seconds=None):
+        """Cold start time plus per-backend load time and an -X importtime style breakdown."""
+        lines = []
+        if cold_start_seconds is not None:
+            lines.append(f"Cold start to interactive window: {cold_start_seconds * 1000:.1f} ms")
+        for name, b in self._backends.items():
+            if b.loaded:
+                lines.append(f"Backend '{name}' ({b.module_name}) loaded in {b.load_seconds * 1000:.1f} ms")
+                if b.timer and b.timer.records:
+                    lines.append(b.timer.report())
+            else:
+                lines.append(f"Backend '{name}' ({b.module_name}) not loaded yet")
+        return "\n".join(lines)
+
+
+# Shared registry of the assistant's backends
+backends = BackendRegistry()
+backends.register("dmm", "Backend.Model", "FirstLayerDMM")
+backends.register("chatbot", "Backend.Chatbot", "ChatbotStream")
+backends.register("realtime", "Backend.realtimeSearchEngine", "RealtimeSearchEngineStream")
+backends.register("speculate", "Backend.realtimeSearchEngine", "StartSpeculativeSearch")
+backends.register("automation", "Backend.Automation", "Automation")
+backends.register("tts", "Backend.TexTtoSpeech", "manageTTS")
+backends.register("image", "Backend.ImageGeneration", "generate_image_task")
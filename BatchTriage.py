@@ -0,0 +1,97 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+from time import perf_counter
+
+# --- Dynamically Adjust Import Path (this file runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+
+# Usage: python Backend/BatchTriage.py alerts.txt [-o decisions.jsonl] [--batch-size 10] [--concurrency 4] [--compare]
+#
+# Input is one query per line, or JSON lines with a "query" field. Output is one JSON line per
+# query, in input order: {"index": 0, "query": "...", "tasks": ["realtime ...", ...]}; tasks is
+# null for a query whose model call failed.
+
+
+def ReadQueries(path):
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    line = str(json.loads(line).get("query") or "").strip()
+                except ValueError:
+                    pass
+            if line:
+                queries.append(line)
+    return queries
+
+def Classify(queries, **options):
+    """Runs a batch classification and returns (results, stats, seconds)."""
+    from Backend.Model import FirstLayerDMMBatch
+    stats = {}
+    start = perf_counter()
+    results = FirstLayerDMMBatch(queries, stats=stats, **options)
+    return results, stats, perf_counter() - start
+
+def FormatRun(name, stats, seconds):
+    qps = stats["queries"] / seconds if seconds else 0.0
+    return (f"{name:<14}{stats['queries']:>6} queries in {seconds:7.2f}s = {qps:8.1f} q/s  "
+            f"(local {stats['local']}, model calls {stats['model_calls']}, retried {stats['retried']}, "
+            f"failed batches {stats['batch_failures']}, failed queries {stats['failed']})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch decision classification for bulk alert triage.")
+    parser.add_argument("input", help="file with one query per line (or JSON lines with a 'query' field)")
+    parser.add_argument("-o", "--output", help="JSON-lines output file (default: stdout)")
+    parser.add_argument("--batch-size", type=int, help="queries packed into one model call")
+    parser.add_argument("--concurrency", type=int, help="model calls in flight at once")
+    parser.add_argument("--no-cache", action="store_true", help="ignore cached decisions")
+    parser.add_argument("--compare", action="store_true",
+                        help="also time the one-at-a-time path (both runs bypass the decision cache)")
+    parser.add_argument("--offline", action="store_true", help="use the benchmark's fake Cohere client")
+    parser.add_argument("--dmm-latency", type=float, default=0.3, help="fake Cohere latency per call (s)")
+    args = parser.parse_args(argv)
+
+    queries = ReadQueries(args.input)
+    output = os.path.abspath(args.output) if args.output else None
+    if args.offline:
+        os.chdir(tempfile.mkdtemp(prefix="triage-")) # keep the fake decisions out of the real cache
+        from Backend.Benchmark import InstallFakeClients
+        InstallFakeClients(dmm_latency=args.dmm_latency)
+
+    options = {"use_cache": not (args.no_cache or args.compare)}
+    if args.batch_size is not None:
+        options["batch_size"] = args.batch_size
+    if args.concurrency is not None:
+        options["concurrency"] = args.concurrency
+
+    report = []
+    if args.compare:
+        _, stats, seconds = Classify(queries, batch_size=1, concurrency=1, use_cache=False)
+        report.append(FormatRun("one-at-a-time", stats, seconds))
+        baseline_qps = stats["queries"] / seconds if seconds else 0.0
+    results, stats, seconds = Classify(queries, **options)
+    report.append(FormatRun("batched", stats, seconds))
+    if args.compare and baseline_qps:
+        report.append(f"speed-up: {stats['queries'] / seconds / baseline_qps:.1f}x")
+
+    lines = "".join(json.dumps({"index": i, "query": q, "tasks": t}) + "\n"
+                    for i, (q, t) in enumerate(zip(queries, results)))
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(lines)
+    else:
+        sys.stdout.write(lines)
+    # The report goes to stderr so stdout stays valid JSON lines
+    print("\n".join(report), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,552 @@
+import os
+import io
+import gc
+import re
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+from time import sleep, perf_counter
+from types import SimpleNamespace
+
+# --- Dynamically Adjust Import Path (this file runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+
+# Usage: python Backend/Benchmark.py [--history 0,50,500] [--turns 20] [--baseline FILE] [--save-baseline]
+#        python Backend/Benchmark.py --soak 100000   (memory soak: fails if RSS keeps growing with turns)
+#
+# Every backend is driven against deterministic local fakes (no network, no API keys), so the
+# numbers only change when our own code does: prompt building, caching, scheduling, streaming.
+
+DEFAULT_BASELINE = os.path.join("Data", "BenchmarkBaseline.json")
+DEFAULT_THRESHOLD = 0.2 # fail when a metric is more than 20% worse than the baseline
+SOAK_SAMPLES = 50 # RSS readings taken over a soak run
+SOAK_LIMIT = 64 # bytes of RSS growth per turn tolerated after the warm-up (the chat log's offset index adds ~12)
+
+# Metrics compared against the baseline: +1 means higher is worse, -1 means lower is worse.
+# Differences below the floor are treated as noise (sleep and scheduler jitter).
+TRACKED_METRICS = {
+    "p50_ms": (1, 2.0),
+    "p95_ms": (1, 5.0),
+    "peak_kb": (1, 64.0),
+    "prompt_tokens": (1, 8.0),
+    "qps": (-1, 0.0),
+}
+
+
+# --- Fake Clients ---
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+class FakeGroqClient:
+    """Stands in for groq.Groq: streams a deterministic answer at a fixed token rate."""
+
+    def __init__(self, first_token_latency=0.05, tokens_per_second=400, answer_tokens=40, prompt_tokens=None):
+        self.first_token_latency = first_token_latency
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.prompt_tokens = [] if prompt_tokens is None else prompt_tokens # prompt size of every request
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _answer(self, messages):
+        from Backend.ContextWindow import count_message_tokens
+        self.prompt_tokens.append(count_message_tokens(messages))
+        query = messages[-1]["content"] if messages else ""
+        words = (f"This is a deterministic answer about {query}. "
+                 "It has a few sentences so speech and sentence splitting get exercised. " * 8).split()
+        return words[:self.answer_tokens]
+
+    def _create(self, model=None, messages=(), stream=False, **kwargs):
+        words = self._answer(messages)
+        if stream:
+            return self._stream(words)
+        sleep(self.first_token_latency + len(words) / self.tokens_per_second)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" ".join(words)))])
+
+    def _deadline(self, start, i):
+        # Paced against absolute deadlines so sleep overshoot doesn't accumulate over the stream
+        return start + self.first_token_latency + i / self.tokens_per_second - perf_counter()
+
+    def _stream(self, words):
+        start = perf_counter()
+        for i, word in enumerate(words):
+            sleep(max(self._deadline(start, i), 0))
+            yield _chunk(word + " ")
+
+class FakeAsyncGroqClient(FakeGroqClient):
+    """Stands in for groq.AsyncGroq."""
+
+    async def _create(self, model=None, messages=(), stream=False, **kwargs):
+        words = self._answer(messages)
+        if stream:
+            return self._stream(words)
+        await asyncio.sleep(self.first_token_latency + len(words) / self.tokens_per_second)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=" ".join(words)))])
+
+    async def _stream(self, words):
+        start = perf_counter()
+        for i, word in enumerate(words):
+            await asyncio.sleep(max(self._deadline(start, i), 0))
+            yield _chunk(word + " ")
+
+class FakeCohereClient:
+    """Stands in for cohere.Client: answers chat_stream with a rule-based decision."""
+
+    REALTIME_WORDS = ("who", "news", "weather", "latest", "price", "score")
+
+    def __init__(self, latency=0.05):
+        self.latency = latency
+        self.calls = 0
+
+    def decide(self, message):
+        packed = re.findall(r"^(\d+)\. (.*)$", message, re.MULTILINE)
+        if len(packed) > 1: # several numbered queries in one call (batch classification)
+            return "\n".join(f"{n}: {self.decide(query)}" for n, query in packed)
+        text = " ".join(message.lower().split())
+        if text.startswith(("open ", "close ", "play ", "system ", "content ", "generate image")):
+            return text
+        if any(word in text.split() for word in self.REALTIME_WORDS):
+            return f"realtime {text}"
+        return f"general {text}"
+
+    def chat_stream(self, message="", **kwargs):
+        self.calls += 1
+        sleep(self.latency)
+        for word in self.decide(message).split(" "):
+            yield SimpleNamespace(event_type="text-generation", text=word + " ")
+        yield SimpleNamespace(event_type="stream-end", text="")
+
+class FakeAsyncCohereClient(FakeCohereClient):
+    """Stands in for cohere.AsyncClient."""
+
+    async def chat_stream(self, message="", **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        for word in self.decide(message).split(" "):
+            yield SimpleNamespace(event_type="text-generation", text=word + " ")
+        yield SimpleNamespace(event_type="stream-end", text="")
+
+def InstallFakeClients(llm_latency=0.05, tokens_per_second=400, answer_tokens=40, dmm_latency=0.05):
+    """Points the shared async Groq/Cohere clients at the fakes; returns the Groq fake."""
+    from Backend.HttpClients import set_client
+    groq = FakeAsyncGroqClient(llm_latency, tokens_per_second, answer_tokens)
+    set_client("async_groq", groq)
+    set_client("async_cohere", FakeAsyncCohereClient(dmm_latency))
+    return groq
+
+class FakeImageSession:
+    """Stands in for the Hugging Face inference session: returns placeholder bytes after a delay."""
+
+    def __init__(self, latency=0.1, size=64 * 1024):
+        self.latency = latency
+        self.content = b"\xff" * size
+        self.calls = 0
+
+    def post(self, url, **kwargs):
+        self.calls += 1
+        sleep(self.latency)
+        return SimpleNamespace(status_code=200, content=self.content, raise_for_status=lambda: None)
+
+    def close(self):
+        pass
+
+def SilentSpeech(text, func=None):
+    """Text-to-speech stand-in registered for the GUI worker."""
+    return True
+
+
+# --- Scripted Conversations ---
+
+DMM_SCRIPT = [
+    "tell me something interesting about topic {n}",
+    "who is the current champion of league {n}",
+    "open app{n}",
+    "what is the weather in city {n}",
+    "open notes{n} and close player{n}",
+    "explain how protocol {n} works",
+]
+CHAT_SCRIPT = ["tell me about topic {n}", "and why does that matter for case {n}?", "summarize point {n} briefly"]
+REALTIME_SCRIPT = ["who won match {n}", "latest news about company {n}", "price of stock {n} today"]
+AUTOMATION_SCRIPT = [
+    ["open app{n}", "close app{n}"],
+    ["system volume up", "open notes{n}"],
+    ["play song {n}", "google search topic {n}", "youtube search topic {n}"],
+]
+WORKER_SCRIPT = ["tell me about topic {n}", "who won match {n}", "open app{n} and tell me about topic {n}"]
+
+# (answer backend, query) pairs for the memory soak; every turn is also classified by the DMM
+SOAK_SCRIPT = [
+    ("chatbot", "tell me about topic {n}"),
+    ("realtime", "who won match {n}"),
+    ("automation", "open app{n} and system volume up"),
+    ("chatbot", "and why does that matter for case {n}?"),
+]
+
+def ScriptedTurns(script, turns, offset=0):
+    """Cycles through a script, numbering each turn so no two prompts are identical."""
+    for i in range(turns):
+        item = script[i % len(script)]
+        n = offset + i
+        yield [c.format(n=n) for c in item] if isinstance(item, list) else item.format(n=n)
+
+def HistoryTurns(length):
+    """Prior conversation used to pre-fill the chat log before a scenario."""
+    entries = []
+    for i in range(length // 2):
+        entries.append({"role": "user", "content": f"earlier question number {i} about subject {i % 17}?"})
+        entries.append({"role": "assistant", "content": f"Earlier answer number {i}. " + "Some detail follows. " * 6})
+    return entries
+
+
+# --- Benchmark Runner ---
+
+class Benchmark:
+    """Drives each backend through scripted turns and collects latency, throughput and memory."""
+
+    def __init__(self, args):
+        self.args = args
+        self.groq = None
+        self.skipped = {}
+        self.modules = {}
+        self.durations = {} # stage -> latency samples (ms) across all scenarios, for the summary table
+
+    def install_fakes(self):
+        from Backend.BackendRegistry import backends
+        args = self.args
+        self.groq = InstallFakeClients(args.llm_latency, args.tokens_per_second, args.answer_tokens, args.dmm_latency)
+        # The GUI refuses to start when a backend module is missing; speech is not measured
+        backends.register("tts", "Backend.Benchmark", "SilentSpeech")
+
+        for name in ("Model", "Chatbot", "realtimeSearchEngine", "WebSearch", "ImageGeneration", "Automation", "GUI"):
+            try:
+                self.modules[name] = __import__(f"Backend.{name}", fromlist=["_"])
+            except (ImportError, SystemExit) as e:
+                self.skipped[name] = f"{type(e).__name__}: {e}"
+
+        web = self.modules.get("WebSearch")
+        realtime = self.modules.get("realtimeSearchEngine")
+        if web and realtime:
+            realtime.search_service = web.SearchService(
+                backend=web.StaticSearchBackend(latency=self.args.search_latency), persist=False)
+            realtime.SPECULATIVE_SEARCH = self.args.speculative # the worker stage searches during the DMM call
+
+        chatbot = self.modules.get("Chatbot")
+        if chatbot:
+            # In memory and small enough to fill early, so the soak measures a bounded cache
+            chatbot.answer_cache = chatbot.AnswerCache(path=None, max_entries=256)
+
+        image = self.modules.get("ImageGeneration")
+        if image:
+            image.image_service = image.ImageGenerationService(
+                api_url="http://image.invalid", headers={}, output_dir=os.path.join("Data", "Images"),
+                session=FakeImageSession(self.args.image_latency))
+
+        automation = self.modules.get("Automation")
+        if automation:
+            def handler(*args):
+                sleep(self.args.handler_latency)
+                return True
+            for name in ("OpenApp", "CloseApp", "PlayYoutube", "Googlesearch", "YoutubeSearch", "SystemCmd"):
+                setattr(automation, name, handler)
+            automation.OpenNotePad = lambda file_path: True
+
+        gui = self.modules.get("GUI")
+        if gui:
+            gui.manageTTS = SilentSpeech
+
+    def use_history(self, length):
+        """Gives the answer backends a fresh chat log pre-filled with `length` turns."""
+        from Backend.ChatLogStore import ChatLogStore
+        store = ChatLogStore(path=os.path.join("Data", f"ChatLog-{length}.jsonl"), legacy_path=None)
+        store.extend(HistoryTurns(length))
+        for name in ("Chatbot", "realtimeSearchEngine"):
+            if name in self.modules:
+                self.modules[name].chat_log = store
+
+    def measure(self, stage, calls):
+        """Runs the calls one after another; returns latency percentiles, throughput and peak memory."""
+        from Backend.Tracing import Percentile
+        samples = []
+        prompts_before = len(self.groq.prompt_tokens)
+        tracemalloc.reset_peak()
+        baseline_memory = tracemalloc.get_traced_memory()[0]
+        output = None if self.args.verbose else io.StringIO()
+        start = perf_counter()
+        with contextlib.redirect_stdout(output) if output is not None else contextlib.nullcontext():
+            for call in calls:
+                call_start = perf_counter()
+                call()
+                samples.append((perf_counter() - call_start) * 1000)
+        elapsed = perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] - baseline_memory
+        prompts = self.groq.prompt_tokens[prompts_before:]
+        self.durations.setdefault(stage, []).extend(samples)
+        return {
+            "turns": len(samples),
+            "qps": len(samples) / elapsed if elapsed else 0.0,
+            "p50_ms": Percentile(samples, 50),
+            "p95_ms": Percentile(samples, 95),
+            "peak_kb": max(peak, 0) / 1024,
+            "prompt_tokens": sum(prompts) / len(prompts) if prompts else 0,
+        }
+
+    def stages(self, turns, offset):
+        """(stage name, list of zero-argument calls) for every backend that could be imported."""
+        m = self.modules
+        stages = []
+        if "Model" in m:
+            stages.append(("dmm", [lambda q=q: m["Model"].FirstLayerDMM(q) for q in ScriptedTurns(DMM_SCRIPT, turns, offset)]))
+        if "Chatbot" in m:
+            stages.append(("chatbot", [lambda q=q: m["Chatbot"].Chatbot(q) for q in ScriptedTurns(CHAT_SCRIPT, turns, offset)]))
+        if "realtimeSearchEngine" in m:
+            stages.append(("realtime", [lambda q=q: m["realtimeSearchEngine"].RealtimeSearchEngine(q)
+                                        for q in ScriptedTurns(REALTIME_SCRIPT, turns, offset)]))
+        if "Automation" in m:
+            stages.append(("automation", [lambda c=c: asyncio.run(m["Automation"].Automation(c))
+                                          for c in ScriptedTurns(AUTOMATION_SCRIPT, turns, offset)]))
+        if "ImageGeneration" in m:
+            service = lambda: m["ImageGeneration"].image_service
+            stages.append(("image", [lambda q=q: service().wait(service().submit(q))
+                                     for q in ScriptedTurns(["a lighthouse at dawn number {n}"], max(turns // 4, 1), offset)]))
+        if "GUI" in m:
+            stages.append(("worker", [lambda q=q: m["GUI"].BackendWorker(q).run() for q in ScriptedTurns(WORKER_SCRIPT, turns, offset)]))
+        return stages
+
+    def run(self):
+        from Backend.Tracing import tracer
+        self.install_fakes()
+        tracer.reset()
+        tracemalloc.start()
+        results = {}
+        for scenario, length in enumerate(self.args.history):
+            self.use_history(length)
+            for stage, calls in self.stages(self.args.turns, offset=scenario * 10000):
+                if "Chatbot" in self.modules:
+                    self.modules["Chatbot"].answer_cache.clear() # stages reuse queries; each pays for its own answers
+                results[f"h{length}.{stage}"] = self.measure(stage, calls)
+        tracemalloc.stop()
+        return results
+
+    def soak_warmup(self):
+        """Turns after which every bounded cache the soak fills is full and RSS should stay flat.
+
+        Each cache gets at least one new key per SOAK_SCRIPT cycle, so it is full after its
+        bound times the cycle length; never less than the sum of the bounds.
+        """
+        from Backend.ChatLogStore import CHAT_TAIL_SIZE
+        m = self.modules
+        bounds = [CHAT_TAIL_SIZE]
+        if "Model" in m:
+            bounds.append(m["Model"].decision_cache.max_entries)
+        if "Chatbot" in m:
+            bounds.append(m["Chatbot"].answer_cache.max_entries)
+        if "realtimeSearchEngine" in m:
+            bounds.append(m["realtimeSearchEngine"].search_service.cache.max_entries)
+        if "Automation" in m:
+            from Backend.AppIndex import APP_RESOLVED_SIZE
+            bounds += [APP_RESOLVED_SIZE, m["Automation"].app_resolver.urls.max_entries]
+        return max(sum(bounds), max(bounds) * len(SOAK_SCRIPT))
+
+    def soak(self, turns, samples=SOAK_SAMPLES):
+        """Runs `turns` decision + answer turns against zero-latency fakes, sampling RSS as it goes.
+
+        Raises ValueError when `turns` leaves fewer measured turns than warm-up turns.
+        """
+        from Backend.AsyncRuntime import RunSync
+        self.install_fakes()
+        self.use_history(0)
+        m = self.modules
+        warmup = self.soak_warmup()
+        if turns < 2 * warmup:
+            raise ValueError(f"--soak needs at least {2 * warmup} turns: the first {warmup} only fill the caches")
+        automation = m.get("Automation")
+        if automation: # the real rate limits would turn the soak into a sleep test
+            automation.handler_limits = {action: automation.HandlerLimiter(4) for action in automation.handler_limits}
+        answer = {
+            "chatbot": m["Chatbot"].Chatbot if "Chatbot" in m else None,
+            "realtime": m["realtimeSearchEngine"].RealtimeSearchEngine if "realtimeSearchEngine" in m else None,
+            "automation": (lambda q: RunSync(automation.Automation(q.split(" and ")))) if automation else None,
+        }
+        every = max(turns // samples, 1)
+        readings = []
+        start = perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(sys.stdout if self.args.verbose else devnull):
+            for i in range(turns):
+                kind, template = SOAK_SCRIPT[i % len(SOAK_SCRIPT)]
+                query = template.format(n=i)
+                if "Model" in m:
+                    m["Model"].FirstLayerDMM(query)
+                if answer[kind]:
+                    answer[kind](query)
+                del self.groq.prompt_tokens[:] # the fake's own request log is not under test
+                if (i + 1) % every == 0 or i + 1 == turns:
+                    gc.collect()
+                    readings.append((i + 1, CurrentRSS()))
+        return {"turns": turns, "warmup": warmup, "seconds": perf_counter() - start, "readings": readings}
+
+
+# --- Memory Soak ---
+
+def CurrentRSS():
+    """Resident set size of this process in bytes, or None where it cannot be read."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        return None
+
+def SoakGrowth(readings, warmup):
+    """RSS growth in bytes per turn after `warmup` turns: the median of the growth between
+    consecutive readings. A steady leak shows in every interval; a one-off step (an arena or a
+    container resizing) shows in one and does not decide the result.
+    """
+    points = [(t, rss) for t, rss in readings if t > warmup and rss is not None]
+    if len(points) < 2:
+        return None
+    slopes = sorted((b - a) / (u - t) for (t, a), (u, b) in zip(points, points[1:]))
+    middle = len(slopes) // 2
+    return slopes[middle] if len(slopes) % 2 else (slopes[middle - 1] + slopes[middle]) / 2
+
+def FormatSoak(report, growth, limit):
+    readings = [r for _, r in report["readings"] if r is not None]
+    lines = [f"{report['turns']} turns in {report['seconds']:.1f}s ({report['turns'] / report['seconds']:.0f} turns/s)"]
+    if readings:
+        lines.append(f"RSS MB: first {readings[0] / 2**20:.1f}  min {min(readings) / 2**20:.1f}  "
+                     f"max {max(readings) / 2**20:.1f}  last {readings[-1] / 2**20:.1f}")
+    if growth is not None:
+        lines.append(f"growth after {report['warmup']} warm-up turns: {growth:.1f} bytes/turn (limit {limit})")
+    return "\n".join(lines)
+
+
+# --- Reporting & Regression Check ---
+
+def FormatResults(results):
+    header = f"{'scenario':<22}{'turns':>7}{'qps':>9}{'p50 ms':>10}{'p95 ms':>10}{'peak KB':>10}{'prompt tok':>12}"
+    lines = [header, "-" * len(header)]
+    for name, r in results.items():
+        lines.append(f"{name:<22}{r['turns']:>7}{r['qps']:>9.2f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}"
+                     f"{r['peak_kb']:>10.1f}{r['prompt_tokens']:>12.0f}")
+    return "\n".join(lines)
+
+def CompareToBaseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Returns a description of every tracked metric that regressed beyond the threshold."""
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric, (direction, floor) in TRACKED_METRICS.items():
+            if metric not in reference:
+                continue
+            old, new = reference[metric], metrics[metric]
+            worse_by = (new - old) * direction
+            if worse_by > max(abs(old) * threshold, floor):
+                regressions.append(f"{name}.{metric}: {old:.2f} -> {new:.2f} ({(new - old) / old * 100 if old else float('inf'):+.0f}%)")
+    return regressions
+
+def ParseArgs(argv=None):
+    parser = argparse.ArgumentParser(description="Offline performance benchmark for the assistant backends.")
+    parser.add_argument("--history", default="0,50,500", help="comma-separated chat history lengths to test")
+    parser.add_argument("--turns", type=int, default=20, help="turns per stage and history length")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake Groq time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=400, help="fake Groq streaming rate")
+    parser.add_argument("--answer-tokens", type=int, default=40, help="tokens per fake answer")
+    parser.add_argument("--dmm-latency", type=float, default=0.05, help="fake Cohere decision latency (s)")
+    parser.add_argument("--search-latency", type=float, default=0.05, help="fake search latency (s)")
+    parser.add_argument("--image-latency", type=float, default=0.1, help="fake image API latency per variant (s)")
+    parser.add_argument("--handler-latency", type=float, default=0.01, help="fake automation handler latency (s)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed relative regression")
+    parser.add_argument("--output", help="also write the results as JSON to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the backends' own console output")
+    parser.add_argument("--speculative", action="store_true", help="search realtime queries speculatively in the worker")
+    parser.add_argument("--soak", type=int, metavar="TURNS", help="run a memory soak of TURNS turns instead")
+    parser.add_argument("--soak-limit", type=float, default=SOAK_LIMIT, help="allowed RSS growth per turn (bytes)")
+    args = parser.parse_args(argv)
+    args.history = [int(h) for h in args.history.split(",") if h.strip()]
+    # Resolve output paths before switching to the scratch directory
+    args.baseline = os.path.abspath(args.baseline)
+    args.output = os.path.abspath(args.output) if args.output else None
+    return args
+
+def main(argv=None):
+    args = ParseArgs(argv)
+    # Run in a scratch directory so the real chat log, caches and traces are left untouched
+    workdir = tempfile.mkdtemp(prefix="benchmark-")
+    os.chdir(workdir)
+    os.makedirs("Data", exist_ok=True)
+
+    bench = Benchmark(args)
+    if args.soak:
+        # Zero latencies: the soak is about what every turn leaves behind, not how long it takes
+        args.llm_latency = args.dmm_latency = args.search_latency = args.handler_latency = 0.0
+        args.tokens_per_second = float("inf")
+        args.answer_tokens = min(args.answer_tokens, 8)
+        try:
+            report = bench.soak(args.soak)
+        except ValueError as e:
+            print(e)
+            return 2
+        growth = SoakGrowth(report["readings"], report["warmup"])
+        print(FormatSoak(report, growth, args.soak_limit))
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(dict(report, growth_bytes_per_turn=growth), f, indent=2)
+        if growth is None:
+            print("RSS could not be read on this platform; nothing to check.")
+            return 0
+        if growth > args.soak_limit:
+            print("Memory keeps growing with turns.")
+            return 1
+        print("Memory is flat.")
+        return 0
+
+    results = bench.run()
+
+    from Backend.Tracing import SummaryTable, tracer
+    print(FormatResults(results))
+    print()
+    # Whole-stage latency next to the nested spans recorded inside each stage
+    print(SummaryTable({**tracer.durations(), **bench.durations}))
+    for name, reason in bench.skipped.items():
+        print(f"[Skipped] {name}: {reason}")
+    if args.speculative and "realtimeSearchEngine" in bench.modules:
+        print(f"Speculative search: {bench.modules['realtimeSearchEngine'].speculation_stats.stats()}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = CompareToBaseline(results, baseline, args.threshold)
+    if regressions:
+        print(f"Performance regressions beyond {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
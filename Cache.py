@@ -0,0 +1,153 @@
+import os
+import re
+import json
+import atexit
+import hashlib
+import threading
+from time import time
+from collections import OrderedDict
+
+# Punctuation that changes what is asked is kept: "c++" / "c#" / "c", "1.1.1.1" / "1111", "-v", "a/b"
+_PUNCTUATION = re.compile(r"[^\w\s.+#\-:/]")
+_APOSTROPHES = re.compile(r"['\u2019]")
+_SENTENCE_MARKS = ".:" # stripped at the edges of words ("flood." / "flood"), kept inside them
+
+
+# --- Helpers ---
+
+def NormalizeText(text):
+    """Normalizes a query for use as a cache key: case, sentence punctuation and whitespace.
+
+    Other punctuation becomes a word break rather than vanishing, so different queries never
+    merge ("what is c++" and "what is c" keep different keys).
+    """
+    text = _PUNCTUATION.sub(" ", _APOSTROPHES.sub("", (text or "").lower()))
+    return " ".join(word for word in (w.strip(_SENTENCE_MARKS) for w in text.split()) if word)
+
+def Fingerprint(*parts):
+    """Stable hash of JSON-serializable values, used to invalidate caches when their inputs change."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# --- LRU + TTL Cache ---
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry, hit/miss counters and optional JSON persistence."""
+
+    def __init__(self, max_entries=512, ttl=3600, path=None, version=None, save_interval=30):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.version = version
+        self.save_interval = save_interval
+        self._entries = OrderedDict() # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._dirty = False
+        self._last_save = time()
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    # --- Persistence ---
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") != self.version:
+            return # Cached values were produced from different inputs, discard them
+        now = time()
+        for key, expires_at, value in data.get("entries", []):
+            if expires_at > now:
+                self._entries[key] = (expires_at, value)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def save(self):
+        """Writes the live entries to disk (no-op when persistence is disabled or nothing changed)."""
+        if not self.path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            now = time()
+            entries = [[k, exp, v] for k, (exp, v) in self._entries.items() if exp > now]
+            self._dirty = False
+            self._last_save = now
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": self.version, "entries": entries}, f)
+        os.replace(tmp_path, self.path)
+
+    # --- Public API ---
+
+    def set_version(self, version):
+        """Clears the cache when the fingerprint of its inputs changes."""
+        with self._lock:
+            if version == self.version:
+                return False
+            self.version = version
+            self._entries.clear()
+            self._dirty = True
+        return True
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= time():
+                del self._entries[key]
+                self._misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+            self._dirty = True
+            should_save = self.path and time() - self._last_save >= self.save_interval
+        if should_save:
+            self.save()
+
+    def pop(self, key, default=None):
+        with self._lock:
+            item = self._entries.pop(key, None)
+            if item is not None:
+                self._dirty = True
+            return default if item is None else item[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,162 @@
+import os
+import json
+import threading
+from array import array
+from collections import deque
+from dotenv import dotenv_values
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+# The JSON-Lines log replaces the old Data/ChatLog.json list (one turn per line).
+CHAT_LOG_PATH = os.path.join("Data", "ChatLog.jsonl")
+LEGACY_CHAT_LOG_PATH = os.path.join("Data", "ChatLog.json")
+
+# How many recent turns are kept in memory for building prompts.
+CHAT_TAIL_SIZE = int(env_vars.get("CHAT_TAIL_SIZE") or 200)
+
+
+class ChatLogStore:
+    """Append-only chat history: O(1) writes per turn and an in-memory tail of recent turns."""
+
+    def __init__(self, path=CHAT_LOG_PATH, legacy_path=LEGACY_CHAT_LOG_PATH, tail_size=CHAT_TAIL_SIZE):
+        self.path = path
+        self.legacy_path = legacy_path
+        self._tail = deque(maxlen=tail_size)
+        self._offsets = array("q") # byte offset of every line, so any range of turns can be read directly
+        self._count = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    # --- Loading & Migration ---
+
+    def _read_entries(self):
+        """Yields every valid entry in the log file, skipping torn or corrupted lines."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+
+    def _migrate_legacy(self):
+        """One-shot conversion of the old ChatLog.json list into the JSON-Lines log."""
+        if os.path.exists(self.path) or not self.legacy_path or not os.path.exists(self.legacy_path):
+            return
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except ValueError:
+            entries = [] # Corrupted or empty legacy log, start fresh
+        if not isinstance(entries, list):
+            entries = []
+
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
+        # Keep the old file around, but out of the way so migration never runs twice.
+        os.replace(self.legacy_path, self.legacy_path + ".bak")
+        print(f"Migrated {len(entries)} chat log entries to {self.path}")
+
+    def _parse(self, lines):
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue # torn or corrupted line
+        return entries
+
+    def _read_lines(self, start, stop):
+        """Raw lines [start, stop) of the log, read with one seek."""
+        with open(self.path, "rb") as f:
+            f.seek(self._offsets[start])
+            if stop < len(self._offsets):
+                data = f.read(self._offsets[stop] - self._offsets[start])
+            else:
+                data = f.read()
+        return [line for line in data.split(b"\n") if line.strip()]
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._migrate_legacy()
+        # Index line offsets without parsing; only the in-memory tail is decoded
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                position = 0
+                for line in f:
+                    if line.strip():
+                        self._offsets.append(position)
+                    position += len(line)
+        self._count = len(self._offsets)
+        if self._count:
+            self._tail.extend(self._parse(self._read_lines(max(self._count - self._tail.maxlen, 0), self._count)))
+        self._loaded = True
+
+    # --- Public API ---
+
+    def append(self, role, content):
+        """Appends a single turn to the log."""
+        self.extend([{"role": role, "content": content}])
+
+    def extend(self, entries):
+        """Appends several turns with a single file write."""
+        if not entries:
+            return
+        lines = [(json.dumps(entry) + "\n").encode("utf-8") for entry in entries]
+        with self._lock:
+            self._ensure_loaded()
+            with open(self.path, "ab") as f:
+                position = f.seek(0, os.SEEK_END)
+                f.write(b"".join(lines))
+            for line in lines:
+                self._offsets.append(position)
+                position += len(line)
+            self._tail.extend(entries)
+            self._count += len(entries)
+
+    def tail(self, n=None):
+        """Returns the last n turns (default: the whole in-memory tail) as a new list."""
+        with self._lock:
+            self._ensure_loaded()
+            if n is None:
+                return list(self._tail)
+            if n <= 0:
+                return []
+            if n <= len(self._tail) or self._count <= len(self._tail):
+                return list(self._tail)[-n:]
+        # Older turns than the cache holds, read just that range from the file.
+        return self.window(self._count - n, self._count)
+
+    def window(self, start, stop):
+        """Returns turns [start, stop) by position in the log, reading only that part of the file."""
+        with self._lock:
+            self._ensure_loaded()
+            start, stop = max(start, 0), min(stop, self._count)
+            if start >= stop:
+                return []
+            return self._parse(self._read_lines(start, stop))
+
+    def all(self):
+        """Returns the full history. This reads the whole file, so avoid it on the hot path."""
+        with self._lock:
+            self._ensure_loaded()
+            return list(self._read_entries())
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return self._count
+
+
+# Shared store used by the Chatbot, the realtime search engine and main.py
+chat_log = ChatLogStore()
@@ -1,9 +1,16 @@
-import os
 from pathlib import Path 
+import asyncio
 import datetime 
-from json import load, dump
 import groq
 from dotenv import dotenv_values 
+from Backend.ChatLogStore import chat_log
+from Backend.ContextWindow import ContextBuilder, PromptPrefix
+from Backend.Streaming import TimedAsyncStream
+from Backend.HttpClients import get_async_groq_client
+from Backend.AsyncRuntime import IterSync
+from Backend.Tracing import Traced, CurrentSpan
+from Backend.Cache import Fingerprint
+from Backend.AnswerCache import AnswerCache, ANSWER_CACHE, Cacheable, MentionsDatetime
 
 # --- Directory Setup (Fixes [Errno 2]) ---
 # Ensure the 'Data' folder exists before we try to read/write files.
@@ -17,10 +24,7 @@ env_vars = dotenv_values(".env")
 # Retrieve specific environment variables 
 Username = env_vars.get("USERNAME")
 AssistantName = env_vars.get("ASSISTANT_NAME")
-GROQ_API_KEY = env_vars.get("GROQ_API_KEY")
-
-# INITIALIZE GROQ CLIENT
-client = groq.Groq(api_key=GROQ_API_KEY)
+ChatModel = "llama-3.1-8b-instant"
 
 # Define the system message that provides context to the AI chatbot 
 System = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {AssistantName} which also has real-time up-to-date information from the internet.
@@ -29,7 +33,15 @@ System = f"""Hello, I am {Username}, You are a very accurate and advanced AI cha
 *** Do not provide notes in the output, just answer the question and never mention your training data. ***
 """
 
-SystemChatbot = [{"role": "system", "content": System}]
+SystemChatbot = ({"role": "system", "content": System},) # a tuple: shared by every call, changed by none
+# Serialized and hashed once; everything that changes per call goes after the history
+SystemPrefix = PromptPrefix(SystemChatbot)
+
+# Keeps the prompt within the token budget (use context.metrics() to see tokens sent)
+context = ContextBuilder()
+
+# Answers to recurring general questions; a new system prompt or model starts an empty cache
+answer_cache = AnswerCache(version=Fingerprint(System, ChatModel)[:16])
 
 
 # --- Helper Functions ---
@@ -57,65 +69,93 @@ def AnswerModifier(Answer):
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer
 
-# Function to load chat log safely from the portable path
-def load_messages_safely():
-    # Use os.path.join for cross-platform file path handling
-    file_path = os.path.join("Data", "ChatLog.json")
-    try:
-        with open(file_path, "r") as f:
-            return load(f)
-    except (FileNotFoundError, Exception) as e:
-        # If file is not found or corrupted, start with an empty list
-        if not os.path.exists(file_path):
-             with open(file_path, "w") as f:
-                 dump([], f)
-        
-        return []
-
 # --- Main Chatbot Logic ---
-def Chatbot(Query):
-    """This function sends user's query to the chatbot and returns AI response"""
-
-    # 1. Load history (this list is used for the current conversation)
-    messages = load_messages_safely()
+@Traced("Chatbot")
+async def ChatbotAsyncStream(Query, store=None, builder=None):
+    """Streams the AI response to the user's query chunk by chunk and saves it when complete.
+    store/builder select another conversation's chat log and context builder (server sessions)."""
+    store = chat_log if store is None else store # not 'store or chat_log': an empty store is falsy
+    builder = context if builder is None else builder
+
+    # 0. Reuse the answer to a similar earlier question (not for date/time questions or follow-ups)
+    cacheable = ANSWER_CACHE and Cacheable(Query)
+    cached = answer_cache.get(Query) if cacheable else None
+    CurrentSpan().set("answer_cache", "hit" if cached else "miss" if cacheable else "skipped")
+    if cached:
+        await asyncio.to_thread(store.append, "assistant", cached)
+        yield cached
+        return
+
+    # 1. Load recent history from the in-memory tail of the chat log
+    # (store and builder take locks and touch disk, so they run off the event loop)
+    messages = await asyncio.to_thread(store.tail)
     
-    # 2. Append the users query and system context
-    messages_for_api = SystemChatbot + [{"role": "system", "content": get_current_datetime()}] + messages
-    messages_for_api.append({"role": "user", "content": Query})
+    # 2. Fit system context, recent history and the user's query into the token budget
+    # (the date and time follow the history so the prefix stays identical between calls)
+    messages_for_api = await asyncio.to_thread(
+        builder.build,
+        SystemPrefix,
+        messages,
+        [{"role": "system", "content": get_current_datetime()}, {"role": "user", "content": Query}]
+    )
     
     Answer = ""
     
     # 3. Request API response
     try:
-        completion = client.chat.completions.create(
+        completion = await get_async_groq_client().chat.completions.create(
             # Using the fast, stable model:
-            model="llama-3.1-8b-instant",
+            model=ChatModel,
             messages=messages_for_api,
             max_tokens=1024,
             temperature=0.7, 
             stream=True, 
-            stop=None 
+            stop=None,
+            **SystemPrefix.request_options()
         )
     except groq.NotFoundError as e:
         print(f"\n[ERROR] Model or API Key Issue: {e.message}")
-        return "I'm sorry, the AI model is unavailable or has been decommissioned. Please check the model name."
+        yield "I'm sorry, the AI model is unavailable or has been decommissioned. Please check the model name."
+        return
     except Exception as e:
         print(f"\n[ERROR] Network or Client Issue: {e}")
-        return "A network or client error occurred. Trying again might help."
+        yield "A network or client error occurred. Trying again might help."
+        return
 
-    # 4. Process the streamed response
-    for chunk in completion:
+    # 4. Forward the streamed response as it arrives
+    async for chunk in TimedAsyncStream("chatbot", completion):
         if chunk.choices and chunk.choices[0].delta.content:
-            Answer += chunk.choices[0].delta.content
+            text = chunk.choices[0].delta.content.replace("<\s>", "") # cleanup unwanted tokens
+            Answer += text
+            yield text
 
-    Answer = Answer.replace("<\s>", "") # cleanup unwanted tokens
+    Answer = Answer.replace("<\s>", "") # cleanup tokens split across chunks
 
-    # 5. Append new response to history and save log
-    messages.append({"role": "assistant", "content": Answer})
-    
-    # Save the updated chat log using the portable path.
-    with open(os.path.join("Data", "ChatLog.json"), "w") as f:
-        dump(messages, f, indent=4)
+    # 5. Append the new response to the chat log (a single line write)
+    await asyncio.to_thread(store.append, "assistant", Answer)
+    if cacheable and Answer and not MentionsDatetime(Answer, datetime.datetime.now()):
+        await asyncio.to_thread(answer_cache.put, Query, Answer) # may save the cache to disk
+
+async def ChatbotAsync(Query, on_token=None, store=None, builder=None):
+    """Async variant of Chatbot(): many calls can share one event loop without a thread each"""
+    Answer = ""
+    async for text in ChatbotAsyncStream(Query, store, builder):
+        if on_token:
+            on_token(text)
+        Answer += text
+    return AnswerModifier(Answer)
+
+def ChatbotStream(Query, store=None, builder=None):
+    """Sync wrapper: streams ChatbotAsyncStream() from the shared async runtime"""
+    return IterSync(ChatbotAsyncStream(Query, store, builder))
+
+def Chatbot(Query, on_token=None, store=None, builder=None):
+    """This function sends user's query to the chatbot and returns AI response"""
+    Answer = ""
+    for text in ChatbotStream(Query, store, builder):
+        if on_token:
+            on_token(text)
+        Answer += text
 
     # 6. Return the formatted response.
     return AnswerModifier(Answer)
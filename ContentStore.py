@@ -0,0 +1,120 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from dotenv import dotenv_values
+from Backend.Cache import NormalizeText, Fingerprint
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+CONTENT_CACHE_DIR = os.path.join("Data", "ContentCache")
+CONTENT_CACHE_BYTES = int(env_vars.get("CONTENT_CACHE_BYTES") or 16 * 1024 * 1024) # total size of cached documents
+
+
+class ContentStore:
+    """Generated documents on disk, keyed by normalized topic + prompt parameters, evicted LRU by total size."""
+
+    def __init__(self, directory=CONTENT_CACHE_DIR, max_bytes=CONTENT_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._index = OrderedDict() # key -> size in bytes, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._bytes_written = 0 # bytes of content written to output files (hits and fresh generations)
+        self._load()
+
+    # --- Persistence ---
+
+    def _index_path(self):
+        return os.path.join(self.directory, "index.json")
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def _load(self):
+        try:
+            with open(self._index_path(), "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for key, size in entries:
+            if os.path.exists(self._path(key)):
+                self._index[key] = size
+                self._size += size
+
+    def _save_index(self):
+        """Caller holds the lock."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self._index_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(list(self._index.items()), f)
+        os.replace(tmp_path, self._index_path())
+
+    # --- Public API ---
+
+    @staticmethod
+    def key(topic, **params):
+        """Cache key: "Write an Email!" and "write an email" share one, other prompt settings do not."""
+        return Fingerprint(NormalizeText(topic), params)[:32]
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._index:
+                self._misses += 1
+                return None
+            try:
+                with open(self._path(key), "r", encoding="utf-8") as f:
+                    text = f.read()
+            except OSError:
+                self._size -= self._index.pop(key)
+                self._misses += 1
+                return None
+            self._index.move_to_end(key)
+            self._hits += 1
+            return text
+
+    def put(self, key, text):
+        data = text.encode("utf-8")
+        if len(data) > self.max_bytes:
+            return False
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(self._path(key), "wb") as f:
+                f.write(data)
+            self._size += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._size > self.max_bytes:
+                old_key, old_size = self._index.popitem(last=False)
+                self._size -= old_size
+                self._evictions += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+            self._save_index()
+        return True
+
+    def note_written(self, count):
+        """Counts bytes written to an output document."""
+        with self._lock:
+            self._bytes_written += count
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._size,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "bytes_written": self._bytes_written,
+            }
+
+
+content_store = ContentStore()
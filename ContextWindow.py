@@ -0,0 +1,225 @@
+import re
+import json
+import threading
+from dotenv import dotenv_values
+from Backend.Cache import Fingerprint
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+# Prompt budget (system preamble + history + query) sent to the model per request.
+CHAT_CONTEXT_TOKENS = int(env_vars.get("CHAT_CONTEXT_TOKENS") or 6000)
+# Fold turns that fall out of the budget into a short rolling summary instead of dropping them.
+CHAT_CONTEXT_SUMMARY = (env_vars.get("CHAT_CONTEXT_SUMMARY") or "True") == "True"
+CHAT_SUMMARY_TOKENS = int(env_vars.get("CHAT_SUMMARY_TOKENS") or 300)
+
+# Roughly matches how BPE tokenizers split text: words, numbers and single punctuation marks.
+_TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+MESSAGE_OVERHEAD_TOKENS = 4 # role markers and separators added by the chat template
+
+# Request field that carries the prompt prefix hash, for providers that key their prompt cache on
+# one (e.g. "prompt_cache_key"). Empty sends nothing extra; identical leading bytes still match.
+PROMPT_CACHE_FIELD = env_vars.get("PROMPT_CACHE_FIELD") or ""
+
+
+# --- Token Counting ---
+
+def count_tokens(text):
+    """Approximates the number of model tokens in a piece of text."""
+    tokens = 0
+    for piece in _TOKEN_PATTERN.findall(text or ""):
+        # Long words are usually split into several sub-word tokens (~4 characters each)
+        tokens += 1 + (len(piece) - 1) // 4
+    return tokens
+
+def count_message_tokens(messages):
+    """Approximates the prompt tokens of a list of chat messages."""
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def serialized_bytes(messages):
+    """Size of messages as they go over the wire (compact JSON)."""
+    return len(json.dumps(list(messages), ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+# --- Prompt Prefix ---
+
+class PromptPrefix:
+    """Leading prompt messages that never change between calls: copied, measured and hashed once.
+
+    Everything variable (date and time, search results, the query) goes after the history, so
+    the prefix, and usually the history after it, stay byte-identical from one call to the next.
+    """
+
+    def __init__(self, messages):
+        self.messages = tuple(dict(m) for m in messages)
+        self.bytes = serialized_bytes(self.messages)
+        self.tokens = count_message_tokens(self.messages)
+        self.key = Fingerprint(self.messages)[:16]
+
+    def __iter__(self):
+        return iter(self.messages)
+
+    def __len__(self):
+        return len(self.messages)
+
+    def request_options(self):
+        """Extra request arguments marking the prefix for provider-side prompt caching."""
+        return {"extra_body": {PROMPT_CACHE_FIELD: self.key}} if PROMPT_CACHE_FIELD else {}
+
+class PromptMeter:
+    """Bytes and tokens serialized per call: the whole prompt (before prefix reuse) and only the suffix (after)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._totals = {"bytes_full": 0, "bytes_suffix": 0, "tokens_full": 0, "tokens_suffix": 0}
+        self._last = {}
+
+    def record(self, prefix, suffix_bytes, suffix_tokens):
+        last = {"prefix_key": prefix.key,
+                "bytes_full": prefix.bytes + suffix_bytes, "bytes_suffix": suffix_bytes,
+                "tokens_full": prefix.tokens + suffix_tokens, "tokens_suffix": suffix_tokens}
+        with self._lock:
+            self._calls += 1
+            for name in self._totals:
+                self._totals[name] += last[name]
+            self._last = last
+        return last
+
+    def record_messages(self, prefix, suffix):
+        return self.record(prefix, serialized_bytes(suffix), count_message_tokens(suffix))
+
+    def metrics(self):
+        with self._lock:
+            calls = self._calls
+            metrics = {"calls": calls, **self._totals, "last": dict(self._last)}
+        for name in ("bytes", "tokens"):
+            metrics[f"avg_{name}_full"] = metrics[f"{name}_full"] / calls if calls else 0.0
+            metrics[f"avg_{name}_suffix"] = metrics[f"{name}_suffix"] / calls if calls else 0.0
+        return metrics
+
+
+# --- Rolling Summary ---
+
+def SummarizeTurns(turns, previous_summary=""):
+    """Cheap local summary: keeps the first sentence of each folded turn."""
+    points = [previous_summary] if previous_summary else []
+    for turn in turns:
+        content = " ".join((turn.get("content") or "").split())
+        if not content:
+            continue
+        first_sentence = re.split(r"(?<=[.!?])\s", content, maxsplit=1)[0]
+        speaker = "User" if turn.get("role") == "user" else "Assistant"
+        points.append(f"{speaker}: {first_sentence}")
+    return "\n".join(points)
+
+def _truncate_to_tokens(text, max_tokens):
+    """Drops the oldest lines of a summary until it fits within max_tokens."""
+    lines = text.split("\n")
+    while len(lines) > 1 and count_tokens("\n".join(lines)) > max_tokens:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+# --- Context Builder ---
+
+class ContextBuilder:
+    """Assembles system messages, recent history and the query within a token budget."""
+
+    def __init__(self, budget_tokens=CHAT_CONTEXT_TOKENS, summarize=CHAT_CONTEXT_SUMMARY,
+                 summary_tokens=CHAT_SUMMARY_TOKENS, summarizer=SummarizeTurns):
+        self.budget_tokens = budget_tokens
+        self.summarize = summarize
+        self.summary_tokens = summary_tokens
+        self.summarizer = summarizer
+        self._lock = threading.Lock()
+        # Rolling summary cache: the summary text and the last turn folded into it
+        self._summary = ""
+        self._summary_last_turn = None
+        # Metrics
+        self._requests = 0
+        self._tokens_sent = 0
+        self._tokens_full = 0
+        self._last = {}
+        self.prompt_meter = PromptMeter()
+
+    def _rolling_summary(self, dropped):
+        """Folds newly dropped turns into the cached summary, reusing it when nothing changed."""
+        if not dropped:
+            return ""
+        if self._summary_last_turn is not None and dropped[-1] == self._summary_last_turn:
+            return self._summary
+
+        # Only fold the turns that were dropped since the last summary was built
+        new_turns = dropped
+        previous = ""
+        if self._summary_last_turn is not None:
+            for i in range(len(dropped) - 1, -1, -1):
+                if dropped[i] == self._summary_last_turn:
+                    new_turns = dropped[i + 1:]
+                    previous = self._summary
+                    break
+
+        self._summary = _truncate_to_tokens(self.summarizer(new_turns, previous), self.summary_tokens)
+        self._summary_last_turn = dropped[-1]
+        return self._summary
+
+    def build(self, system_messages, history, query_messages=()):
+        """Returns the message list to send: system messages, (summary), recent history, query.
+
+        system_messages may be a PromptPrefix; its precomputed size is reused and the bytes and
+        tokens sent after it are recorded in prompt_meter.
+        """
+        prefix = system_messages if isinstance(system_messages, PromptPrefix) else None
+        system_messages = list(system_messages)
+        query_messages = list(query_messages)
+        system_tokens = prefix.tokens if prefix else count_message_tokens(system_messages)
+        fixed_tokens = system_tokens + count_message_tokens(query_messages)
+        history_tokens = [count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in history]
+
+        with self._lock:
+            # Walk backwards from the newest turn, keeping as many as fit in the budget
+            available = self.budget_tokens - fixed_tokens
+            if self.summarize and len(history) > 0:
+                available -= self.summary_tokens + MESSAGE_OVERHEAD_TOKENS
+            keep_from = len(history)
+            used = 0
+            while keep_from > 0 and used + history_tokens[keep_from - 1] <= available:
+                keep_from -= 1
+                used += history_tokens[keep_from]
+
+            dropped = history[:keep_from]
+            summary_messages = []
+            if self.summarize and dropped:
+                summary = self._rolling_summary(dropped)
+                if summary:
+                    summary_messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+
+            messages = system_messages + summary_messages + list(history[keep_from:]) + query_messages
+
+            # Metrics
+            sent = fixed_tokens + used + count_message_tokens(summary_messages)
+            full = fixed_tokens + sum(history_tokens)
+            self._requests += 1
+            self._tokens_sent += sent
+            self._tokens_full += full
+            self._last = {"tokens_sent": sent, "tokens_full": full,
+                          "turns_sent": len(history) - keep_from, "turns_dropped": keep_from}
+        if prefix:
+            suffix = messages[len(system_messages):]
+            self.prompt_meter.record(prefix, serialized_bytes(suffix), sent - system_tokens)
+        return messages
+
+    def metrics(self):
+        """Returns token counters so the saving from truncation can be monitored."""
+        with self._lock:
+            return {
+                "requests": self._requests,
+                "tokens_sent": self._tokens_sent,
+                "tokens_full": self._tokens_full,
+                "tokens_saved": self._tokens_full - self._tokens_sent,
+                "avg_tokens_sent": self._tokens_sent / self._requests if self._requests else 0.0,
+                "last": dict(self._last),
+                "prompt": self.prompt_meter.metrics(),
+            }
@@ -0,0 +1,180 @@
+import re
+import threading
+from time import perf_counter
+
+# Verbs the fast path is allowed to resolve locally (everything else goes to the remote model)
+FAST_PATH_VERBS = ["open", "close", "play", "system", "google search", "youtube search"]
+
+# Spoken variants of the keyboard commands understood by Automation.SystemCmd
+SYSTEM_COMMANDS = {
+    "mute": "mute", "unmute": "unmute",
+    "volume up": "volume up", "increase volume": "volume up", "increase the volume": "volume up",
+    "turn up the volume": "volume up", "turn the volume up": "volume up",
+    "volume down": "volume down", "decrease volume": "volume down", "decrease the volume": "volume down",
+    "turn down the volume": "volume down", "turn the volume down": "volume down",
+}
+
+# Alternative phrasings mapped onto the DMM's own task verbs
+VERB_ALIASES = {
+    "search google for": "google search", "google": "google search",
+    "search youtube for": "youtube search", "search on youtube": "youtube search",
+    "launch": "open", "quit": "close",
+}
+
+POLITE_PREFIX = re.compile(r"^(?:(?:please|hey|ok|okay|kindly|can you|could you|would you|will you)\s+)+")
+# Words that signal a question or an explanation, which the fast path never tries to resolve
+QUESTION_WORDS = {"what", "who", "why", "how", "when", "where", "which", "whose", "explain", "tell"}
+# Words that never appear in a bare app name, so "open chrome and do my homework" is not split
+CONVERSATIONAL_WORDS = QUESTION_WORDS | {"me", "i", "you", "it", "is", "are", "do", "about", "with", "to"}
+MAX_TARGET_WORDS = 5 # open/close targets longer than this are probably not app names
+MAX_INHERITED_WORDS = 2 # "open chrome and firefox": the verbless part must be a short name
+# Verbs whose single argument may itself contain "and" (song names, search topics)
+FREE_TEXT_VERBS = {"play", "google search", "youtube search"}
+# Verbs that distribute over "X and Y" (e.g. "open chrome and firefox")
+LIST_VERBS = {"open", "close"}
+
+
+def NormalizeCommand(text):
+    """Lowercases, strips polite prefixes and trailing punctuation, collapses whitespace."""
+    text = " ".join(text.lower().split())
+    text = text.rstrip(" .!")
+    return POLITE_PREFIX.sub("", text)
+
+
+class FastPathClassifier:
+    """Resolves unambiguous automation commands locally before calling the decision model."""
+
+    def __init__(self, funcs, chat_history=(), verbs=FAST_PATH_VERBS):
+        self._allowed_verbs = verbs
+        self.configure(funcs, chat_history)
+
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._local_seconds = 0.0
+        self._saved_seconds = 0.0
+        self._remote_avg = None # moving average of remote decision latency
+        self._last = {}
+
+    def configure(self, funcs, chat_history=()):
+        """(Re)builds the grammar and example table, e.g. after the DMM's funcs or few-shot history changed."""
+        self.verbs = [v for v in self._allowed_verbs if v in funcs]
+        phrases = sorted(self.verbs + [a for a, v in VERB_ALIASES.items() if v in self.verbs], key=len, reverse=True)
+        self._verb_pattern = re.compile(r"^(" + "|".join(re.escape(p) for p in phrases) + r")\b\s*(.*)$") if phrases else None
+        self._examples = self._examples_from_history(chat_history)
+
+    def _examples_from_history(self, chat_history):
+        """Builds an exact-match table from few-shot examples that only contain fast-path tasks."""
+        examples = {}
+        for query, answer in zip(chat_history[::2], chat_history[1::2]):
+            tasks = [t.strip() for t in answer.get("message", "").split(",")]
+            if tasks and all(self._task_verb(t) for t in tasks):
+                examples[NormalizeCommand(query.get("message", ""))] = tasks
+        return examples
+
+    def _task_verb(self, task):
+        for verb in sorted(self.verbs, key=len, reverse=True):
+            if task.startswith(verb + " "):
+                return verb
+        return None
+
+    # --- Grammar ---
+
+    def _parse_clause(self, clause, previous_verb):
+        """Returns the task for one clause, or None when the clause is not clearly a command."""
+        if "system" in self.verbs:
+            system_phrase = clause.removeprefix("system ").strip()
+            if system_phrase in SYSTEM_COMMANDS:
+                return f"system {SYSTEM_COMMANDS[system_phrase]}", "system"
+
+        match = self._verb_pattern.match(clause) if self._verb_pattern else None
+        if match:
+            verb = VERB_ALIASES.get(match.group(1), match.group(1))
+            argument = match.group(2).strip()
+        elif previous_verb in LIST_VERBS:
+            verb, argument = previous_verb, clause # "open chrome and firefox" -> "open firefox"
+            words = argument.split()
+            if len(words) > MAX_INHERITED_WORDS or CONVERSATIONAL_WORDS.intersection(words):
+                return None
+        else:
+            return None
+
+        if verb == "system" or not argument:
+            return None
+        words = argument.split()
+        if words[0] in CONVERSATIONAL_WORDS or "?" in argument:
+            return None
+        if verb in LIST_VERBS and len(words) > MAX_TARGET_WORDS:
+            return None
+        return f"{verb} {argument}", verb
+
+    def _split_clauses(self, text):
+        """Splits on ',', 'and', 'then' only where the next part starts a new command."""
+        parts = re.split(r"\s*,\s*(?:and\s+|then\s+)?|\s+(?:and|then)\s+", text)
+        clauses = []
+        for part in parts:
+            if not part:
+                continue
+            starts_command = bool(self._verb_pattern and self._verb_pattern.match(part)) or part.removeprefix("system ") in SYSTEM_COMMANDS
+            if clauses and not starts_command and self._clause_verb(clauses[-1]) in FREE_TEXT_VERBS:
+                clauses[-1] = f"{clauses[-1]} and {part}" # part of a song name or search topic
+            else:
+                clauses.append(part)
+        return clauses
+
+    def _clause_verb(self, clause):
+        match = self._verb_pattern.match(clause) if self._verb_pattern else None
+        return VERB_ALIASES.get(match.group(1), match.group(1)) if match else None
+
+    def _resolve(self, text):
+        if text in self._examples:
+            return list(self._examples[text])
+        tasks = []
+        previous_verb = None
+        for clause in self._split_clauses(text):
+            parsed = self._parse_clause(clause, previous_verb)
+            if parsed is None:
+                return None # one uncertain clause means the whole query goes to the model
+            task, previous_verb = parsed
+            tasks.append(task)
+        return tasks or None
+
+    # --- Public API ---
+
+    def classify(self, prompt):
+        """Returns the task list for an unambiguous command, or None to fall back to the model."""
+        start = perf_counter()
+        tasks = self._resolve(NormalizeCommand(prompt))
+        elapsed = perf_counter() - start
+
+        with self._lock:
+            self._local_seconds += elapsed
+            if tasks is None:
+                self._misses += 1
+                self._last = {"hit": False, "local_ms": elapsed * 1000}
+            else:
+                self._hits += 1
+                saved = max((self._remote_avg or 0.0) - elapsed, 0.0)
+                self._saved_seconds += saved
+                self._last = {"hit": True, "local_ms": elapsed * 1000, "saved_ms": saved * 1000}
+        return tasks
+
+    def record_remote(self, seconds):
+        """Records the latency of a remote decision, used to estimate the time saved by hits."""
+        with self._lock:
+            self._remote_avg = seconds if self._remote_avg is None else 0.8 * self._remote_avg + 0.2 * seconds
+
+    def stats(self):
+        """Returns hit rate and latency counters for the fast path."""
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / total if total else 0.0,
+                "avg_local_ms": self._local_seconds * 1000 / total if total else 0.0,
+                "avg_remote_ms": (self._remote_avg or 0.0) * 1000,
+                "saved_ms_total": self._saved_seconds * 1000,
+                "saved_ms_per_hit": self._saved_seconds * 1000 / self._hits if self._hits else 0.0,
+                "last": dict(self._last),
+            }
@@ -1,12 +1,15 @@
+from time import perf_counter
+_START_TIME = perf_counter() # measured up to the first event-loop tick after the window is shown
+
 import sys
 import threading
-import asyncio
 import os
+from dotenv import dotenv_values
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QTextEdit, QLineEdit,
                              QPushButton, QVBoxLayout, QHBoxLayout, QWidget, QLabel,
                              QSizePolicy, QSpacerItem)
-from PyQt5.QtCore import pyqtSignal, QObject, QThread, Qt, QSize, QMetaObject, Q_ARG
-from PyQt5.QtGui import QFont, QPixmap, QMovie, QIcon
+from PyQt5.QtCore import pyqtSignal, QObject, QThread, Qt, QSize, QMetaObject, Q_ARG, QTimer
+from PyQt5.QtGui import QFont, QPixmap, QMovie, QIcon, QTextCursor
 
 # --- Dynamically Adjust Import Path ---
 script_dir = os.path.dirname(os.path.abspath(__file__)) # Frontend folder
@@ -14,19 +17,38 @@ project_root = os.path.dirname(script_dir) # Kobe folder
 sys.path.insert(0, project_root)
 
 # --- Import Backend Functions ---
+# Heavy backends (SDK clients, AppOpener, PIL...) are imported lazily on their first task
 try:
-    from Backend.Model import FirstLayerDMM
-    from Backend.Chatbot import Chatbot
-    from Backend.realtimeSearchEngine import RealtimeSearchEngine
-    from Backend.Automation import Automation # Async function
-    from Backend.TexTtoSpeech import manageTTS
-    from Backend.ImageGeneration import generate_image_task # <-- IMPORT IMAGE GEN FUNCTION
+    from Backend.Streaming import SentenceBuffer, SentenceSpeaker, stream_metrics
+    from Backend.TaskScheduler import scheduler, OrderedOutput
+    from Backend.StateBus import SetMicrophoneStatus
+    from Backend.BackendRegistry import backends
+    from Backend.Tracing import Traced
+    from Backend.AsyncRuntime import RunSync
+    from Backend.Transcript import Transcript, TranscriptWindow
     # from Backend.SpeechToText import listen_function # Placeholder for STT
 except ImportError as e:
     print(f"[ERROR] Critical Import Error: {e}")
     print("Ensure backend files exist in the 'Backend' folder with correct function names.")
     sys.exit(1) # Can't run without backend
 
+if backends.missing():
+    print(f"[ERROR] Critical Import Error: backend modules not found: {', '.join(backends.missing())}")
+    print("Ensure backend files exist in the 'Backend' folder with correct function names.")
+    sys.exit(1) # Can't run without backend
+
+FirstLayerDMM = backends.get("dmm")
+ChatbotStream = backends.get("chatbot")
+RealtimeSearchEngineStream = backends.get("realtime")
+StartSpeculativeSearch = backends.get("speculate") # returns None unless SPECULATIVE_SEARCH is on
+Automation = backends.get("automation") # Async function
+manageTTS = backends.get("tts")
+generate_image_task = backends.get("image")
+
+env_vars = dotenv_values(".env")
+BACKEND_WARMUP = (env_vars.get("BACKEND_WARMUP") or "True") == "True" # import backends once the window is up
+STARTUP_REPORT = (env_vars.get("STARTUP_REPORT") or "False") == "True" # print cold-start and import timings
+
 # --- Path to Graphics Folder ---
 GRAPHICS_PATH = "Graphics"
 
@@ -35,6 +57,7 @@ class WorkerSignals(QObject):
     finished = pyqtSignal()
     error = pyqtSignal(tuple)
     result = pyqtSignal(str)
+    partial = pyqtSignal(str) # Streamed chunk of the answer currently being generated
     status = pyqtSignal(str)
 
 class BackendWorker(QThread):
@@ -43,12 +66,61 @@ class BackendWorker(QThread):
         self.query = query
         self.signals = WorkerSignals()
         self._is_running = True # Flag to stop TTS/loops if needed
+        self._speaker = None
+        self._sentences = None
+
+    def forward_chunk(self, index, chunk):
+        """Shows a streamed chunk in the GUI and speaks each sentence as soon as it is complete."""
+        self.signals.partial.emit(chunk)
+        for sentence in self._sentences.feed(chunk):
+            self._speaker.say(sentence)
+
+    def end_answer(self, index):
+        """Called (in task order) when an answer has been fully streamed."""
+        self.signals.partial.emit("\n")
+        for sentence in self._sentences.flush():
+            self._speaker.say(sentence)
+
+    def stream_answer(self, index, output, chunks):
+        """Runs one streaming backend call, feeding its chunks into the ordered output slot."""
+        try:
+            for chunk in chunks:
+                if not self._is_running:
+                    break
+                output.emit(index, chunk)
+        finally:
+            output.close(index)
+
+    def realtime_stream(self, speculation):
+        """The realtime stream function, fed the speculative search results when they match the query."""
+        if speculation is None:
+            return RealtimeSearchEngineStream
+        return lambda query_text: RealtimeSearchEngineStream(query_text, search_results=speculation.claim(query_text))
 
+    def run_automation(self, automation_tasks):
+        """Runs the async Automation() function on the shared event loop; returns text to report."""
+        try:
+            results = RunSync(Automation(automation_tasks))
+            failed = [r for r in results if r.status in ("failed", "error")]
+            if failed:
+                details = ", ".join(f"{r.command} ({r.error or r.note or r.status})" for r in failed)
+                return f"Sorry, I encountered an issue executing automation tasks: {details}\n"
+            # else: # Optional success message for automation
+            #    return f"Completed: {', '.join(automation_tasks)}\n"
+            return ""
+        except Exception as auto_e:
+            print(f"[ERROR] Automation execution failed: {auto_e}")
+            self.signals.error.emit((type(auto_e), auto_e, auto_e.__traceback__))
+            return f"Sorry, automation failed: {auto_e}\n"
+
+    @Traced("BackendWorker.run")
     def run(self):
         """Processes the query by calling appropriate backend functions."""
+        speculation = None
         try:
             self.signals.status.emit("Analyzing request...")
-            # 1. Get Task(s) from Decision Model
+            # 1. Get Task(s) from Decision Model, searching the raw query meanwhile (if enabled)
+            speculation = StartSpeculativeSearch(self.query)
             tasks = FirstLayerDMM(self.query)
             print(f"DMM Tasks: {tasks}") # Debug output
 
@@ -56,37 +128,33 @@ class BackendWorker(QThread):
                 self.signals.result.emit("I couldn't quite understand that. Please rephrase.")
                 return
 
-            response_text = ""
+            response_text = "" # Text that still has to be shown and spoken (not streamed)
+            answer_jobs = [] # (kind, stream function, query) for general/realtime answers
             automation_tasks = [] # Collect tasks for the async Automation function
 
-            # 2. Process Each Task from the Decision Model
+            # 2. Sort the tasks from the Decision Model into independent jobs
             for task_str in tasks:
                 task_lower = task_str.lower().strip()
 
                 if task_lower.startswith("general"):
                     query_text = task_str.removeprefix("general").strip().strip('()')
                     self.signals.status.emit(f"Thinking about: {query_text}...")
-                    response = Chatbot(query_text)
-                    response_text += response + "\n"
+                    answer_jobs.append(("general", ChatbotStream, query_text))
 
                 elif task_lower.startswith("realtime"):
                     query_text = task_str.removeprefix("realtime").strip().strip('()')
                     self.signals.status.emit(f"Searching online for: {query_text}...")
-                    response = RealtimeSearchEngine(query_text)
-                    response_text += response + "\n"
+                    answer_jobs.append(("realtime", self.realtime_stream(speculation), query_text))
 
                 elif task_lower.startswith("generate image"): # <-- HANDLE IMAGE GENERATION
                     prompt = task_str.removeprefix("generate image").strip().strip('()')
                     self.signals.status.emit(f"Starting image generation for: '{prompt}'...")
                     try:
-                        # Run image generation in a separate thread to avoid freezing GUI
-                        img_thread = threading.Thread(target=generate_image_task, args=(prompt,), daemon=True)
-                        img_thread.start()
+                        # Queue the job on the image service; it opens the images when they are ready
+                        generate_image_task(prompt)
                         response_text += f"Okay, generating an image for '{prompt}'. This might take a moment...\n"
-                        # Note: We don't wait for completion here. The image generation
-                        # function itself should handle opening/displaying the image.
                     except Exception as img_e:
-                        print(f"[ERROR] Image generation thread failed to start: {img_e}")
+                        print(f"[ERROR] Image generation could not be queued: {img_e}")
                         self.signals.error.emit((type(img_e), img_e, img_e.__traceback__))
                         response_text += f"Sorry, I couldn't start the image generation: {img_e}\n"
 
@@ -98,35 +166,33 @@ class BackendWorker(QThread):
                 else: # Assume it's an automation task for the Automation() function
                     automation_tasks.append(task_str)
 
-            # 3. Execute Automation Tasks (if any collected)
+            # 3. Run answers and automation concurrently (capped per backend); answers are shown in task order
+            self._speaker = SentenceSpeaker(manageTTS, lambda: self._is_running)
+            self._sentences = SentenceBuffer()
+            output = OrderedOutput(len(answer_jobs), self.forward_chunk, self.end_answer)
+            jobs = [
+                (kind, lambda i=i, stream=stream, query_text=query_text: self.stream_answer(i, output, stream(query_text)))
+                for i, (kind, stream, query_text) in enumerate(answer_jobs)
+            ]
             if automation_tasks:
                 self.signals.status.emit(f"Executing automation: {', '.join(automation_tasks)}...")
-                try:
-                    # Get or create an asyncio event loop for the current thread
-                    try:
-                        loop = asyncio.get_running_loop()
-                    except RuntimeError: # 'RuntimeError: There is no current event loop...'
-                        loop = asyncio.new_event_loop()
-                        asyncio.set_event_loop(loop)
-
-                    success = loop.run_until_complete(Automation(automation_tasks))
-                    if not success:
-                        response_text += f"Sorry, I encountered an issue executing automation tasks.\n"
-                    # else: # Optional success message for automation
-                    #    response_text += f"Completed: {', '.join(automation_tasks)}\n"
-                except Exception as auto_e:
-                    print(f"[ERROR] Automation execution failed: {auto_e}")
-                    self.signals.error.emit((type(auto_e), auto_e, auto_e.__traceback__))
-                    response_text += f"Sorry, automation failed: {auto_e}\n"
-
-
-            # 4. Send Final Text Response and Trigger TTS
+                jobs.append(("automation", lambda: self.run_automation(automation_tasks)))
+
+            for (kind, _), (result, error) in zip(jobs, scheduler.run_all(jobs)):
+                if error is not None:
+                    print(f"[ERROR] {kind} task failed: {error}")
+                    self.signals.error.emit((type(error), error, error.__traceback__))
+                    response_text += f"Sorry, the {kind} task failed: {error}\n"
+                elif kind == "automation":
+                    response_text += result
+
+            # 4. Send the remaining (non-streamed) text and queue it for TTS after the streamed answers
             final_response = response_text.strip()
             if final_response:
                 self.signals.result.emit(final_response)
-                # Run TTS in its own thread so it doesn't block the GUI update
-                tts_thread = threading.Thread(target=manageTTS, args=(final_response, lambda r=None: self._is_running), daemon=True)
-                tts_thread.start()
+                self._speaker.say(final_response)
+            if stream_metrics.stats():
+                print(f"Streaming: {stream_metrics.stats()}") # Time-to-first-token per backend
 
         except Exception as e:
             # Catch-all for unexpected errors during the process
@@ -134,6 +200,11 @@ class BackendWorker(QThread):
             self.signals.error.emit((type(e), e, e.__traceback__))
             self.signals.result.emit(f"A critical error occurred: {e}") # Send error to GUI
         finally:
+            if speculation is not None:
+                speculation.discard() # no-op when a realtime answer used it
+                print(f"Speculative search: {speculation.stats()}")
+            if self._speaker is not None:
+                self._speaker.close() # Finish speaking queued sentences in the background
             self.signals.finished.emit() # Signal that processing is complete
 
     def stop(self):
@@ -219,6 +290,12 @@ class AssistantWindow(QMainWindow):
         self.chat_display.setObjectName("chatDisplay")
         self.chat_display.setReadOnly(True)
         main_layout.addWidget(self.chat_display)
+        # The widget only holds a window of the conversation; older turns are paged in on scroll
+        self.transcript = Transcript()
+        self.transcript_window = TranscriptWindow(self.transcript)
+        self._rendering = False
+        self.chat_display.verticalScrollBar().valueChanged.connect(self.on_scroll)
+        self.render_transcript()
 
         # --- Input Area Layout ---
         input_layout = QHBoxLayout()
@@ -243,6 +320,7 @@ class AssistantWindow(QMainWindow):
         main_layout.addLayout(input_layout)
 
         self.worker_thread = None
+        self._stream_open = False # True while streamed chunks are appended to the last message
 
         # Optional: Make window frameless
         # self.setWindowFlag(Qt.FramelessWindowHint)
@@ -251,6 +329,7 @@ class AssistantWindow(QMainWindow):
     def toggle_listening(self):
         """Handles the microphone button click."""
         self.is_listening = not self.is_listening
+        SetMicrophoneStatus("True" if self.is_listening else "False") # Publish on the state bus
         if self.is_listening:
             self.mic_button.setIcon(self.mic_on_icon)
             self.display_status("Listening... (STT not implemented)")
@@ -318,19 +397,85 @@ class AssistantWindow(QMainWindow):
         self.worker_thread = BackendWorker(query)
         # Connect signals from worker to GUI slots
         self.worker_thread.signals.result.connect(self.display_result)
+        self.worker_thread.signals.partial.connect(self.display_partial)
         self.worker_thread.signals.status.connect(self.display_status)
         self.worker_thread.signals.error.connect(self.handle_error)
         self.worker_thread.signals.finished.connect(self.on_processing_finished)
         self.worker_thread.start() # Start the thread's run() method
 
-    def add_message(self, sender, message):
-        """Adds a formatted message to the chat display."""
+    # Chat log roles of earlier sessions, shown with this window's labels
+    ROLE_LABELS = {"user": "You:", "assistant": "Kobe:"}
+
+    def message_html(self, index, sender, message):
+        """One message as HTML; the anchor lets the view scroll back to it after paging."""
+        sender = self.ROLE_LABELS.get(sender, sender)
         sender_color = "#87CEEB" if sender == "Kobe:" else "#E0E0E0" # Light blue for Kobe
-        sender_html = f"<span style='color:{sender_color}; font-weight:bold;'>{sender}</span>"
+        sender_html = f"<a name='m{index}'></a><span style='color:{sender_color}; font-weight:bold;'>{sender}</span>"
+        if not message:
+            return sender_html # a streamed answer that has not started yet
         # Escape HTML characters in the message to prevent rendering issues
         message_html = message.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\n', '<br>')
-        self.chat_display.append(f"{sender_html}<br>{message_html}<br>")
-        self.chat_display.ensureCursorVisible() # Auto-scroll to bottom
+        return f"{sender_html}<br>{message_html}<br>"
+
+    def render_transcript(self, anchor=None):
+        """Redraws the visible window of the conversation, optionally keeping message `anchor` in view."""
+        self._rendering = True
+        try:
+            self.chat_display.clear()
+            for offset, (sender, message) in enumerate(self.transcript_window.items()):
+                self.chat_display.append(self.message_html(self.transcript_window.start + offset, sender, message))
+            if anchor is None:
+                self.chat_display.moveCursor(QTextCursor.End)
+                self.chat_display.ensureCursorVisible()
+            else:
+                self.chat_display.scrollToAnchor(f"m{anchor}")
+        finally:
+            self._rendering = False
+
+    def on_scroll(self, value):
+        """Pages older turns in at the top of the view and newer ones back in at the bottom."""
+        if self._rendering:
+            return
+        scrollbar = self.chat_display.verticalScrollBar()
+        if value == scrollbar.minimum():
+            first = self.transcript_window.start
+            if self.transcript_window.older():
+                self.render_transcript(anchor=first)
+        elif value == scrollbar.maximum():
+            last = self.transcript_window.stop - 1
+            if self.transcript_window.newer():
+                self.render_transcript(anchor=last)
+
+    def show_new_message(self, index, sender, message, was_at_end):
+        """Appends the newest message to the widget, or redraws when the window had to move."""
+        if self.transcript_window.follow() or not was_at_end:
+            self.render_transcript()
+        else:
+            self.chat_display.append(self.message_html(index, sender, message))
+            self.chat_display.ensureCursorVisible() # Auto-scroll to bottom
+
+    def add_message(self, sender, message):
+        """Adds a formatted message to the chat display."""
+        was_at_end = self.transcript_window.at_end
+        self.transcript.append(sender, message)
+        self.show_new_message(len(self.transcript) - 1, sender, message, was_at_end)
+        self._stream_open = False
+
+    def display_partial(self, chunk):
+        """Appends a streamed chunk to the answer being generated, opening a new message if needed."""
+        if not self._stream_open:
+            was_at_end = self.transcript_window.at_end
+            self.transcript.append("Kobe:", "")
+            self.show_new_message(len(self.transcript) - 1, "Kobe:", "", was_at_end)
+            self.chat_display.moveCursor(QTextCursor.End)
+            self.chat_display.insertPlainText("\n")
+            self._stream_open = True
+        self.transcript.extend_last(chunk)
+        if not self.transcript_window.at_end:
+            return # the user paged back; the chunk shows when the answer is paged in again
+        self.chat_display.moveCursor(QTextCursor.End)
+        self.chat_display.insertPlainText(chunk)
+        self.chat_display.ensureCursorVisible()
 
     def display_result(self, result_text):
         """Displays the final text result from the backend."""
@@ -375,4 +520,17 @@ if __name__ == '__main__':
     # app.setStyle("Fusion")
     window = AssistantWindow()
     window.show()
+
+    def on_window_ready():
+        """Runs on the first event-loop tick, i.e. once the window is interactive."""
+        cold_start = perf_counter() - _START_TIME
+        print(f"Cold start to interactive window: {cold_start * 1000:.1f} ms")
+        if BACKEND_WARMUP:
+            warmup_thread = backends.warm_up()
+            if STARTUP_REPORT:
+                threading.Thread(target=lambda: (warmup_thread.join(), print(backends.startup_report(cold_start))), daemon=True).start()
+        elif STARTUP_REPORT:
+            print(backends.startup_report(cold_start))
+    QTimer.singleShot(0, on_window_ready)
+
     sys.exit(app.exec_())
\ No newline at end of file
@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import weakref
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import dotenv_values
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+GROQ_API_KEY = env_vars.get("GROQ_API_KEY")
+COHERE_API_KEY = env_vars.get("COHERE_API_KEY")
+
+HTTP_POOL_SIZE = int(env_vars.get("HTTP_POOL_SIZE") or 10) # keep-alive connections per host
+HTTP_TIMEOUT = float(env_vars.get("HTTP_TIMEOUT") or 30) # seconds
+HTTP_RETRIES = int(env_vars.get("HTTP_RETRIES") or 2)
+HTTP_BACKOFF = float(env_vars.get("HTTP_BACKOFF") or 0.5) # sleeps 0.5s, 1s, 2s... between retries
+HTTP_KEEPALIVE = float(env_vars.get("HTTP_KEEPALIVE") or 60) # seconds an idle connection stays open
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_clients = {}
+_async_clients = weakref.WeakKeyDictionary() # event loop -> {name: client}; async clients are bound to their loop
+_lock = threading.Lock()
+
+
+# --- requests ---
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request."""
+
+    def __init__(self, timeout=HTTP_TIMEOUT):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+def NewSession(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT, retries=HTTP_RETRIES, backoff=HTTP_BACKOFF):
+    """Creates a pooled keep-alive session with retry/backoff on transient errors."""
+    session = TimeoutSession(timeout)
+    retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=RETRY_STATUSES,
+                  allowed_methods=frozenset(["GET", "HEAD", "POST"]), raise_on_status=False)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# --- httpx (used by the groq and cohere async SDK clients) ---
+
+def NewAsyncHttpxClient(pool_size=HTTP_POOL_SIZE, timeout=HTTP_TIMEOUT):
+    limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size, keepalive_expiry=HTTP_KEEPALIVE)
+    return httpx.AsyncClient(limits=limits, timeout=timeout)
+
+
+# --- Shared Clients ---
+
+def _get(name, factory):
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = factory()
+                _clients[name] = client
+    return client
+
+def get_session():
+    """Shared requests session for plain HTTP calls (image inference, web fallbacks)."""
+    return _get("requests", NewSession)
+
+def _get_async(name, factory):
+    # An override from set_client() applies to every loop
+    client = _clients.get(name)
+    if client is not None:
+        return client
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        if name not in clients:
+            clients[name] = factory()
+        return clients[name]
+
+def get_async_groq_client():
+    """Groq AsyncGroq client for the running event loop (one pooled instance per loop)."""
+    def factory():
+        import groq
+        return groq.AsyncGroq(api_key=GROQ_API_KEY, timeout=HTTP_TIMEOUT, max_retries=HTTP_RETRIES,
+                              http_client=NewAsyncHttpxClient())
+    return _get_async("async_groq", factory)
+
+def get_async_cohere_client():
+    """Cohere AsyncClient for the running event loop (one pooled instance per loop)."""
+    def factory():
+        import cohere
+        return cohere.AsyncClient(api_key=COHERE_API_KEY, timeout=HTTP_TIMEOUT, httpx_client=NewAsyncHttpxClient())
+    return _get_async("async_cohere", factory)
+
+def set_client(name, client):
+    """Replaces a shared client ("requests", "async_groq", "async_cohere"), e.g. with a local fake."""
+    with _lock:
+        if client is None:
+            _clients.pop(name, None)
+        else:
+            _clients[name] = client
@@ -1,10 +1,18 @@
 import asyncio
-from random import radiant
+import queue
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
-import requests
 from dotenv import get_key
 import os
-from time import sleep 
+import sys
+from time import sleep, time
+
+# --- Dynamically Adjust Import Path (this file also runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+from Backend.HttpClients import NewSession
 
 
 #Function to open and display images based on the given prompt
@@ -31,63 +39,195 @@ def open_image(prompt):
 API_URL = "https://api-inference.huggingface.co/models/CompVis/stable-diffusion-v1-4"
 headers = {"Authorization": f"Bearer {get_key('.env', 'HUGGINGFACE_API_KEY')}"}
 
-# Async Function to send a query to the hugging face api
-async def query(payload):
-    response = await asyncio.to_thread(requests.post,API_URL, headers=headers , json=payload)
-    return response.content
+IMAGE_VARIANTS = 4 # generate_image() always produced four variants per prompt
+IMAGE_PARALLELISM = int(get_key(".env", "IMAGE_PARALLELISM") or 4) # variants requested at the same time
+IMAGE_TIMEOUT = 120 # seconds per inference request
+IMAGE_JOBS_KEPT = 256 # finished jobs whose status can still be looked up...
+IMAGE_JOB_TTL = 3600 # ...for at most this many seconds
+
+
+class ImageJob:
+    """A queued image-generation request and its progress."""
+
+    def __init__(self, job_id, prompt, callback=None):
+        self.id = job_id
+        self.prompt = prompt
+        self.callback = callback
+        self.status = "queued" # queued -> running -> done / failed / cancelled
+        self.files = []
+        self.error = None
+        self.finished_at = None
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+
+    def to_dict(self):
+        return {"id": self.id, "prompt": self.prompt, "status": self.status, "files": list(self.files), "error": self.error}
+
+
+class ImageGenerationService:
+    """Long-lived image generator: an in-memory job queue served by a worker thread that
+    reuses one HTTP session and requests the variants of each job in parallel.
+
+    Finished jobs are forgotten after IMAGE_JOB_TTL seconds or beyond IMAGE_JOBS_KEPT of them;
+    callbacks run on their own thread so a slow one (opening images) never delays the next job."""
+
+    def __init__(self, api_url=API_URL, headers=headers, output_dir="Data", variants=IMAGE_VARIANTS,
+                 parallelism=IMAGE_PARALLELISM, timeout=IMAGE_TIMEOUT, session=None):
+        self.api_url = api_url
+        self.headers = headers
+        self.output_dir = output_dir
+        self.variants = variants
+        self.timeout = timeout
+        # Pooled keep-alive session (with retry/backoff) sized for the parallel variant requests
+        self.session = session or NewSession(pool_size=max(parallelism, 1), timeout=timeout)
+        self._pool = ThreadPoolExecutor(max_workers=max(parallelism, 1), thread_name_prefix="image-variant")
+        self._callbacks = ThreadPoolExecutor(max_workers=1, thread_name_prefix="image-callback")
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._finished = OrderedDict() # job id -> job, oldest finished first
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True, name="image-generation")
+                self._worker.start()
+
+    def _request_variant(self, job, index):
+        if job.cancelled.is_set():
+            return None
+        payload = {"inputs": f"{job.prompt}, quality high , detailed, 4k, trending on artstation  "}
+        response = self.session.post(self.api_url, headers=self.headers, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        file_path = os.path.join(self.output_dir, f"{job.prompt.replace(' ', '_')}{index + 1}.jpg")
+        with open(file_path, "wb") as f:
+            f.write(response.content)
+        return file_path
+
+    def _run_job(self, job):
+        job.status = "running"
+        os.makedirs(self.output_dir, exist_ok=True)
+        try:
+            results = list(self._pool.map(lambda i: self._request_variant(job, i), range(self.variants)))
+            job.files = [path for path in results if path]
+            job.status = "cancelled" if job.cancelled.is_set() else "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            print(f"[ERROR] Image generation failed for '{job.prompt}': {e}")
+
+    def _prune(self):
+        """Caller holds the lock. Drops finished jobs that are too old or too many."""
+        cutoff = time() - IMAGE_JOB_TTL
+        while self._finished:
+            job_id, job = next(iter(self._finished.items()))
+            if len(self._finished) <= IMAGE_JOBS_KEPT and job.finished_at > cutoff:
+                break
+            del self._finished[job_id]
+            self._jobs.pop(job_id, None)
+
+    def _run_callback(self, job):
+        try:
+            job.callback(job)
+        except Exception as e:
+            print(f"[ERROR] Image generation callback failed: {e}")
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                break
+            if not job.cancelled.is_set():
+                self._run_job(job)
+            else:
+                job.status = "cancelled"
+            job.finished_at = time()
+            with self._lock:
+                self._finished[job.id] = job
+                self._prune()
+            job.done.set()
+            if job.callback:
+                self._callbacks.submit(self._run_callback, job)
+
+    # --- Public API ---
+
+    def submit(self, prompt, callback=None):
+        """Queues a prompt and returns its job id; callback(job) runs when the job finishes."""
+        job = ImageJob(uuid.uuid4().hex, prompt, callback)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._ensure_worker()
+        self._queue.put(job)
+        return job.id
+
+    def status(self, job_id):
+        """Returns the job's state as a dict, or None for an unknown (or long finished) id."""
+        job = self._jobs.get(job_id)
+        return job.to_dict() if job else None
+
+    def cancel(self, job_id):
+        """Cancels a queued job, or stops a running one from requesting further variants."""
+        job = self._jobs.get(job_id)
+        if job is None or job.done.is_set():
+            return False
+        job.cancelled.set()
+        return True
+
+    def wait(self, job_id, timeout=None):
+        job = self._jobs.get(job_id)
+        return job.done.wait(timeout) if job else False
+
+    def shutdown(self):
+        self._queue.put(None)
+        self._pool.shutdown(wait=False)
+        self._callbacks.shutdown(wait=False)
+        self.session.close()
+
+
+# Shared service used by the GUI and main.py
+image_service = ImageGenerationService()
+
+def _open_job_images(job):
+    if job.status == "done":
+        open_image(job.prompt)
+
+def generate_image_task(prompt: str):
+    """Queues an image generation and opens the images when they are ready."""
+    return image_service.submit(prompt, callback=_open_job_images)
 
 async def generate_image(prompt : str):
-    task=[]
-
-
-    for _ in range(4):
-        payload = {
-            "inputs": f"{prompt}, quality high , detailed, 4k, trending on artstation  ",
-            
-        } 
-        task = asyncio.create_task(query(payload))
-        task.append(task)
-    #wait for all tasks to complete
-    image_bytes_list = await asyncio.gather(*task)
-
-    #save the images to the Data folder
-    for i, image_bytes in enumerate (image_bytes_list):
-        with open(f"Data/{prompt.replace(' ', '_')}{i+1}.jpg", "wb") as f:
-            f.write(image_bytes)
+    job_id = image_service.submit(prompt)
+    await asyncio.to_thread(image_service.wait, job_id)
+    return image_service.status(job_id)
 
 #wrapper function to manage image generation
 def GenerateImages(prompt: str):
-    asyncio.run(generate_image(prompt))
+    job_id = image_service.submit(prompt)
+    image_service.wait(job_id)
     open_image(prompt)
 
-while True:
-
-    try:
-
-        #read the status and prompt from the data file
-        with open(r"Frontend\ Files \ ImageGeneration.data ","r" ) as f:
-            Data: str = f.read()
-
-            Prompt , Status = Data.split(",") 
+if __name__ == "__main__":
+    from Backend.StateBus import RemoteStateBus
 
-
-            #if the status indicates an image generation request
-            if Status == "True":
-                print("Generating Image...")
-                ImageStatus = GenerateImages(prompt=Prompt)
-
-
-
-                #reset the status in the field after generating images
-                with open(r"Frontend\ Files \ ImageGeneration.data","w") as f:
-                    f.write("False,False")
-                    break
-
-            else:
-                sleep(1)
-
-
-    except Exception as e:
-        print(e)
-        
-        
+    # Standalone service: takes requests from the shared state bus (served by main.py)
+    bus = RemoteStateBus()
+    version, Data = 0, bus.get("image_generation")
+    while True:
+        try:
+            #wait for the status and prompt to be published
+            if not Data.endswith(",True"):
+                version, Data = bus.wait_change("image_generation", version)
+                continue
+            Prompt , Status = Data.rsplit(",", 1) 
+            Data = ""
+
+            #reset the status and queue the job; the worker keeps running for the next request
+            bus.set("image_generation", "False,False")
+            print("Generating Image...")
+            generate_image_task(Prompt)
+
+        except Exception as e:
+            print(e)
+            break
@@ -0,0 +1,219 @@
+import os
+import sys
+import json
+import zlib
+import struct
+import argparse
+import tempfile
+import threading
+from time import sleep, perf_counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# --- Dynamically Adjust Import Path (this file runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+
+# Usage: python Backend/ImageServiceTest.py [--parallelism 4] [--delay 0.2]
+#
+# Runs ImageGenerationService against a local stub of the inference endpoint and checks
+# submit/status/cancel/callback end to end: successful jobs, failing and retried requests,
+# cancellation of queued and running jobs, and connection reuse. Exits 1 if a check fails.
+
+
+def StubImage():
+    """A valid 1x1 PNG, as the inference endpoint returns image bytes."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    header = struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(b"\x00\xff\x00\x00")) + chunk(b"IEND", b""))
+
+PNG = StubImage()
+
+
+# --- Stub Inference Server ---
+
+class StubInferenceServer:
+    """Local HTTP server standing in for the inference API; the prompt selects the behaviour:
+
+    "fail" -> 400 (not retried), "flaky" -> 503 on the first request then the image,
+    "slow" -> the image after `delay` seconds, anything else -> the image at once.
+    """
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+        self.prompts = [] # prompt of every request, in arrival order
+        self.connections = set() # client (host, port) pairs, one per TCP connection
+        self.first_request = threading.Event()
+        self._lock = threading.Lock()
+        self._flaky_seen = set()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self._server.server_address[1]}/models/stub"
+        threading.Thread(target=self._server.serve_forever, daemon=True, name="image-stub").start()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive, so connection reuse is visible
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                prompt = json.loads(body or b"{}").get("inputs", "")
+                status = stub._record(self.client_address, prompt)
+                if status != 200:
+                    self._reply(status, b'{"error": "stub"}', "application/json")
+                    return
+                if "slow" in prompt:
+                    sleep(stub.delay)
+                self._reply(200, PNG, "image/png")
+
+            def _reply(self, status, data, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def _record(self, client, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+            self.connections.add(client)
+            self.first_request.set()
+            if "fail" in prompt:
+                return 400
+            if "flaky" in prompt and prompt not in self._flaky_seen:
+                self._flaky_seen.add(prompt)
+                return 503
+            return 200
+
+    def requests_for(self, word):
+        with self._lock:
+            return sum(word in prompt for prompt in self.prompts)
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+# --- Checks ---
+
+class Checks:
+    def __init__(self, stub, parallelism):
+        from Backend.ImageGeneration import ImageGenerationService
+        self.stub = stub
+        self.parallelism = parallelism
+        self.output_dir = tempfile.mkdtemp(prefix="image-stub-")
+        self.service = ImageGenerationService(api_url=stub.url, headers={}, output_dir=self.output_dir,
+                                              parallelism=parallelism, timeout=10)
+        self.failures = []
+
+    def check(self, name, ok, detail=""):
+        print(f"{'PASS' if ok else 'FAIL'}  {name}" + (f": {detail}" if detail and not ok else ""))
+        if not ok:
+            self.failures.append(name)
+
+    def run_job(self, prompt):
+        """Submits a prompt and waits for its job and its callback; returns (status, callback job)."""
+        called = threading.Event()
+        seen = {}
+
+        def callback(job):
+            seen["job"] = job.to_dict()
+            called.set()
+
+        job_id = self.service.submit(prompt, callback=callback)
+        finished = self.service.wait(job_id, timeout=30)
+        called.wait(10)
+        return (self.service.status(job_id) if finished else None), seen.get("job")
+
+    def success(self):
+        status, called = self.run_job("a red fox")
+        files = status["files"] if status else []
+        self.check("job completes", status is not None and status["status"] == "done", status)
+        self.check("all variants saved", len(files) == self.service.variants, files)
+        self.check("files hold the returned bytes", all(open(path, "rb").read() == PNG for path in files))
+        self.check("callback receives the finished job", called is not None and called["status"] == "done", called)
+
+    def failure(self):
+        status, called = self.run_job("fail this prompt")
+        self.check("failed request fails the job", status is not None and status["status"] == "failed", status)
+        self.check("failure carries the error", bool(status and status["error"]), status)
+        self.check("callback runs for failed jobs", called is not None and called["status"] == "failed", called)
+
+    def retry(self):
+        status, _ = self.run_job("flaky prompt")
+        self.check("transient 503 is retried", status is not None and status["status"] == "done", status)
+
+    def cancel_queued(self):
+        blocker = self.service.submit("slow blocker")
+        job_id = self.service.submit("queued victim")
+        cancelled = self.service.cancel(job_id)
+        self.service.wait(blocker, timeout=30)
+        self.service.wait(job_id, timeout=30)
+        status = self.service.status(job_id)
+        self.check("queued job can be cancelled", cancelled and status["status"] == "cancelled", status)
+        self.check("cancelled queued job makes no requests", self.stub.requests_for("queued victim") == 0)
+        self.check("finished job cannot be cancelled", not self.service.cancel(job_id))
+
+    def cancel_running(self):
+        # One variant at a time, so variants after the cancel are never requested
+        service = self.service
+        self.service = type(service)(api_url=self.stub.url, headers={}, output_dir=self.output_dir,
+                                     parallelism=1, timeout=10)
+        try:
+            self.stub.first_request.clear()
+            job_id = self.service.submit("slow running victim")
+            self.stub.first_request.wait(10)
+            cancelled = self.service.cancel(job_id)
+            self.service.wait(job_id, timeout=30)
+            status = self.service.status(job_id)
+            self.check("running job can be cancelled", cancelled and status["status"] == "cancelled", status)
+            self.check("cancel stops further variants", len(status["files"]) < self.service.variants, status)
+        finally:
+            self.service.shutdown()
+            self.service = service
+
+    def lookups(self):
+        self.check("unknown job id has no status", self.service.status("no-such-job") is None)
+        self.check("unknown job id cannot be cancelled", not self.service.cancel("no-such-job"))
+
+    def connection_reuse(self):
+        before = len(self.stub.connections)
+        for i in range(3):
+            self.run_job(f"reuse prompt {i}")
+        opened = len(self.stub.connections) - before
+        self.check("connections are reused across jobs", opened <= self.parallelism,
+                   f"{opened} new connections for {3 * self.service.variants} requests")
+
+    def run(self):
+        for check in (self.success, self.failure, self.retry, self.cancel_queued, self.cancel_running,
+                      self.lookups, self.connection_reuse):
+            check()
+        self.service.shutdown()
+        return not self.failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the image generation service against a local stub server.")
+    parser.add_argument("--parallelism", type=int, default=4, help="variants requested at the same time")
+    parser.add_argument("--delay", type=float, default=0.2, help="stub latency of 'slow' prompts (s)")
+    args = parser.parse_args(argv)
+
+    stub = StubInferenceServer(delay=args.delay)
+    start = perf_counter()
+    try:
+        ok = Checks(stub, args.parallelism).run()
+    finally:
+        stub.close()
+    print(f"{len(stub.prompts)} stub requests in {perf_counter() - start:.2f}s")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
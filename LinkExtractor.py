@@ -0,0 +1,169 @@
+import os
+import sys
+import glob
+import codecs
+import argparse
+import tracemalloc
+from time import perf_counter
+from html.parser import HTMLParser
+
+# Pulls result links out of a search results page without building a document tree. The parser
+# sees tags as they stream in and stops at the link limit, so the usual "first result" lookup
+# neither parses nor (with FirstLinkFromChunks) downloads the rest of the page.
+#
+# Benchmark: python Backend/LinkExtractor.py [page.html ...] [--save-fixtures DIR] [--repeat 20]
+
+RESULT_JSNAME = "UWckNb" # Google's result-link attribute (changes from time to time)
+REDIRECT_PREFIX = "/url?q="
+
+
+def ResultLink(attrs):
+    """The target of a qualifying result anchor, or None; same rules as the old soup selector."""
+    href = attrs.get("href")
+    if not href:
+        return None
+    if href.startswith(REDIRECT_PREFIX):
+        return href[len(REDIRECT_PREFIX):].split("&")[0] # Extract clean URL from Google redirect
+    if attrs.get("jsname") == RESULT_JSNAME and not href.startswith(("#", "/")):
+        return href # Direct link
+    return None
+
+
+class _Done(Exception):
+    pass
+
+class LinkParser(HTMLParser):
+    """Incremental anchor scanner: feed() chunks until done is set."""
+
+    def __init__(self, limit=None):
+        super().__init__(convert_charrefs=True)
+        self.limit = limit
+        self.links = []
+        self.done = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag != "a":
+            return
+        link = ResultLink(dict(attrs))
+        if link:
+            self.links.append(link)
+            if self.limit and len(self.links) >= self.limit:
+                self.done = True
+                raise _Done() # abandon the rest of the buffer
+
+    def feed(self, data):
+        if self.done:
+            return
+        try:
+            super().feed(data)
+        except _Done:
+            pass
+
+
+# --- Extraction API ---
+
+def ExtractLinks(html, limit=None):
+    """Result links in page order, at most `limit` of them."""
+    if not html:
+        return []
+    parser = LinkParser(limit)
+    parser.feed(html)
+    return parser.links
+
+def FirstLink(html):
+    links = ExtractLinks(html, limit=1)
+    return links[0] if links else None
+
+def FirstLinkFromChunks(chunks, encoding="utf-8"):
+    """First result link from an iterable of str/bytes chunks; stops consuming it once found.
+
+    Pass a streamed response body (response.iter_content()) and close the response afterwards
+    to skip downloading the rest of the page.
+    """
+    parser = LinkParser(limit=1)
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    for chunk in chunks:
+        parser.feed(decoder.decode(chunk) if isinstance(chunk, bytes) else chunk)
+        if parser.done:
+            break
+    return parser.links[0] if parser.links else None
+
+
+# --- Benchmark ---
+
+def SoupLinks(html, strained=False):
+    """The previous BeautifulSoup implementation (optionally SoupStrainer-restricted), for comparison."""
+    from bs4 import BeautifulSoup, SoupStrainer
+    soup = BeautifulSoup(html, "html.parser", parse_only=SoupStrainer("a") if strained else None)
+    return [link for link in (ResultLink(a.attrs) for a in soup.select('a[jsname="UWckNb"], a[href^="/url?q="]'))
+            if link]
+
+def SyntheticResultsPage(results=10, filler_kb=300, first_result_at=0.4):
+    """A results-page-shaped document: inline scripts and styles, chrome links, then results."""
+    filler = ("<div class=\"g\"><span class=\"st\">" + "lorem ipsum dolor sit amet " * 8 + "</span>"
+              "<a href=\"/search?q=related\">related</a></div>\n")
+    head = ("<!doctype html><html><head><title>open x website - Google Search</title>"
+            "<style>" + ".c{color:#000}" * 2000 + "</style>"
+            "<script>var a='<a href=\"/url?q=https://not.a.link\">';" + "x=1;" * 5000 + "</script></head><body>")
+    blocks = max(int(filler_kb * 1024 / len(filler)), 1)
+    before = int(blocks * first_result_at)
+    results_html = "".join(
+        f"<div class=\"g\"><a jsname=\"{RESULT_JSNAME}\" href=\"https://result{i}.example.com/\"><h3>Result {i}</h3></a>"
+        f"<a href=\"/url?q=https://result{i}.example.com/&amp;sa=U\">cached</a></div>\n" for i in range(results))
+    return head + filler * before + results_html + filler * (blocks - before) + "</body></html>"
+
+def Measure(function, html, repeat):
+    """Returns (result, mean ms, peak KiB) for one extractor over one page."""
+    result = function(html)
+    start = perf_counter()
+    for _ in range(repeat):
+        function(html)
+    elapsed = (perf_counter() - start) * 1000 / repeat
+    tracemalloc.start()
+    function(html)
+    peak = tracemalloc.get_traced_memory()[1] / 1024
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare result-link extractors on saved HTML pages.")
+    parser.add_argument("pages", nargs="*", help="saved results pages (default: synthetic pages)")
+    parser.add_argument("--save-fixtures", metavar="DIR", help="write the synthetic pages to DIR and exit")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.pages:
+        pages = {}
+        for pattern in args.pages:
+            for path in sorted(glob.glob(pattern)) or [pattern]:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    pages[os.path.basename(path)] = f.read()
+    else:
+        pages = {"small.html": SyntheticResultsPage(filler_kb=50),
+                 "typical.html": SyntheticResultsPage(),
+                 "late-results.html": SyntheticResultsPage(filler_kb=800, first_result_at=0.9)}
+    if args.save_fixtures:
+        os.makedirs(args.save_fixtures, exist_ok=True)
+        for name, html in pages.items():
+            with open(os.path.join(args.save_fixtures, name), "w", encoding="utf-8") as f:
+                f.write(html)
+        print(f"wrote {len(pages)} fixtures to {args.save_fixtures}")
+        return
+
+    extractors = [("streaming first", lambda html: [FirstLink(html)])]
+    try:
+        import bs4 # noqa: F401 (the comparison needs it, the extractor does not)
+        extractors += [("soup (previous)", lambda html: SoupLinks(html)[:1]),
+                       ("soup + strainer", lambda html: SoupLinks(html, strained=True)[:1])]
+    except ImportError:
+        print("bs4 is not installed: only timing the streaming extractor", file=sys.stderr)
+
+    print(f"{'page':<20}{'KiB':>7}  {'extractor':<17}{'ms':>9}{'peak KiB':>10}  first link")
+    for name, html in pages.items():
+        for label, function in extractors:
+            result, ms, peak = Measure(function, html, args.repeat)
+            print(f"{name:<20}{len(html) / 1024:>7.0f}  {label:<17}{ms:>9.2f}{peak:>10.0f}  {result[0] if result else None}")
+
+
+if __name__ == "__main__":
+    main()
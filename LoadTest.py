@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import asyncio
+import argparse
+import tempfile
+import threading
+from time import perf_counter
+from urllib.parse import urlsplit
+
+# --- Dynamically Adjust Import Path (this file runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+from Backend.Tracing import Percentile
+
+# Usage: python Backend/LoadTest.py [--url http://127.0.0.1:8765] [--sessions 20] [--requests 200]
+#        python Backend/LoadTest.py --offline   (starts a server in-process against the benchmark fakes)
+
+QUERIES = [
+    "tell me about topic {n}",
+    "who won match {n}",
+    "explain how protocol {n} works",
+    "latest news about company {n}",
+    "and why does that matter for case {n}?",
+]
+
+
+# --- HTTP Client ---
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client for JSON requests."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._reader = None
+        self._writer = None
+
+    async def request(self, method, path, payload=None):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n\r\n")
+        self._writer.write(head.encode("latin-1") + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await self._reader.readexactly(int(headers.get("content-length") or 0))
+        if headers.get("connection", "").lower() == "close":
+            await self.close()
+        return status, json.loads(data or b"null")
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+# --- Load Generation ---
+
+async def RunLoad(url, sessions, requests, timeout=120):
+    """Each session sends its share of the queries one after another, all sessions at once."""
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies, statuses = [], {}
+
+    async def user(index, count):
+        connection = Connection(host, port)
+        try:
+            for i in range(count):
+                query = QUERIES[i % len(QUERIES)].format(n=index * 10000 + i)
+                start = perf_counter()
+                try:
+                    status, _ = await asyncio.wait_for(
+                        connection.request("POST", f"/sessions/load-{index}/query", {"query": query}), timeout)
+                except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+                    status = "error"
+                    await connection.close()
+                statuses[status] = statuses.get(status, 0) + 1
+                if status == 200:
+                    latencies.append((perf_counter() - start) * 1000)
+        finally:
+            await connection.close()
+
+    counts = [requests // sessions + (1 if i < requests % sessions else 0) for i in range(sessions)]
+    start = perf_counter()
+    await asyncio.gather(*(user(i, c) for i, c in enumerate(counts) if c))
+    elapsed = perf_counter() - start
+
+    stats_connection = Connection(host, port)
+    try:
+        _, server_stats = await stats_connection.request("GET", "/stats")
+    except (OSError, ValueError):
+        server_stats = None
+    finally:
+        await stats_connection.close()
+
+    return {
+        "requests": sum(statuses.values()),
+        "seconds": elapsed,
+        "requests_per_second": sum(statuses.values()) / elapsed if elapsed else 0.0,
+        "ok_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "statuses": {str(k): v for k, v in statuses.items()},
+        "p50_ms": Percentile(latencies, 50),
+        "p95_ms": Percentile(latencies, 95),
+        "p99_ms": Percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else 0.0,
+        "server": server_stats,
+    }
+
+def StartOfflineServer(args):
+    """Runs an AssistantServer on a background loop with fake LLM and search clients."""
+    from Backend.Benchmark import InstallFakeClients
+    InstallFakeClients(args.llm_latency, args.tokens_per_second, args.answer_tokens, args.dmm_latency)
+
+    import Backend.realtimeSearchEngine as realtime
+    from Backend.WebSearch import SearchService, StaticSearchBackend
+    realtime.search_service = SearchService(backend=StaticSearchBackend(latency=args.search_latency), persist=False)
+
+    from Backend.Server import AssistantServer
+    ready = threading.Event()
+    address = {}
+
+    def on_ready(server):
+        address["port"] = server.sockets[0].getsockname()[1]
+        ready.set()
+
+    def run():
+        asyncio.run(AssistantServer(automation=False).serve("127.0.0.1", 0, ready=on_ready))
+
+    threading.Thread(target=run, daemon=True, name="offline-server").start()
+    ready.wait()
+    return f"http://127.0.0.1:{address['port']}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the headless assistant server.")
+    parser.add_argument("--url", default="http://127.0.0.1:8765")
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent analyst sessions")
+    parser.add_argument("--requests", type=int, default=200, help="total queries across all sessions")
+    parser.add_argument("--offline", action="store_true", help="start a local server against fake clients")
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--dmm-latency", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    parser.add_argument("--output", help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    url = args.url
+    if args.offline:
+        args.output = os.path.abspath(args.output) if args.output else None
+        os.chdir(tempfile.mkdtemp(prefix="loadtest-")) # session logs and caches go to a scratch directory
+        url = StartOfflineServer(args)
+
+    report = asyncio.run(RunLoad(url, max(args.sessions, 1), args.requests))
+    print(f"{report['requests']} requests in {report['seconds']:.2f}s: {report['requests_per_second']:.1f} req/s "
+          f"({report['ok_per_second']:.1f} ok/s)")
+    print(f"status codes: {report['statuses']}")
+    print(f"latency ms: p50 {report['p50_ms']:.1f}  p95 {report['p95_ms']:.1f}  "
+          f"p99 {report['p99_ms']:.1f}  max {report['max_ms']:.1f}")
+    if report["server"]:
+        print(f"server: {report['server']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
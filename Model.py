@@ -1,16 +1,29 @@
-import cohere # Import cohere library for AI services
 from rich import print # Import rich library for enhanced terminal output
 from dotenv import dotenv_values # Import python-dotenv to manage environment variables
+import os
+import re
+import asyncio
+import threading
+from time import perf_counter
+from Backend.FastPath import FastPathClassifier
+from Backend.Cache import TTLCache, NormalizeText, Fingerprint
+from Backend.ContextWindow import PromptPrefix, PromptMeter
+from Backend.HttpClients import get_async_cohere_client # Pooled async Cohere client (one per event loop)
+from Backend.AsyncRuntime import RunSync
+from Backend.Tracing import Traced, CurrentSpan
 
 # --- Initialization ---
 # Load environment variables from .env file
 env_vars = dotenv_values(".env")
 
-# Retrieve API key from environment variables
-COHERE_API_KEY = env_vars.get("COHERE_API_KEY")
+# Decision cache settings (entries, seconds to live, keep across restarts)
+DMM_CACHE_SIZE = int(env_vars.get("DMM_CACHE_SIZE") or 512)
+DMM_CACHE_TTL = int(env_vars.get("DMM_CACHE_TTL") or 86400)
+DMM_CACHE_PERSIST = (env_vars.get("DMM_CACHE_PERSIST") or "True") == "True"
 
-# Create a Cohere client instance using the API key
-co = cohere.Client(api_key=COHERE_API_KEY)
+# Batch classification: queries packed into one model call, and model calls in flight at once
+DMM_BATCH_SIZE = int(env_vars.get("DMM_BATCH_SIZE") or 10)
+DMM_BATCH_CONCURRENCY = int(env_vars.get("DMM_BATCH_CONCURRENCY") or 4)
 
 # Define a list of recognized function keywords for task categorization. (FIXED COMMA)
 funcs = [
@@ -18,9 +31,6 @@ funcs = [
    "system", "content", "google search", "youtube search", "reminder"
 ]
 
-# Initialize an empty list to store user messages
-messages = []
-
 # --- Preamble (AI's Instructions) ---
 preamble = """
 You are a very accurate Decision-Making Model, which decides what kind of a query is given to you.
@@ -56,27 +66,114 @@ ChatHistory = [
     {"role": "User", "message": "chat with me."}, {"role": "Chatbot", "message": "general chat with me."}
 ]
 
+class DecisionPrompt:
+    """The preamble and few-shot history sent with every decision, prepared once per prompt version.
+
+    Any change to preamble, ChatHistory or funcs (including in-place edits) starts a new version;
+    until then the history copy and the measured prefixes are reused by every call. Callbacks in
+    on_change run (under the lock) whenever a new version is detected.
+    """
+
+    def __init__(self):
+        self._version = None
+        self._lock = threading.Lock()
+        self.on_change = []
+        self.meter = PromptMeter() # bytes/tokens per decision call: whole prompt vs. the query alone
+
+    def _current(self):
+        version = Fingerprint(preamble, ChatHistory, funcs) # content, so edits in place are seen too
+        with self._lock:
+            if version != self._version:
+                self._history = [dict(m) for m in ChatHistory]
+                self._prefixes = {}
+                if self._version is not None:
+                    for callback in self.on_change:
+                        callback()
+                self._version = version
+            return version, self._history, self._prefixes
+
+    def version(self):
+        return self._current()[0]
+
+    def history(self):
+        return self._current()[1]
+
+    def prefix(self, instructions=""):
+        """Preamble (+ extra instructions) and few-shot turns as a PromptPrefix."""
+        _, history, prefixes = self._current()
+        prefix = prefixes.get(instructions)
+        if prefix is None:
+            prefix = PromptPrefix([{"role": "system", "content": preamble + instructions}] +
+                                  [{"role": m["role"], "content": m["message"]} for m in history])
+            prefixes[instructions] = prefix # a dict store: safe without the lock, at worst built twice
+        return prefix
+
+decision_prompt = DecisionPrompt()
+
+# Local grammar that answers unambiguous commands without a Cohere round trip; rebuilt (keeping
+# its counters) whenever funcs or the few-shot history change
+fast_path = FastPathClassifier(funcs, ChatHistory)
+decision_prompt.on_change.append(lambda: fast_path.configure(funcs, ChatHistory))
+
+# Cache of previous decisions, keyed on the normalized query. It is versioned by a fingerprint
+# of the preamble, few-shot history and funcs so any prompt change invalidates old decisions.
+decision_cache = TTLCache(
+    max_entries=DMM_CACHE_SIZE,
+    ttl=DMM_CACHE_TTL,
+    path=os.path.join("Data", "DecisionCache.json") if DMM_CACHE_PERSIST else None,
+    version=decision_prompt.version()
+)
+
 # --- Main Decision Function ---
-def FirstLayerDMM(prompt: str = "test"):
-    # Add the user's query to the messages list (for general conversation history if needed later)
-    messages.append({"role": "user", "content": f"{prompt}"})
+def _LocalDecision(prompt):
+    """Answers from the fast path or the decision cache; None means the model has to decide."""
+    # Re-fingerprinted on every call so edits to the prompt take effect immediately
+    version = decision_prompt.version()
+    # Try the local fast path first; fall back to the remote model when it is not confident
+    fast_tasks = fast_path.classify(prompt)
+    if fast_tasks is not None:
+        CurrentSpan().set("source", "fast_path")
+        return fast_tasks
 
+    # Then the decision cache
+    decision_cache.set_version(version)
+    cached_tasks = decision_cache.get(NormalizeText(prompt))
+    if cached_tasks is not None:
+        CurrentSpan().set("source", "cache")
+        return list(cached_tasks)
+    return None
+
+async def _CohereText(message, instructions="", single_query=True):
+    """Streams one Cohere chat call and returns the generated text.
+
+    Only single-query calls feed the fast path's remote latency average: a packed batch takes
+    longer than one decision, which would inflate the time the fast path reports as saved.
+    """
+    remote_start = perf_counter()
+    # The static preamble + few-shot history is prepared once; only the message varies per call
+    prefix = decision_prompt.prefix(instructions)
+    decision_prompt.meter.record_messages(prefix, [{"role": "user", "content": message}])
     # Create a streaming chat session with the Cohere model.
-    Stream = co.chat_stream(
+    Stream = get_async_cohere_client().chat_stream(
         model="command-r-plus-08-2024", 
-        message=prompt,         
+        message=message,         
         temperature=0.7,        
-        chat_history=ChatHistory, 
+        chat_history=decision_prompt.history(), 
         prompt_truncation='OFF',  
         connectors = [],
-        preamble = preamble
+        preamble = prefix.messages[0]["content"]
     )
     
     response_text = ""
-    for event in Stream:
+    async for event in Stream:
         if event.event_type == "text-generation":
             response_text += event.text 
+    if single_query:
+        fast_path.record_remote(perf_counter() - remote_start)
+    return response_text
 
+def _FilterTasks(response_text):
+    """Splits a decision into tasks and keeps only those starting with a known function keyword."""
     # Clean the response and split multiple tasks
     response_text = response_text.replace("\n", " ")
     
@@ -93,9 +190,128 @@ def FirstLayerDMM(prompt: str = "test"):
                 filtered_tasks.append(task)
                 is_valid = True
                 break  # Stop checking this task once a keyword is found
+    return filtered_tasks
+
+async def _RemoteDecision(prompt):
+    """Asks the Cohere model to classify the query and caches the validated tasks."""
+    CurrentSpan().set("source", "remote")
+    filtered_tasks = _FilterTasks(await _CohereText(prompt))
+
+    if filtered_tasks:
+        decision_cache.put(NormalizeText(prompt), filtered_tasks)
         
     return filtered_tasks # Return the list of validated tasks
 
+@Traced("FirstLayerDMM")
+async def FirstLayerDMMAsync(prompt: str = "test"):
+    """Async variant of FirstLayerDMM(): many decisions can share one event loop without a thread each."""
+    tasks = _LocalDecision(prompt)
+    if tasks is not None:
+        return tasks
+    return await _RemoteDecision(prompt)
+
+@Traced("FirstLayerDMM")
+def FirstLayerDMM(prompt: str = "test"):
+    # Local answers stay on the calling thread; only the model call goes to the async runtime
+    tasks = _LocalDecision(prompt)
+    if tasks is not None:
+        return tasks
+    return RunSync(_RemoteDecision(prompt))
+
+# --- Batch Classification (bulk alert triage) ---
+
+BATCH_INSTRUCTIONS = """
+*** You may be given several numbered queries at once. Decide each one on its own and respond with exactly one line per query in the form '<number>: <decision>', in the same order, and nothing else. ***
+"""
+_BATCH_LINE = re.compile(r"^\s*(\d+)\s*[:.)-]\s*(.+?)\s*$")
+
+def PackQueries(queries):
+    """Formats several queries as one numbered message for a single model call."""
+    return "\n".join(f"{i + 1}. {' '.join(q.split())}" for i, q in enumerate(queries))
+
+def UnpackDecisions(response_text, count):
+    """Maps '<number>: <decision>' lines back to their queries; missing answers are None."""
+    decisions = [None] * count
+    for line in response_text.splitlines():
+        match = _BATCH_LINE.match(line)
+        if match and 1 <= int(match.group(1)) <= count:
+            decisions[int(match.group(1)) - 1] = _FilterTasks(match.group(2)) or None
+    return decisions
+
+@Traced("FirstLayerDMMBatch")
+async def FirstLayerDMMBatchAsync(prompts, batch_size=DMM_BATCH_SIZE, concurrency=DMM_BATCH_CONCURRENCY,
+                                  use_cache=True, stats=None):
+    """Classifies many queries and returns their task lists in input order.
+
+    Local decisions (fast path, cache) are answered first; the rest are de-duplicated, packed
+    batch_size per Cohere call and sent with at most `concurrency` calls in flight. Queries the
+    model skipped in a packed answer, or whose packed call failed, are retried one by one; a
+    query whose own call fails gets None instead of failing the whole run. Pass a dict as stats
+    for counters.
+    """
+    stats = {} if stats is None else stats
+    stats.update(queries=len(prompts), local=0, remote=0, model_calls=0, retried=0, batch_failures=0, failed=0)
+    results = [None] * len(prompts)
+    pending = {} # normalized query -> indexes waiting for its decision
+
+    decision_cache.set_version(decision_prompt.version()) # also rebuilds the fast path after prompt edits
+    for i, prompt in enumerate(prompts):
+        tasks = fast_path.classify(prompt)
+        if tasks is None and use_cache:
+            cached = decision_cache.get(NormalizeText(prompt))
+            tasks = list(cached) if cached is not None else None
+        if tasks is not None:
+            results[i] = tasks
+            stats["local"] += 1
+        else:
+            pending.setdefault(NormalizeText(prompt), []).append(i)
+
+    keys = list(pending)
+    stats["remote"] = len(keys)
+    limit = asyncio.Semaphore(max(concurrency, 1))
+
+    async def classify_one(key):
+        async with limit:
+            stats["model_calls"] += 1
+            try:
+                return _FilterTasks(await _CohereText(prompts[pending[key][0]]))
+            except Exception as e:
+                print(f"[ERROR] DMM decision failed for {prompts[pending[key][0]]!r}: {e}")
+                stats["failed"] += 1
+                return None
+
+    async def classify(batch):
+        decisions = [None] * len(batch)
+        if len(batch) > 1:
+            async with limit:
+                stats["model_calls"] += 1
+                try:
+                    text = await _CohereText(PackQueries([prompts[pending[k][0]] for k in batch]),
+                                             BATCH_INSTRUCTIONS, single_query=False)
+                    decisions = UnpackDecisions(text, len(batch))
+                except Exception as e:
+                    print(f"[ERROR] DMM batch of {len(batch)} failed, classifying one by one: {e}")
+                    stats["batch_failures"] += 1
+        for key, tasks in zip(batch, decisions):
+            if tasks is None: # single query, skipped or malformed in the packed answer, or failed batch
+                if len(batch) > 1:
+                    stats["retried"] += 1
+                tasks = await classify_one(key)
+                if tasks is None:
+                    continue # the call failed: leave None in the results and nothing in the cache
+            if tasks:
+                decision_cache.put(key, tasks)
+            for i in pending[key]:
+                results[i] = list(tasks)
+
+    size = max(batch_size, 1)
+    await asyncio.gather(*(classify(keys[i:i + size]) for i in range(0, len(keys), size)))
+    return results
+
+def FirstLayerDMMBatch(prompts, batch_size=DMM_BATCH_SIZE, concurrency=DMM_BATCH_CONCURRENCY, use_cache=True, stats=None):
+    """Sync wrapper around FirstLayerDMMBatchAsync()."""
+    return RunSync(FirstLayerDMMBatchAsync(prompts, batch_size, concurrency, use_cache, stats))
+
 # --- Main Execution Block (FIXED loop and print) ---
 if __name__ == "__main__":
     while True:
@@ -106,4 +322,7 @@ if __name__ == "__main__":
         
         # Execute the DMM and print the resulting list of tasks
         tasks_to_execute = FirstLayerDMM(user_input)
-        print(tasks_to_execute)
\ No newline at end of file
+        print(tasks_to_execute)
+        print(f"Fast path: {fast_path.stats()}")
+        print(f"Decision cache: {decision_cache.stats()}")
+        print(f"Prompt: {decision_prompt.meter.metrics()}")
\ No newline at end of file
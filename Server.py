@@ -0,0 +1,351 @@
+import os
+import re
+import sys
+import json
+import asyncio
+import argparse
+from time import perf_counter
+from collections import OrderedDict, deque
+from urllib.parse import urlsplit, parse_qs
+from dotenv import dotenv_values
+
+# --- Dynamically Adjust Import Path (this file runs as a standalone script) ---
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) # project root
+from Backend.ChatLogStore import ChatLogStore
+from Backend.ContextWindow import ContextBuilder
+from Backend.ContentStore import content_store
+from Backend.BackendRegistry import LazyBackend
+from Backend.Tracing import Trace, Percentile
+
+# Usage: python Backend/Server.py [--host 127.0.0.1] [--port 8765] [--automation]
+#
+#   POST /sessions/<id>/query   {"query": "..."}  -> decision, answers, automation and image jobs
+#   GET  /sessions/<id>/history?n=20               -> recent turns of that session
+#   GET  /images/<job id>                          -> image generation job status
+#   GET  /stats, GET /health                      -> server counters and latency, content cache stats
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+SERVER_HOST = env_vars.get("SERVER_HOST") or "127.0.0.1"
+SERVER_PORT = int(env_vars.get("SERVER_PORT") or 8765)
+SERVER_MAX_INFLIGHT = int(env_vars.get("SERVER_MAX_INFLIGHT") or 32) # queries processed at the same time
+SERVER_MAX_QUEUED = int(env_vars.get("SERVER_MAX_QUEUED") or 64) # queries waiting for a slot before 503s
+SESSION_CONCURRENCY = int(env_vars.get("SESSION_CONCURRENCY") or 1) # 1 keeps each session's turns in order
+SESSION_MAX_PENDING = int(env_vars.get("SESSION_MAX_PENDING") or 4) # per-session backlog before 429s
+SERVER_MAX_SESSIONS = int(env_vars.get("SERVER_MAX_SESSIONS") or 1000) # idle sessions kept in memory
+SERVER_AUTOMATION = (env_vars.get("SERVER_AUTOMATION") or "False") == "True" # let remote clients run automation on this host
+SESSIONS_DIR = os.path.join("Data", "Sessions")
+
+MAX_BODY_BYTES = 64 * 1024
+LATENCY_WINDOW = 1000
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+_STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                413: "Payload Too Large", 429: "Too Many Requests", 500: "Internal Server Error",
+                503: "Service Unavailable"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message, headers=None):
+        super().__init__(message)
+        self.status = status
+        self.headers = headers or {}
+
+
+# --- Sessions ---
+
+class Session:
+    """One analyst's conversation: its own chat log, context builders and concurrency limit."""
+
+    def __init__(self, session_id, directory=SESSIONS_DIR):
+        self.id = session_id
+        self.log = ChatLogStore(path=os.path.join(directory, f"{session_id}.jsonl"), legacy_path=None)
+        self.chat_context = ContextBuilder()
+        self.realtime_context = ContextBuilder()
+        self.slots = asyncio.Semaphore(SESSION_CONCURRENCY)
+        self.pending = 0
+        self.requests = 0
+
+class SessionManager:
+    """Creates sessions on first use and forgets the least recently used idle ones."""
+
+    def __init__(self, directory=SESSIONS_DIR, max_sessions=SERVER_MAX_SESSIONS):
+        self.directory = directory
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def get(self, session_id):
+        if not _SESSION_ID.match(session_id):
+            raise HTTPError(400, "session id must be 1-64 letters, digits, '-' or '_'")
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = Session(session_id, self.directory)
+            self._evict()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def _evict(self):
+        # The history stays on disk; an evicted session is reloaded from its file on the next query
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.max_sessions:
+                break
+            if self._sessions[session_id].pending == 0:
+                del self._sessions[session_id]
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+# --- Assistant Server ---
+
+class AssistantServer:
+    """Headless HTTP front end for the DMM -> Chatbot / realtime search / automation pipeline."""
+
+    def __init__(self, max_inflight=SERVER_MAX_INFLIGHT, max_queued=SERVER_MAX_QUEUED,
+                 automation=SERVER_AUTOMATION, sessions=None):
+        self.max_inflight = max_inflight
+        self.max_queued = max_queued
+        self.automation = automation
+        self.sessions = sessions or SessionManager()
+        self._slots = asyncio.Semaphore(max_inflight)
+        self._waiting = 0
+        self._inflight = 0
+        self._latencies = deque(maxlen=LATENCY_WINDOW)
+        self._counters = {"completed": 0, "failed": 0, "rejected_busy": 0, "rejected_session": 0}
+        # Heavy backends are imported on first use, like in the GUI. The LLM calls use the async
+        # variants, so every in-flight request shares this event loop instead of holding a thread.
+        self._dmm = LazyBackend("dmm", "Backend.Model", "FirstLayerDMMAsync")
+        self._chatbot = LazyBackend("chatbot", "Backend.Chatbot", "ChatbotAsync")
+        self._realtime = LazyBackend("realtime", "Backend.realtimeSearchEngine", "RealtimeSearchEngineAsync")
+        self._speculate = LazyBackend("speculate", "Backend.realtimeSearchEngine", "StartSpeculativeSearch")
+        self._automation = LazyBackend("automation", "Backend.Automation", "Automation")
+        self._images = LazyBackend("image", "Backend.ImageGeneration", "image_service")
+
+    async def _load(self, backend):
+        """Returns a lazy backend's function, importing it on a worker thread the first time."""
+        return backend.load() if backend.loaded else await asyncio.to_thread(backend.load)
+
+    # --- Pipeline ---
+
+    @staticmethod
+    async def _realtime_answer(realtime, session, text, speculation):
+        """A realtime answer that reuses the speculative search when it matches `text`."""
+        results = await speculation.claim_async(text) if speculation else None
+        return await realtime(text, store=session.log, builder=session.realtime_context, search_results=results)
+
+    async def answer(self, session, query):
+        """Classifies the query and runs its answer, automation and image tasks concurrently."""
+        with Trace("Server.query", session=session.id):
+            # Search the raw query while the DMM classifies it (no-op unless SPECULATIVE_SEARCH is on)
+            speculation = (await self._load(self._speculate))(query)
+            try:
+                return await self._answer(session, query, speculation)
+            finally:
+                if speculation is not None:
+                    speculation.discard()
+
+    async def _answer(self, session, query, speculation):
+        """Classification and the concurrent answer, automation and image jobs of one query."""
+        tasks = await (await self._load(self._dmm))(query)
+        result = {"session": session.id, "query": query, "tasks": tasks, "answers": [],
+                  "automation": None, "images": [], "exit": False}
+        jobs, automation_tasks = [], []
+
+        for task_str in tasks:
+            task_lower = task_str.lower().strip()
+            if task_lower.startswith("general"):
+                text = task_str.removeprefix("general").strip().strip('()')
+                chatbot = await self._load(self._chatbot)
+                jobs.append(("general", text, chatbot(text, store=session.log, builder=session.chat_context)))
+            elif task_lower.startswith("realtime"):
+                text = task_str.removeprefix("realtime").strip().strip('()')
+                realtime = await self._load(self._realtime)
+                jobs.append(("realtime", text, self._realtime_answer(realtime, session, text, speculation)))
+            elif task_lower.startswith("generate image"):
+                prompt = task_str.removeprefix("generate image").strip().strip('()')
+                service = await self._load(self._images)
+                result["images"].append(service.submit(prompt))
+            elif task_lower == "exit":
+                result["exit"] = True
+                break
+            else:
+                automation_tasks.append(task_str)
+
+        if automation_tasks and self.automation:
+            automation = await self._load(self._automation)
+            jobs.append(("automation", automation_tasks, automation(automation_tasks)))
+        elif automation_tasks:
+            result["automation"] = "disabled"
+
+        answers = await asyncio.gather(*(job for _, _, job in jobs), return_exceptions=True)
+        for (kind, text, _), answer in zip(jobs, answers):
+            if kind == "automation":
+                result["automation"] = ([r.to_dict() for r in answer] if not isinstance(answer, Exception)
+                                        else f"{type(answer).__name__}: {answer}")
+                continue
+            if isinstance(answer, Exception):
+                result["answers"].append({"kind": kind, "query": text, "error": f"{type(answer).__name__}: {answer}"})
+            else:
+                result["answers"].append({"kind": kind, "query": text, "text": answer})
+        return result
+
+    async def query(self, session_id, query):
+        """Admission control: per-session backlog first (429), then the global queue (503)."""
+        session = self.sessions.get(session_id)
+        if session.pending >= SESSION_MAX_PENDING:
+            self._counters["rejected_session"] += 1
+            raise HTTPError(429, "too many pending queries for this session", {"Retry-After": "1"})
+        if self._inflight >= self.max_inflight and self._waiting >= self.max_queued:
+            self._counters["rejected_busy"] += 1
+            raise HTTPError(503, "server busy", {"Retry-After": "1"})
+
+        session.pending += 1
+        start = perf_counter()
+        try:
+            async with session.slots:
+                self._waiting += 1
+                try:
+                    await self._slots.acquire()
+                finally:
+                    self._waiting -= 1
+                self._inflight += 1
+                try:
+                    result = await self.answer(session, query)
+                finally:
+                    self._inflight -= 1
+                    self._slots.release()
+        except Exception:
+            self._counters["failed"] += 1
+            raise
+        finally:
+            session.pending -= 1
+        session.requests += 1
+        self._counters["completed"] += 1
+        latency = (perf_counter() - start) * 1000
+        self._latencies.append(latency)
+        result["latency_ms"] = round(latency, 1)
+        return result
+
+    def stats(self):
+        latencies = list(self._latencies)
+        return dict(self._counters, inflight=self._inflight, waiting=self._waiting, sessions=len(self.sessions),
+                    p50_ms=Percentile(latencies, 50), p95_ms=Percentile(latencies, 95), p99_ms=Percentile(latencies, 99),
+                    content_cache=content_store.stats())
+
+    # --- HTTP ---
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+
+        if parts == ["health"]:
+            return {"status": "ok"}
+        if parts == ["stats"]:
+            return self.stats()
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "query":
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            try:
+                payload = json.loads(body or b"{}")
+            except ValueError:
+                raise HTTPError(400, "body must be JSON")
+            query = payload.get("query") if isinstance(payload, dict) else None
+            if not isinstance(query, str) or not query.strip():
+                raise HTTPError(400, "missing 'query'")
+            return await self.query(parts[1], query.strip())
+        if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "history":
+            n = parse_qs(url.query).get("n", ["20"])[0]
+            if not n.isdecimal():
+                raise HTTPError(400, "'n' must be a non-negative integer")
+            n = int(n)
+            session = self.sessions.get(parts[1])
+            return {"session": session.id, "turns": await asyncio.to_thread(session.log.tail, n)}
+        if len(parts) == 2 and parts[0] == "images":
+            service = await self._load(self._images)
+            status = service.status(parts[1])
+            if status is None:
+                raise HTTPError(404, "unknown image job")
+            return status
+        raise HTTPError(404, "not found")
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests (with keep-alive) on one connection."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "bad request line"}, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+                length = headers.get("content-length") or "0"
+                if not length.isdecimal():
+                    await self._respond(writer, 400, {"error": "bad Content-Length"}, close=True)
+                    break
+                length = int(length)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "body too large"}, close=True)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, payload, extra = 200, await self.route(method.upper(), target, body), {}
+                except HTTPError as e:
+                    status, payload, extra = e.status, {"error": str(e)}, e.headers
+                except Exception as e:
+                    print(f"[ERROR] Server request failed: {e}")
+                    status, payload, extra = 500, {"error": f"{type(e).__name__}: {e}"}, {}
+                await self._respond(writer, status, payload, extra, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, headers=None, close=False):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        head = [f"HTTP/1.1 {status} {_STATUS_TEXT.get(status, '')}", "Content-Type: application/json",
+                f"Content-Length: {len(body)}", f"Connection: {'close' if close else 'keep-alive'}"]
+        head += [f"{k}: {v}" for k, v in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    async def serve(self, host=SERVER_HOST, port=SERVER_PORT, ready=None):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_BODY_BYTES)
+        print(f"Assistant server listening on http://{host}:{server.sockets[0].getsockname()[1]}")
+        if ready:
+            ready(server)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless multi-session assistant server.")
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--automation", action="store_true", help="run automation tasks (open/close apps, system commands) on this host")
+    args = parser.parse_args(argv)
+
+    async def run():
+        await AssistantServer(automation=SERVER_AUTOMATION or args.automation).serve(args.host, args.port)
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
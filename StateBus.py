@@ -0,0 +1,298 @@
+import os
+import time
+import secrets
+import threading
+from multiprocessing.connection import Listener, Client
+from dotenv import dotenv_values
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+# Legacy .data files are still written (write-through) for anything that reads them directly
+STATE_MIRROR_DIR = env_vars.get("STATE_MIRROR_DIR") or os.path.join("Frontend", "Files")
+STATE_BUS_ADDRESS = ("127.0.0.1", int(env_vars.get("STATE_BUS_PORT") or 6010))
+# The bus exchanges pickles, so its authkey is a random secret per run, never a fixed string:
+# the server writes it to an owner-only file (or a child gets it through STATE_BUS_KEY as hex)
+STATE_BUS_KEY_FILE = os.path.join("Data", "StateBus.key")
+STATE_MIRROR_POLL = float(env_vars.get("STATE_MIRROR_POLL") or 0.25) # seconds between checks for outside writes
+# Only the frontend's mic toggle still writes its file directly; every other key goes through the bus
+STATE_WATCHED_KEYS = ("mic",)
+
+# Bus keys and the .data file each one mirrors
+STATE_FILES = {
+    "mic": "Mic.data",
+    "status": "Status.data",
+    "responses": "Responses.data",
+    "database": "Database.data",
+    "image_generation": "ImageGeneration.data",
+}
+
+
+class StateBus:
+    """In-process publish/subscribe store: readers block on changes instead of polling files.
+
+    Writes are mirrored (atomically) to the legacy .data files; watch_mirror() also ingests writes
+    other code makes to those files directly (the frontend's SetMic), so waiters see them too.
+    """
+
+    def __init__(self, mirror_dir=STATE_MIRROR_DIR):
+        self.mirror_dir = mirror_dir
+        self._values = {}
+        self._versions = {}
+        self._subscribers = {} # key (or "*" for every key) -> list of callbacks(key, value)
+        self._cond = threading.Condition()
+        self._mirror_lock = threading.RLock() # orders bus writes and watcher reads of the .data files
+        self._stamps = {} # path -> (mtime_ns, size) last written or read, so those files are not re-read
+        self._watcher = None
+        self._load_mirror()
+
+    def _load_mirror(self):
+        """Seeds the bus from existing .data files once, at startup."""
+        if not self.mirror_dir:
+            return
+        for key, filename in STATE_FILES.items():
+            try:
+                with open(os.path.join(self.mirror_dir, filename), "r", encoding="utf-8") as f:
+                    self._values[key] = f.read()
+            except OSError:
+                pass
+
+    def _write_mirror(self, key, value):
+        """Caller holds the mirror lock. Replaces the file whole, so readers never see it half-written."""
+        if not self.mirror_dir or key not in STATE_FILES:
+            return
+        path = os.path.join(self.mirror_dir, STATE_FILES[key])
+        try:
+            os.makedirs(self.mirror_dir, exist_ok=True)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp_path, path)
+            stat = os.stat(path)
+            self._stamps[path] = (stat.st_mtime_ns, stat.st_size) # the watcher skips our own write
+        except OSError as e:
+            print(f"[Warning] Could not mirror '{key}' to disk: {e}")
+
+    def _poll_mirror(self, keys=STATE_WATCHED_KEYS):
+        """Applies watched .data files that changed since the bus last wrote or read them."""
+        mirror_dir = self.mirror_dir
+        if not mirror_dir:
+            return
+        for key in keys:
+            path = os.path.join(mirror_dir, STATE_FILES[key])
+            with self._mirror_lock:
+                try:
+                    stat = os.stat(path)
+                    stamp = (stat.st_mtime_ns, stat.st_size)
+                    if self._stamps.get(path) == stamp:
+                        continue
+                    with open(path, "r", encoding="utf-8") as f:
+                        value = f.read()
+                except OSError:
+                    continue
+                self._stamps[path] = stamp
+                if value != self.get(key, None):
+                    self._apply(key, value)
+
+    def _watch_loop(self, interval):
+        while True:
+            self._poll_mirror()
+            time.sleep(interval)
+
+    def watch_mirror(self, interval=STATE_MIRROR_POLL):
+        """Starts (once) a background thread that ingests outside writes to the watched .data files.
+
+        Only for writers that cannot use the bus (the frontend); it costs one stat() per watched
+        file per interval and nothing else while idle.
+        """
+        with self._cond:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch_loop, args=(interval,), daemon=True, name="state-mirror-watch")
+        self._watcher.start()
+
+    def _apply(self, key, value):
+        """Stores a value, wakes blocked waiters and notifies subscribers."""
+        with self._cond:
+            self._values[key] = value
+            self._versions[key] = self._versions.get(key, 0) + 1
+            self._cond.notify_all()
+            callbacks = list(self._subscribers.get(key, ())) + list(self._subscribers.get("*", ()))
+        for callback in callbacks:
+            try:
+                callback(key, value)
+            except Exception as e:
+                print(f"[ERROR] State bus subscriber failed for '{key}': {e}")
+
+    # --- Public API ---
+
+    def set(self, key, value):
+        with self._mirror_lock: # the watcher never sees the file lag behind the value
+            self._apply(key, value)
+            self._write_mirror(key, value)
+
+    def get(self, key, default=""):
+        with self._cond:
+            return self._values.get(key, default)
+
+    def version(self, key):
+        with self._cond:
+            return self._versions.get(key, 0)
+
+    def snapshot(self):
+        with self._cond:
+            return dict(self._values)
+
+    def wait_for(self, key, predicate, timeout=None, default=""):
+        """Blocks until predicate(value) is true; returns the value (or None on timeout)."""
+        with self._cond:
+            if self._cond.wait_for(lambda: predicate(self._values.get(key, default)), timeout):
+                return self._values.get(key, default)
+            return None
+
+    def wait_change(self, key, since_version, timeout=None):
+        """Blocks until the key changes after since_version; returns (version, value)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._versions.get(key, 0) > since_version, timeout)
+            return self._versions.get(key, 0), self._values.get(key, "")
+
+    def subscribe(self, key, callback):
+        """Calls callback(key, value) on every change of key ("*" for all keys); returns an unsubscribe function."""
+        with self._cond:
+            self._subscribers.setdefault(key, []).append(callback)
+        def unsubscribe():
+            with self._cond:
+                if callback in self._subscribers.get(key, []):
+                    self._subscribers[key].remove(callback)
+        return unsubscribe
+
+
+# --- Cross-Process Bridge ---
+
+def NewBusKey(path=STATE_BUS_KEY_FILE):
+    """Generates this run's authkey and stores it where only the current user can read it."""
+    key = secrets.token_bytes(32)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    os.replace(tmp_path, path)
+    return key
+
+def ReadBusKey(path=STATE_BUS_KEY_FILE):
+    """The running server's authkey: from the STATE_BUS_KEY environment variable (hex) or its key file."""
+    if os.environ.get("STATE_BUS_KEY"):
+        return bytes.fromhex(os.environ["STATE_BUS_KEY"])
+    with open(path, "rb") as f:
+        return f.read()
+
+class StateBusServer:
+    """Shares a StateBus with other processes over a local socket (multiprocessing.connection)."""
+
+    def __init__(self, bus, address=STATE_BUS_ADDRESS, authkey=None):
+        self.bus = bus
+        self.authkey = authkey or NewBusKey()
+        self.listener = Listener(address, authkey=self.authkey)
+        self._connections = []
+        self._lock = threading.Lock()
+        bus.subscribe("*", self._broadcast)
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _broadcast(self, key, value):
+        with self._lock:
+            for conn in list(self._connections):
+                try:
+                    conn.send(("update", key, value))
+                except (OSError, EOFError):
+                    self._connections.remove(conn)
+
+    def _accept_loop(self):
+        while True:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError):
+                break
+            with self._lock:
+                conn.send(("state", self.bus.snapshot()))
+                self._connections.append(conn)
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+    def _client_loop(self, conn):
+        while True:
+            try:
+                message = conn.recv()
+            except (OSError, EOFError):
+                break
+            if message[0] == "set":
+                self.bus.set(message[1], message[2])
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+
+    def close(self):
+        self.listener.close()
+
+
+class RemoteStateBus(StateBus):
+    """StateBus replica in another process: writes go to the server, updates are pushed back."""
+
+    def __init__(self, address=STATE_BUS_ADDRESS, authkey=None):
+        super().__init__(mirror_dir=None)
+        self._conn = Client(address, authkey=authkey or ReadBusKey())
+        self._send_lock = threading.Lock()
+        kind, state = self._conn.recv()
+        with self._cond:
+            self._values.update(state)
+        threading.Thread(target=self._receive_loop, daemon=True).start()
+
+    def _receive_loop(self):
+        while True:
+            try:
+                kind, key, value = self._conn.recv()
+            except (OSError, EOFError):
+                break
+            self._apply(key, value)
+
+    def set(self, key, value):
+        with self._send_lock:
+            self._conn.send(("set", key, value))
+
+
+# Shared in-process bus
+state_bus = StateBus()
+_server = None
+
+def StartStateBusServer():
+    """Exposes state_bus to other local processes (e.g. Backend/ImageGeneration.py)."""
+    global _server
+    if _server is None:
+        try:
+            _server = StateBusServer(state_bus)
+        except OSError as e:
+            print(f"[Warning] State bus server not started: {e}")
+    return _server
+
+
+# --- Status Helpers (same semantics as the old .data files) ---
+
+def SetMicrophoneStatus(Command):
+    state_bus.set("mic", Command)
+
+def GetMicrophoneStatus():
+    return state_bus.get("mic")
+
+def SetAssistantStatus(Status):
+    state_bus.set("status", Status)
+
+def GetAssistantStatus():
+    return state_bus.get("status")
+
+def ShowTextToScreen(Text):
+    state_bus.set("responses", Text)
+
+def WaitForMicrophone(timeout=None):
+    """Blocks until the microphone is switched on."""
+    return state_bus.wait_for("mic", lambda v: v == "True", timeout)
@@ -0,0 +1,133 @@
+import re
+import queue
+import threading
+from time import perf_counter
+
+# A sentence ends at . ! ? or a newline, followed by whitespace
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+MIN_SENTENCE_CHARS = 20 # avoid speaking tiny fragments like "Dr." or "1." on their own
+
+
+# --- Sentence Splitting ---
+
+class SentenceBuffer:
+    """Accumulates streamed chunks and releases complete sentences for text-to-speech."""
+
+    def __init__(self, min_chars=MIN_SENTENCE_CHARS):
+        self.min_chars = min_chars
+        self._buffer = ""
+
+    def feed(self, chunk):
+        """Adds a chunk and returns any sentences that are now complete."""
+        self._buffer += chunk
+        sentences = []
+        start = 0
+        for match in _SENTENCE_END.finditer(self._buffer):
+            candidate = self._buffer[start:match.start()].strip()
+            if len(candidate) >= self.min_chars:
+                sentences.append(candidate)
+                start = match.end()
+        self._buffer = self._buffer[start:]
+        return sentences
+
+    def flush(self):
+        """Returns whatever is left once the stream has finished."""
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+
+# --- Time-to-First-Token Metrics ---
+
+class StreamMetrics:
+    """Collects time-to-first-token and total generation time per stream name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._streams = {}
+
+    def record(self, name, ttft, total, chunks):
+        with self._lock:
+            s = self._streams.setdefault(name, {"count": 0, "ttft_total": 0.0, "total": 0.0, "chunks": 0, "last_ttft": 0.0})
+            s["count"] += 1
+            s["ttft_total"] += ttft
+            s["total"] += total
+            s["chunks"] += chunks
+            s["last_ttft"] = ttft
+
+    def stats(self):
+        """Returns average time-to-first-token and generation time (ms) per stream name."""
+        with self._lock:
+            return {
+                name: {
+                    "count": s["count"],
+                    "avg_ttft_ms": s["ttft_total"] * 1000 / s["count"],
+                    "avg_total_ms": s["total"] * 1000 / s["count"],
+                    "last_ttft_ms": s["last_ttft"] * 1000,
+                    "avg_chunks": s["chunks"] / s["count"],
+                }
+                for name, s in self._streams.items() if s["count"]
+            }
+
+stream_metrics = StreamMetrics()
+
+def TimedStream(name, chunks):
+    """Wraps a chunk generator and records its time-to-first-token in stream_metrics."""
+    start = perf_counter()
+    ttft = None
+    count = 0
+    try:
+        for chunk in chunks:
+            if ttft is None:
+                ttft = perf_counter() - start
+            count += 1
+            yield chunk
+    finally:
+        total = perf_counter() - start
+        stream_metrics.record(name, total if ttft is None else ttft, total, count)
+
+async def TimedAsyncStream(name, chunks):
+    """Async counterpart of TimedStream for chunks from the async SDK clients."""
+    start = perf_counter()
+    ttft = None
+    count = 0
+    try:
+        async for chunk in chunks:
+            if ttft is None:
+                ttft = perf_counter() - start
+            count += 1
+            yield chunk
+    finally:
+        total = perf_counter() - start
+        stream_metrics.record(name, total if ttft is None else ttft, total, count)
+
+
+# --- Sentence-by-Sentence Speech ---
+
+class SentenceSpeaker:
+    """Speaks queued sentences one after another on a background thread."""
+
+    def __init__(self, speak, is_running=lambda: True):
+        self.speak = speak # e.g. manageTTS(text, func)
+        self.is_running = is_running
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            sentence = self._queue.get()
+            if sentence is None:
+                break
+            if not self.is_running():
+                continue # drain the queue without speaking once the worker was stopped
+            try:
+                self.speak(sentence, lambda r=None: self.is_running())
+            except Exception as e:
+                print(f"[ERROR] TTS failed: {e}")
+
+    def say(self, sentence):
+        self._queue.put(sentence)
+
+    def close(self):
+        """Finishes speaking the queued sentences and stops the thread."""
+        self._queue.put(None)
@@ -0,0 +1,93 @@
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import dotenv_values
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+# Maximum number of tasks of each kind running at the same time
+# (image jobs are not scheduled here: ImageGenerationService queues them and bounds its own parallelism)
+BACKEND_CONCURRENCY = {
+    "general": int(env_vars.get("GENERAL_CONCURRENCY") or 2),
+    "realtime": int(env_vars.get("REALTIME_CONCURRENCY") or 2),
+    "automation": int(env_vars.get("AUTOMATION_CONCURRENCY") or 1),
+}
+
+
+class TaskScheduler:
+    """Runs independent tasks concurrently on one bounded thread pool per backend kind."""
+
+    def __init__(self, concurrency=None):
+        self.concurrency = dict(BACKEND_CONCURRENCY if concurrency is None else concurrency)
+        self._executors = {}
+        self._lock = threading.Lock()
+
+    def _executor(self, kind):
+        with self._lock:
+            if kind not in self._executors:
+                self._executors[kind] = ThreadPoolExecutor(
+                    max_workers=max(self.concurrency.get(kind, 1), 1), thread_name_prefix=f"task-{kind}")
+            return self._executors[kind]
+
+    def submit(self, kind, fn, *args, **kwargs):
+        # Run in a copy of the caller's context so tracing spans nest under the submitting task
+        context = contextvars.copy_context()
+        return self._executor(kind).submit(context.run, fn, *args, **kwargs)
+
+    def run_all(self, jobs):
+        """Runs (kind, fn) jobs concurrently and returns (result, exception) pairs in job order."""
+        futures = [self.submit(kind, fn) for kind, fn in jobs]
+        outcomes = []
+        for future in futures:
+            try:
+                outcomes.append((future.result(), None))
+            except Exception as e:
+                outcomes.append((None, e))
+        return outcomes
+
+    def shutdown(self):
+        with self._lock:
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)
+            self._executors.clear()
+
+
+class OrderedOutput:
+    """Forwards chunks produced by concurrent tasks to a sink in task order.
+
+    The earliest unfinished task streams live; later tasks are buffered until
+    every task before them has finished, so answers never interleave.
+    """
+
+    def __init__(self, count, sink, on_slot_done=None):
+        self.sink = sink
+        self.on_slot_done = on_slot_done
+        self._buffers = [[] for _ in range(count)]
+        self._done = [False] * count
+        self._current = 0
+        self._lock = threading.Lock()
+
+    def emit(self, index, chunk):
+        with self._lock:
+            if index == self._current:
+                self.sink(index, chunk)
+            else:
+                self._buffers[index].append(chunk)
+
+    def close(self, index):
+        """Marks a task as finished and flushes any buffered output that is now next in line."""
+        with self._lock:
+            self._done[index] = True
+            while self._current < len(self._done) and self._done[self._current]:
+                if self.on_slot_done:
+                    self.on_slot_done(self._current)
+                self._current += 1
+                if self._current < len(self._buffers):
+                    for chunk in self._buffers[self._current]:
+                        self.sink(self._current, chunk)
+                    self._buffers[self._current] = []
+
+
+# Shared scheduler used by the GUI worker threads
+scheduler = TaskScheduler()
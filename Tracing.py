@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import math
+import uuid
+import atexit
+import inspect
+import threading
+import functools
+import contextvars
+from time import time, perf_counter, sleep
+from collections import deque
+from dotenv import dotenv_values
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+TRACING = (env_vars.get("TRACING") or "True") == "True"
+TRACE_FILE = env_vars.get("TRACE_FILE") or os.path.join("Data", "Traces.jsonl")
+TRACE_FILE_BYTES = int(env_vars.get("TRACE_FILE_BYTES") or 10 * 1024 * 1024) # then rotated to <file>.1
+TRACE_FLUSH_INTERVAL = 1.0 # seconds between background writes of finished spans
+TRACE_QUEUE = 10000 # finished spans waiting to be written; the oldest are dropped beyond this
+TRACE_WINDOW = 1000 # recent durations kept in memory per span name for the live summary
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed stage of a turn; spans started inside it become its children."""
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time()
+        self._start = perf_counter()
+        self.duration_ms = None
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = (perf_counter() - self._start) * 1000
+            tracer.export(self)
+
+    def to_dict(self):
+        return {
+            "name": self.name, "trace_id": self.trace_id, "span_id": self.span_id, "parent_id": self.parent_id,
+            "start": self.start_time, "duration_ms": self.duration_ms, "attributes": self.attributes, "error": self.error,
+        }
+
+class _NoSpan:
+    """Returned by CurrentSpan() outside of any span, so callers can always call .set()."""
+    def set(self, key, value):
+        pass
+
+
+class Tracer:
+    """Exports finished spans to a size-capped JSON-lines file and keeps recent durations for summaries.
+
+    export() only queues the span; a background thread writes the queue in batches, and rotates
+    the file to <file>.1 before it would grow past max_bytes (so at most twice that is kept).
+    """
+
+    def __init__(self, path=TRACE_FILE, enabled=TRACING, max_bytes=TRACE_FILE_BYTES):
+        self.path = path
+        self.enabled = enabled
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock() # one batch written at a time (writer thread or flush at exit)
+        self._durations = {}
+        self._pending = deque(maxlen=TRACE_QUEUE)
+        self._dropped = 0
+        self._writer = None
+
+    def export(self, span):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._durations.setdefault(span.name, deque(maxlen=TRACE_WINDOW)).append(span.duration_ms)
+            if self.path:
+                if len(self._pending) == self._pending.maxlen:
+                    self._dropped += 1
+                self._pending.append(span.to_dict())
+                if self._writer is None:
+                    self._writer = threading.Thread(target=self._write_loop, daemon=True, name="trace-writer")
+                    self._writer.start()
+                    atexit.register(self.flush)
+
+    # --- Export File ---
+
+    def _write_loop(self):
+        while True:
+            sleep(TRACE_FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[Tracing] Could not write traces: {e}")
+
+    def flush(self):
+        """Writes the queued spans now (also called at exit)."""
+        with self._write_lock:
+            with self._lock:
+                records = list(self._pending)
+                self._pending.clear()
+            if not records or not self.path:
+                return
+            lines = [(json.dumps(r, default=str) + "\n").encode("utf-8") for r in records]
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            try:
+                size = os.path.getsize(self.path)
+            except OSError:
+                size = 0
+            start = 0
+            while start < len(lines):
+                if size and size + len(lines[start]) > self.max_bytes:
+                    os.replace(self.path, self.path + ".1")
+                    size = 0
+                stop = start
+                while stop < len(lines) and (stop == start or size + len(lines[stop]) <= self.max_bytes):
+                    size += len(lines[stop])
+                    stop += 1
+                with open(self.path, "ab") as f:
+                    f.write(b"".join(lines[start:stop]))
+                start = stop
+
+    def durations(self):
+        with self._lock:
+            return {name: list(values) for name, values in self._durations.items()}
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "dropped": self._dropped}
+
+    def reset(self):
+        """Forgets the in-memory durations (the exported file is left untouched)."""
+        with self._lock:
+            self._durations.clear()
+
+tracer = Tracer()
+
+
+# --- Instrumentation API ---
+
+class Trace:
+    """Context manager that times a block as a span nested under the current span."""
+
+    def __init__(self, name, **attributes):
+        self.span = Span(name, _current_span.get(), attributes)
+        self._token = None
+
+    def __enter__(self):
+        self._token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.error = f"{exc_type.__name__}: {exc}"
+        _current_span.reset(self._token)
+        self.span.end()
+        return False
+
+def CurrentSpan():
+    """The innermost active span (or a no-op stand-in), for adding attributes."""
+    return _current_span.get() or _NoSpan()
+
+def Traced(name=None):
+    """Decorator that records every call of a function, coroutine or (async) generator as a span."""
+    def decorator(fn):
+        span_name = name or fn.__name__
+
+        if inspect.isgeneratorfunction(fn):
+            @functools.wraps(fn)
+            def generator_wrapper(*args, **kwargs):
+                span = Span(span_name, _current_span.get())
+                gen = fn(*args, **kwargs)
+                try:
+                    while True:
+                        # The span is only "current" while the generator body runs, not between yields
+                        token = _current_span.set(span)
+                        try:
+                            item = next(gen)
+                        except StopIteration:
+                            break
+                        finally:
+                            _current_span.reset(token)
+                        yield item
+                except Exception as e:
+                    span.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    gen.close()
+                    span.end()
+            return generator_wrapper
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def async_generator_wrapper(*args, **kwargs):
+                span = Span(span_name, _current_span.get())
+                agen = fn(*args, **kwargs)
+                try:
+                    while True:
+                        token = _current_span.set(span)
+                        try:
+                            item = await agen.__anext__()
+                        except StopAsyncIteration:
+                            break
+                        finally:
+                            _current_span.reset(token)
+                        yield item
+                except Exception as e:
+                    span.error = f"{type(e).__name__}: {e}"
+                    raise
+                finally:
+                    await agen.aclose()
+                    span.end()
+            return async_generator_wrapper
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def coroutine_wrapper(*args, **kwargs):
+                with Trace(span_name):
+                    return await fn(*args, **kwargs)
+            return coroutine_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with Trace(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- Summaries ---
+
+def Percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(math.ceil(pct * len(ordered) / 100) - 1, 0) # multiply first: 7 / 100 * 100 is 7.000000000000001
+    return ordered[min(rank, len(ordered) - 1)]
+
+def LoadDurations(path=TRACE_FILE):
+    """Reads span durations per stage from an exported JSON-lines trace file."""
+    durations = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("duration_ms") is not None:
+                durations.setdefault(record["name"], []).append(record["duration_ms"])
+    return durations
+
+def SummaryTable(durations=None):
+    """Formats count, mean and p50/p95/p99 latency (ms) per stage."""
+    durations = tracer.durations() if durations is None else durations
+    header = f"{'stage':<28}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}"
+    lines = [header, "-" * len(header)]
+    for name in sorted(durations):
+        values = durations[name]
+        if not values:
+            continue
+        lines.append(f"{name:<28}{len(values):>8}{sum(values) / len(values):>10.1f}"
+                     f"{Percentile(values, 50):>10.1f}{Percentile(values, 95):>10.1f}{Percentile(values, 99):>10.1f}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    # Usage: python Backend/Tracing.py [trace file]
+    print(SummaryTable(LoadDurations(sys.argv[1] if len(sys.argv) > 1 else TRACE_FILE)))
@@ -0,0 +1,115 @@
+from collections import deque
+from dotenv import dotenv_values
+from Backend.ChatLogStore import chat_log
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+TRANSCRIPT_WINDOW = int(env_vars.get("TRANSCRIPT_WINDOW") or 200) # turns rendered at once
+TRANSCRIPT_PAGE = int(env_vars.get("TRANSCRIPT_PAGE") or 50) # turns paged in or out when scrolling
+
+
+class TranscriptTail:
+    """Formatted text of the last `window` turns of a chat log, formatting only turns added since the last update."""
+
+    def __init__(self, format_turn, store=None, window=TRANSCRIPT_WINDOW):
+        self.store = chat_log if store is None else store
+        self.format_turn = format_turn # entry -> line of text, or None to hide the turn
+        self._lines = deque(maxlen=window)
+        self._seen = 0
+
+    def update(self):
+        """Formats new turns; returns True when the text changed."""
+        count = len(self.store)
+        if count == self._seen:
+            return False
+        start = max(self._seen, count - self._lines.maxlen) # turns that would scroll out are never formatted
+        for entry in self.store.window(start, count):
+            line = self.format_turn(entry)
+            if line is not None:
+                self._lines.append(line)
+        self._seen = count
+        return True
+
+    def text(self):
+        return "\n".join(self._lines)
+
+
+class Transcript:
+    """A conversation as one indexable sequence of (role, content) messages.
+
+    Turns logged before the transcript was opened stay on disk and are read from the chat log
+    only when asked for; messages added afterwards are kept in memory.
+    """
+
+    def __init__(self, store=None):
+        self.store = chat_log if store is None else store
+        self.history = len(self.store) # turns on disk when the transcript was opened
+        self._messages = []
+
+    def __len__(self):
+        return self.history + len(self._messages)
+
+    def append(self, role, content):
+        self._messages.append([role, content])
+
+    def extend_last(self, text):
+        """Adds streamed text to the newest message."""
+        self._messages[-1][1] += text
+
+    def items(self, start, stop):
+        """Messages [start, stop) as (role, content) pairs."""
+        start, stop = max(start, 0), min(stop, len(self))
+        items = []
+        if start < self.history:
+            entries = self.store.window(start, min(stop, self.history))
+            items.extend((entry.get("role", ""), entry.get("content", "")) for entry in entries)
+        if stop > self.history:
+            items.extend((role, content) for role, content in self._messages[max(start - self.history, 0):stop - self.history])
+        return items
+
+
+class TranscriptWindow:
+    """Which slice of a Transcript is rendered: at most `size` messages, moved by `page` at a time."""
+
+    def __init__(self, transcript, size=TRANSCRIPT_WINDOW, page=TRANSCRIPT_PAGE):
+        self.transcript = transcript
+        self.size = size
+        self.page = page
+        self.stop = len(transcript)
+        self.start = max(self.stop - size, 0)
+
+    @property
+    def at_end(self):
+        return self.stop >= len(self.transcript)
+
+    def follow(self):
+        """After a message was appended while showing the end: extends the window.
+
+        Returns True when the window outgrew its size by a page and was trimmed, i.e. the view
+        must be rendered again (trimming a page at a time keeps re-renders rare).
+        """
+        self.stop = len(self.transcript)
+        if self.stop - self.start > self.size + self.page:
+            self.start = self.stop - self.size
+            return True
+        return False
+
+    def older(self):
+        """Moves the window up a page; returns False when already at the first message."""
+        if self.start == 0:
+            return False
+        self.start = max(self.start - self.page, 0)
+        self.stop = min(self.start + self.size + self.page, len(self.transcript))
+        return True
+
+    def newer(self):
+        """Moves the window down a page; returns False when already at the newest message."""
+        if self.at_end:
+            return False
+        self.stop = min(self.stop + self.page, len(self.transcript))
+        self.start = max(self.stop - self.size - self.page, 0)
+        return True
+
+    def items(self):
+        return self.transcript.items(self.start, self.stop)
@@ -0,0 +1,102 @@
+import os
+import contextvars
+from time import sleep
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import dotenv_values
+from Backend.Cache import TTLCache, NormalizeText
+
+# --- Configuration ---
+env_vars = dotenv_values(".env")
+
+SEARCH_NUM_RESULTS = int(env_vars.get("SEARCH_NUM_RESULTS") or 5)
+SEARCH_CACHE_SIZE = int(env_vars.get("SEARCH_CACHE_SIZE") or 256)
+SEARCH_CACHE_TTL = int(env_vars.get("SEARCH_CACHE_TTL") or 600) # how long results count as fresh
+SEARCH_CACHE_PERSIST = (env_vars.get("SEARCH_CACHE_PERSIST") or "False") == "True"
+SEARCH_WORKERS = int(env_vars.get("SEARCH_WORKERS") or 4)
+
+SearchResult = namedtuple("SearchResult", ["title", "description", "url"])
+
+
+# --- Search Backends ---
+
+class SearchBackend:
+    """Interface for search providers: return a list of SearchResult for a query."""
+    name = "base"
+
+    def search(self, query, num_results):
+        raise NotImplementedError
+
+class GoogleSearchBackend(SearchBackend):
+    """Google results via the googlesearch-python package."""
+    name = "google"
+
+    def search(self, query, num_results):
+        from googlesearch import search
+        return [SearchResult(r.title, r.description, r.url) for r in search(query, advanced=True, num_results=num_results)]
+
+class StaticSearchBackend(SearchBackend):
+    """Local fake provider returning canned results, optionally with simulated latency."""
+    name = "static"
+
+    def __init__(self, results=None, latency=0.0):
+        self.results = results or {}
+        self.latency = latency
+        self.calls = 0
+
+    def search(self, query, num_results):
+        self.calls += 1
+        if self.latency:
+            sleep(self.latency)
+        canned = self.results.get(query)
+        if canned is None:
+            canned = [SearchResult(f"Result {i + 1} for {query}", f"Description of result {i + 1} for {query}.",
+                                   f"https://example.com/{i + 1}") for i in range(num_results)]
+        return list(canned)[:num_results]
+
+
+# --- Cached Search Service ---
+
+class SearchService:
+    """Caches search results by normalized query and fetches several queries concurrently."""
+
+    def __init__(self, backend=None, num_results=SEARCH_NUM_RESULTS, cache_size=SEARCH_CACHE_SIZE,
+                 ttl=SEARCH_CACHE_TTL, persist=SEARCH_CACHE_PERSIST, workers=SEARCH_WORKERS):
+        self.backend = backend or GoogleSearchBackend()
+        self.num_results = num_results
+        self.cache = TTLCache(
+            max_entries=cache_size,
+            ttl=ttl,
+            path=os.path.join("Data", "SearchCache.json") if persist else None,
+            version=f"{self.backend.name}:{num_results}"
+        )
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+
+    def search(self, query):
+        """Returns results for a query, from the cache while they are still fresh."""
+        key = NormalizeText(query)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return [SearchResult(*r) for r in cached]
+        results = self.backend.search(query, self.num_results)
+        self.cache.put(key, [list(r) for r in results])
+        return results
+
+    def submit(self, query):
+        """Starts a search in the background and returns its concurrent.futures.Future."""
+        return self._executor.submit(contextvars.copy_context().run, self.search, query)
+
+    def search_many(self, queries):
+        """Runs several searches concurrently and returns their results in input order."""
+        if len(queries) <= 1:
+            return [self.search(q) for q in queries]
+        # Each search runs in a copy of the caller's context so tracing spans keep their parent
+        futures = [self.submit(q) for q in queries]
+        return [f.result() for f in futures]
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# Shared service used by the realtime search engine
+search_service = SearchService()
@@ -1,75 +1,67 @@
 from Frontend.GUI import (
     GraphicalUserInterface, 
-    SetAssistantStatus, 
-    ShowTextToScreen, 
     TempDirectoryPath, 
-    SetMic, 
     AnswerModifier, 
-    QueryModifier, 
-    GetMicrophoneStatus, 
-    GetAssistantStatus,
-    SetMicrophoneStatus
+    QueryModifier
 )
 from Backend.Model import FirstLayerDMM
-from Backend.realtimeSearchEngine import RealtimeSearchEngine
+from Backend.realtimeSearchEngine import RealtimeSearchEngine, StartSpeculativeSearch
 from Backend.Automation import Automation
 from Backend.Chatbot import Chatbot
 from Backend.SpeechTotext import SpeechRecognition
 from Backend.TexTtoSpeech import TextToSpeech
+from Backend.ChatLogStore import chat_log
+from Backend.Transcript import TranscriptTail
+from Backend.ImageGeneration import generate_image_task
+from Backend.AsyncRuntime import RunSync
+from Backend.StateBus import (
+    state_bus,
+    StartStateBusServer,
+    SetAssistantStatus,
+    ShowTextToScreen,
+    GetMicrophoneStatus,
+    GetAssistantStatus,
+    SetMicrophoneStatus,
+    WaitForMicrophone
+)
 from dotenv import dotenv_values
-from asyncio import run
-from time import sleep
-import subprocess
 import threading
-import json
 import os
 
 env_vars = dotenv_values(".env")
 Username = env_vars.get("Username")
 AssistantName = env_vars.get("AssistantName")
 DefaultMessage = f"AssistantName : Hello {Username}, I am {AssistantName}. How are you?"
-subprocesses = []
+state_bus.mirror_dir = TempDirectoryPath # keep the .data files in sync for the GUI
+state_bus.watch_mirror() # ...and pick up what the GUI writes to them directly (its mic toggle)
 Functions = ["open", "close", "play", "system", "content", "google search", "youtube search"]
 
 def ShowDefaultChatIfNoChat():
-    file = open("Data/ChatLog.json", "r", encoding='utf-8')
-    if len(file.read()) == 0:
-        with open(rf"{TempDirectoryPath}/Database.data", "w", encoding='utf-8') as file:
-            file.write("")
-        with open(rf"{TempDirectoryPath}/Responses.data", "w", encoding='utf-8') as file:
-            file.write(DefaultMessage)
-
-def ReadChatLogJson():
-    with open(rf"Data/ChatLog.json", "r", encoding='utf-8') as file:
-        chatlog_data = json.load(file)
-        return chatlog_data
+    if len(chat_log) == 0:
+        state_bus.set("database", "")
+        state_bus.set("responses", DefaultMessage)
+
+def FormatTurn(entry):
+    if entry["role"] == "user":
+        return AnswerModifier(f"{Username} : {entry['content']}")
+    elif entry["role"] == "assistant":
+        return AnswerModifier(f"{AssistantName} : {entry['content']}")
+    return None
+
+# Formats each turn once and only keeps the most recent ones, so this stays cheap with a long history
+transcript = TranscriptTail(FormatTurn)
 
 def ChatLogIntegration():
-    json_data = ReadChatLogJson()
-    formatted_chatlog = ""
-    for entry in json_data:
-        if entry["role"] == "user":
-            formatted_chatlog += f"User: {entry['content']}\n"
-        elif entry["role"] == "assistant":
-            formatted_chatlog += f"Assistant: {entry['content']}\n"
-    formatted_chatlog = formatted_chatlog.replace("User", Username + " ")
-    formatted_chatlog = formatted_chatlog.replace("Assistant", AssistantName + " ")
-
-    with open(rf"{TempDirectoryPath}/Database.data", "w", encoding='utf-8') as file:
-        file.write(AnswerModifier(formatted_chatlog))
+    if transcript.update():
+        state_bus.set("database", transcript.text())
 
 def ShowChatsOnGUI():
-    file = open(rf"{TempDirectoryPath}/Database.data", "r", encoding='utf-8')
-    Data = file.read()
+    Data = state_bus.get("database")
     if len(str(Data)) > 0:
-        lines = Data.split("\n")
-        result = '\n'.join(lines)
-        file.close()
-        file = open(rf"{TempDirectoryPath}/Responses.data", "w", encoding='utf-8')
-        file.write(result)
-        file.close()
+        state_bus.set("responses", Data)
 
 def InitialExecution():
+    StartStateBusServer() # lets Backend/ImageGeneration.py wait on the bus instead of polling
     SetMicrophoneStatus("False")
     ShowTextToScreen("")
     ShowDefaultChatIfNoChat()
@@ -87,6 +79,7 @@ def MainExecution():
     Query = SpeechRecognition()
     ShowTextToScreen(f"{Username} : {Query}")
     SetAssistantStatus("thinking...")
+    Speculation = StartSpeculativeSearch(Query) # searches the raw query while the DMM runs (if enabled)
     Decision = FirstLayerDMM(Query)
 
     print("")
@@ -96,9 +89,8 @@ def MainExecution():
     G = any([i for i in Decision if i.startswith("general")])
     R = any([i for i in Decision if i.startswith("realtime")])
 
-    Merged_query = " and ".join(
-        [" ".join(i.split()[1:]) for i in Decision if i.startswith("general") or i.startswith("realtime")]
-    )
+    Sub_queries = [" ".join(i.split()[1:]) for i in Decision if i.startswith("general") or i.startswith("realtime")]
+    Merged_query = " and ".join(Sub_queries)
 
     for queries in Decision:
         if "generate" in queries:
@@ -108,24 +100,27 @@ def MainExecution():
     for queries in Decision:
         if TaskExecution == False:
             if any(queries.startswith(func) for func in Functions):
-                run(Automation(list(Decision)))
+                RunSync(Automation(list(Decision)))
                 TaskExecution = True
 
     if ImageExecution == True:
-        with open(rf"Frontend/Files/ImageGeneration.data", "w") as file:
-            file.write(f"{ImageGenerationQuery},True")
-        
+        # Queue the job on the long-lived image service instead of spawning a process per image
         try:
-            p1 = subprocess.Popen(['python', r'Backend/ImageGeneration.py'],
-                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE,
-                                   stdin=subprocess.PIPE, shell=False)
-            subprocesses.append(p1)
+            generate_image_task(ImageGenerationQuery.removeprefix("generate image").strip())
         except Exception as e:
-            print(f"Error starting ImageGeneration.py: {e}")
+            print(f"Error submitting image generation: {e}")
+
+    # Only a single sub-query can reuse the speculative search of the whole query
+    SearchResults = None
+    if Speculation is not None:
+        if (G or R) and len(Sub_queries) == 1:
+            SearchResults = Speculation.claim(Merged_query)
+        Speculation.discard() # no-op when claimed
+        print(f"Speculative search: {Speculation.stats()}")
 
     if G or R:
         SetAssistantStatus("Searching...")
-        Answer = RealtimeSearchEngine(QueryModifier(Merged_query))
+        Answer = RealtimeSearchEngine(QueryModifier(Merged_query), search_queries=Sub_queries, search_results=SearchResults)
         ShowTextToScreen(f"{AssistantName} : {Answer}")
         SetAssistantStatus("Answering...")
         TextToSpeech(Answer)
@@ -166,10 +161,9 @@ def FirstThread():
             MainExecution()
         else:
             AIStatus = GetAssistantStatus()
-            if "Available..." in AIStatus:
-                sleep(0.1)
-            else:
+            if "Available..." not in AIStatus:
                 SetAssistantStatus("Available...")
+            WaitForMicrophone() # blocks on the state bus until the mic is switched on
 
 def SecondThread():
     GraphicalUserInterface()
@@ -1,9 +1,16 @@
-import os
-from googlesearch import search
-from groq import Groq
-from json import load, dump
+import asyncio
 import datetime
+import threading
+from time import perf_counter
 from dotenv import dotenv_values
+from Backend.ChatLogStore import chat_log
+from Backend.ContextWindow import ContextBuilder, PromptPrefix
+from Backend.WebSearch import search_service
+from Backend.Streaming import TimedAsyncStream
+from Backend.HttpClients import get_async_groq_client
+from Backend.AsyncRuntime import IterSync
+from Backend.Tracing import Traced, CurrentSpan
+from Backend.Cache import NormalizeText
 
 #load environment variables from .env file
 env_vars = dotenv_values(".env")
@@ -11,32 +18,17 @@ env_vars = dotenv_values(".env")
 #retrieve specific environment variables
 Username = env_vars.get("USERNAME")
 AssistantName = env_vars.get("ASSISTANT_NAME")
-GROQ_API_KEY = env_vars.get("GROQ_API_KEY")
 
-client = Groq(api_key=GROQ_API_KEY)
+# Speculative search: start searching the raw query while the DMM is still classifying it
+SPECULATIVE_SEARCH = (env_vars.get("SPECULATIVE_SEARCH") or "False") == "True"
+SPECULATION_THRESHOLD = float(env_vars.get("SPECULATION_THRESHOLD") or 0.6) # word overlap needed to reuse it
 
 System = f"""Hello, I am {Username}, You are a very accurate and advanced AI chatbot named {AssistantName} which has real-time up-to-date information from the internet.
 *** Provide Answers In a Professional Way, make sure to add full stops, commas, question marks, and use proper grammar.***
 *** Just answer the question from the provided data in a professional way. ***"""
 
-# Function to load chat log safely from the portable path
-def load_messages_safely():
-    # Use os.path.join for cross-platform file path handling
-    file_path = os.path.join("Data", "ChatLog.json")
-    try:
-        with open(file_path, "r") as f:
-            return load(f)
-    except (FileNotFoundError, Exception) as e:
-        # If file is not found or corrupted, start with an empty list
-        if not os.path.exists(file_path):
-             with open(file_path, "w") as f:
-                 dump([], f)
-        
-        return []
-
-# function to perform a google search and format the results
-def GoogleSearch(query):
-    results = list(search(query , advanced=True , num_results=5))
+# function to format search results for the model
+def FormatSearchResults(query, results):
     answer = f"The search results for '{query}' are :\n [start]\n"
 
     for i in results:
@@ -44,6 +36,134 @@ def GoogleSearch(query):
 
     answer += "[end]"
     return answer
+
+# function to perform a google search (cached) and format the results
+@Traced("GoogleSearch")
+def GoogleSearch(query):
+    return FormatSearchResults(query, search_service.search(query))
+
+# function to search several sub-queries concurrently and format all the results
+@Traced("GoogleSearch")
+def GoogleSearchMany(queries):
+    results = search_service.search_many(queries)
+    return "\n".join(FormatSearchResults(q, r) for q, r in zip(queries, results))
+
+# --- Speculative Search ---
+
+def QuerySimilarity(a, b):
+    """Word overlap (Dice coefficient) of two queries after normalization, from 0 to 1."""
+    words_a, words_b = set(NormalizeText(a).split()), set(NormalizeText(b).split())
+    if not words_a or not words_b:
+        return 0.0
+    return 2 * len(words_a & words_b) / (len(words_a) + len(words_b))
+
+class SpeculationStats:
+    """How often a speculative search was used, and how much search latency that hid."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {"started": 0, "used": 0, "rejected": 0, "unused": 0}
+        self._saved_ms = 0.0
+
+    def record(self, outcome, saved_ms=0.0):
+        with self._lock:
+            self._counts[outcome] += 1
+            self._saved_ms += saved_ms
+
+    def stats(self):
+        with self._lock:
+            used = self._counts["used"]
+            return dict(self._counts, saved_ms=round(self._saved_ms, 1),
+                        avg_saved_ms=round(self._saved_ms / used, 1) if used else 0.0,
+                        use_rate=used / self._counts["started"] if self._counts["started"] else 0.0)
+
+speculation_stats = SpeculationStats()
+
+class SpeculativeSearch:
+    """A search on the raw user query, started before the DMM has decided it is a realtime query.
+
+    claim() hands the results to a realtime answer whose query is similar enough; discard()
+    cancels the search if it has not started and records it as unused otherwise.
+    """
+
+    def __init__(self, query, threshold=SPECULATION_THRESHOLD):
+        self.query = query
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._claimed = False
+        self._rejected = False
+        self._claimed_at = None
+        self._finished = None
+        self._start = perf_counter()
+        self.future = search_service.submit(query)
+        self.future.add_done_callback(self._on_done)
+        speculation_stats.record("started")
+
+    def _on_done(self, future):
+        self._finished = perf_counter()
+
+    def _take(self, query):
+        """True when this caller may use the results (the first similar claim wins)."""
+        with self._lock:
+            if self._claimed:
+                return False
+            similarity = QuerySimilarity(self.query, query)
+            if similarity < self.threshold:
+                self._rejected = True
+                CurrentSpan().set("speculation", f"rejected ({similarity:.2f})")
+                return False
+            self._claimed = True
+            self._claimed_at = perf_counter()
+            return True
+
+    def _use(self, results):
+        # Without speculation the search would have started at the claim and taken its full duration
+        finished = self._finished or perf_counter() # the done callback may not have run yet
+        saved_ms = (finished - self._start - max(finished - self._claimed_at, 0.0)) * 1000
+        speculation_stats.record("used", saved_ms)
+        CurrentSpan().set("speculation", f"used (saved {saved_ms:.0f} ms)")
+        return FormatSearchResults(self.query, results)
+
+    def claim(self, query):
+        """Formatted results for a realtime `query`, or None to search normally."""
+        if not self._take(query):
+            return None
+        try:
+            results = self.future.result()
+        except Exception:
+            return None # the normal search path tries again and reports the error
+        return self._use(results)
+
+    async def claim_async(self, query):
+        """claim() for callers on an event loop."""
+        if not self._take(query):
+            return None
+        try:
+            results = await asyncio.wrap_future(self.future)
+        except Exception:
+            return None
+        return self._use(results)
+
+    def discard(self):
+        """Releases an unclaimed speculation, cancelling the search if it has not started yet."""
+        with self._lock:
+            if self._claimed:
+                return
+            self._claimed = True
+        self.future.cancel() # a running search finishes in the background and only warms the cache
+        speculation_stats.record("rejected" if self._rejected else "unused")
+
+    @staticmethod
+    def stats():
+        """Process-wide speculation counters (shared by all SpeculativeSearch instances)."""
+        return speculation_stats.stats()
+
+def StartSpeculativeSearch(query):
+    """Starts a speculative search when SPECULATIVE_SEARCH is on; returns it, or None."""
+    if not SPECULATIVE_SEARCH or not query or not query.strip():
+        return None
+    return SpeculativeSearch(query)
+
 # Function to modify the chatbot's response for better formatting
 def AnswerModifier(answer):
     lines = answer.split('\n')
@@ -51,11 +171,16 @@ def AnswerModifier(answer):
     modified_answer = '\n'.join(non_empty_lines)
     return modified_answer
 #predefined system message for the chatbot and initial user message
-SystemChatbot = [
+SystemChatbot = (
     {"role": "system", "content": System},
     {"role": "user", "content": "Hello"},
     {"role": "assistant", "content": "Hello! How can I assist you today?"},
-]
+) # a tuple: shared by every call, changed by none
+# Serialized and hashed once; search results and the date and time go after the history
+SystemPrefix = PromptPrefix(SystemChatbot)
+
+# Keeps the prompt within the token budget (use context.metrics() to see tokens sent)
+context = ContextBuilder()
 
 #fumction to get real-time date and time
 def get_current_datetime():
@@ -73,41 +198,77 @@ def get_current_datetime():
     data += f"Day : {day}, Date : {date} {month} {year}, Time : {hour}:{minute}:{second}\n"
     return data
 
-#function to hanndle real-time search queries
-def RealtimeSearchEngine(prompt):
-     global SysytemChatbot, messages 
-     with open(os.path.join("Data", "ChatLog.json"), "r") as f:
-        messages = load(f)
+#function to stream answers to real-time search queries
+@Traced("RealtimeSearchEngine")
+async def RealtimeSearchEngineAsyncStream(prompt, search_queries=None, store=None, builder=None, search_results=None):
+     """Streams the answer chunk by chunk; search_queries splits a merged prompt into sub-searches.
+     store/builder select another conversation's chat log and context builder (server sessions);
+     search_results are already formatted results (e.g. from a SpeculativeSearch) that replace the search."""
+     store = chat_log if store is None else store # not 'store or chat_log': an empty store is falsy
+     builder = context if builder is None else builder
+     # store and builder take locks and touch disk, so they run off the event loop like the search
+     messages = await asyncio.to_thread(store.tail) # local to this call so concurrent searches don't share state
      messages.append({"role": "user", "content": f"{prompt}"})
 
-     SystemChatbot.append({"role": "system", "content": GoogleSearch(prompt)})
+     # The search client is blocking, so it runs on a worker thread instead of the event loop
+     if search_results:
+        CurrentSpan().set("search", "precomputed")
+     elif search_queries and len(search_queries) > 1:
+        search_results = await asyncio.to_thread(GoogleSearchMany, search_queries)
+     else:
+        search_results = await asyncio.to_thread(GoogleSearch, prompt)
+     # Per-call context goes between the history and the query, never into the shared prefix
+     call_messages = [{"role": "system", "content": search_results},
+                      {"role": "system", "content": get_current_datetime()}]
+     messages_for_api = await asyncio.to_thread(builder.build, SystemPrefix, messages[:-1], call_messages + messages[-1:])
 
      #generate response from the Groq API
-     completion = client.chat.completions.create(
+     completion = await get_async_groq_client().chat.completions.create(
             # Using the fast, stable model:
             model="llama-3.1-8b-instant",
-            messages=SystemChatbot + [{"role": "system", "content": get_current_datetime()}] + messages,
+            messages=messages_for_api,
             max_tokens=1024,
             temperature=0.7, 
             stream=True, 
-            stop=None 
-
-
+            stop=None,
+            **SystemPrefix.request_options()
      )
      answer = ""
-     for chunk in completion:
+     async for chunk in TimedAsyncStream("realtime", completion):
         if chunk.choices and chunk.choices[0].delta.content:
-            answer += chunk.choices[0].delta.content
+            text = chunk.choices[0].delta.content.replace("<\s>", "") # cleanup unwanted tokens
+            answer += text
+            yield text
 
-     answer = answer.replace("<\s>", "") # cleanup unwanted tokens
+     answer = answer.replace("<\s>", "") # cleanup tokens split across chunks
 
     # 5. Append new response to history and save log
      messages.append({"role": "assistant", "content": answer})  
-     with open(os.path.join("Data", "ChatLog.json"), "w") as f:
-        dump(messages, f, indent=4)
+     await asyncio.to_thread(store.extend, messages[-2:])
+
+#async variant: many searches can share one event loop without a thread each
+async def RealtimeSearchEngineAsync(prompt, search_queries=None, on_token=None, store=None, builder=None, search_results=None):
+     answer = ""
+     async for text in RealtimeSearchEngineAsyncStream(prompt, search_queries, store, builder, search_results):
+        if on_token:
+            on_token(text)
+        answer += text
+     return AnswerModifier(answer)
+
+#sync wrapper: streams RealtimeSearchEngineAsyncStream() from the shared async runtime
+def RealtimeSearchEngineStream(prompt, search_queries=None, store=None, builder=None, search_results=None):
+     return IterSync(RealtimeSearchEngineAsyncStream(prompt, search_queries, store, builder, search_results))
+
+#function to hanndle real-time search queries
+def RealtimeSearchEngine(prompt, search_queries=None, on_token=None, store=None, builder=None, search_results=None):
+     """Answers a prompt from fresh search results; search_queries splits a merged prompt into sub-searches."""
+     answer = ""
+     for text in RealtimeSearchEngineStream(prompt, search_queries, store, builder, search_results):
+        if on_token:
+            on_token(text)
+        answer += text
 
     # 6. Return the formatted response.
-     SystemChatbot.pop()  # remove the last system message to keep context relevant
      return AnswerModifier(answer)
 if __name__ == "__main__":
     while True: